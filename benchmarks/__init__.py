@@ -0,0 +1,6 @@
+"""
+Бенчмарки производительности проекта recipes.
+
+Каждый модуль запускается как ``python -m benchmarks.<имя>`` и работает
+с отдельной временной базой SQLite, не затрагивая db.sqlite3.
+"""
@@ -0,0 +1,92 @@
+"""
+Нагрузочный тест FastAPI-сервиса: масштабирование по числу одновременных запросов.
+
+Запросы выполняются в одном цикле событий (как в одном воркере uvicorn)
+с разным числом одновременных клиентов. Пока обработчик ждёт ответа базы,
+цикл обслуживает другие запросы, поэтому пропускная способность растёт
+с конкурентностью, пока не упрётся в пул соединений или процессор.
+
+По умолчанию приложение вызывается в процессе через ASGI на временной базе;
+с --url нагрузка подаётся на уже запущенный сервер, например
+uvicorn recipes_api.main:app --workers 1.
+
+Запуск: python -m benchmarks.api_concurrency --size 20000 --concurrency 1 4 16 64
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from .common import fill_recipes, setup_django, sync_ingredients
+
+# Маршруты, по которым распределяются запросы
+ROUTES = [
+    ('/recipes/', {'limit': 20}),
+    ('/search', {'q': 'грибы'}),
+    ('/recipes/cookable', {'ingredients': 'соль,перец,масло,лук,мука,яйца'}),
+    ('/search', {'q': 'сыр помидоры', 'prefix': 'true'}),
+]
+
+
+async def run_level(client, concurrency, total):
+    """
+    Выполняет total запросов, держа concurrency запросов в работе одновременно.
+
+    Возвращает (запросов в секунду, задержки в миллисекундах).
+    """
+    queue = iter(range(total))
+    timings = []
+
+    async def worker():
+        for n in queue:
+            path, params = ROUTES[n % len(ROUTES)]
+            started = time.perf_counter()
+            response = await client.get(path, params=params)
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 500:
+                raise RuntimeError(f'{path}: HTTP {response.status_code}')
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - started), sorted(timings)
+
+
+async def bench(args):
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        from recipes_api.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://api', timeout=60)
+
+    async with client:
+        await run_level(client, 1, len(ROUTES) * 2)
+        print(f"{'concurrency':>11} {'req/s':>8} {'p50, ms':>10} {'p95, ms':>10}")
+        for concurrency in args.concurrency:
+            rps, timings = await run_level(client, concurrency, max(args.requests, concurrency * 4))
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f'{concurrency:>11} {rps:>8.1f} {statistics.median(timings):>10.2f} {p95:>10.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument('--url', help='адрес запущенного сервиса вместо вызова в процессе')
+    args = parser.parse_args()
+
+    if not args.url:
+        setup_django()
+        fill_recipes(args.size)
+        from recipes import search
+        search.rebuild_index()
+        sync_ingredients()
+
+    asyncio.run(bench(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Общие утилиты бенчмарков: настройка Django на отдельной базе,
+быстрое заполнение таблиц и замер времени.
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Словари для правдоподобных текстов рецептов
+DISHES = ['суп', 'салат', 'пирог', 'рагу', 'запеканка', 'паста', 'омлет', 'каша', 'плов', 'котлеты']
+ADJECTIVES = ['домашний', 'быстрый', 'сытный', 'лёгкий', 'пряный', 'летний', 'деревенский', 'праздничный']
+INGREDIENTS = [
+    'мука', 'молоко', 'яйца', 'сахар', 'соль', 'перец', 'масло', 'лук', 'чеснок', 'морковь',
+    'картофель', 'помидоры', 'огурцы', 'сыр', 'сметана', 'сливки', 'курица', 'говядина', 'свинина',
+    'рыба', 'креветки', 'грибы', 'рис', 'гречка', 'макароны', 'фасоль', 'капуста', 'свёкла',
+    'перец болгарский', 'зелень', 'укроп', 'петрушка', 'лимон', 'мёд', 'орехи', 'изюм', 'творог',
+    'кефир', 'йогурт', 'шпинат', 'кабачки', 'баклажаны', 'тыква', 'яблоки', 'груши', 'бекон',
+]
+VARIETIES = ['домашний', 'копчёный', 'свежий', 'сушёный', 'тёртый', 'молодой', 'острый', 'сладкий']
+# Базовые продукты и их разновидности (~400 наименований); частота убывает
+# с номером по закону Ципфа: соль встречается гораздо чаще копчёного изюма
+INGREDIENTS = INGREDIENTS + [f'{base} {variety}' for variety in VARIETIES for base in INGREDIENTS]
+INGREDIENT_WEIGHTS = [1 / (n + 1) for n in range(len(INGREDIENTS))]
+STEPS = [
+    'Нарежьте овощи кубиками.', 'Обжарьте лук до золотистого цвета.', 'Смешайте все ингредиенты.',
+    'Тушите на медленном огне двадцать минут.', 'Запекайте в духовке при 180 градусах.',
+    'Посолите и поперчите по вкусу.', 'Подавайте горячим с зеленью.', 'Взбейте яйца с молоком.',
+]
+
+
+def make_recipe_row(n, rng):
+    """
+    Возвращает (title, description, steps, cooking_time, ingredients) для n-го рецепта.
+    """
+    dish = rng.choice(DISHES)
+    count = rng.randint(4, 10)
+    ingredients = list(dict.fromkeys(rng.choices(INGREDIENTS, INGREDIENT_WEIGHTS, k=count * 2)))[:count]
+    title = f'{rng.choice(ADJECTIVES).capitalize()} {dish} №{n}'
+    description = f'{title} — {dish} с ингредиентами: {", ".join(ingredients[:3])}.'
+    # Длина текстов как у настоящих рецептов: описание в пару предложений, 3-12 шагов
+    description += ' ' + ' '.join(rng.sample(STEPS, rng.randint(0, 2)))
+    steps = '\n'.join(f'{n}. {step}' for n, step in enumerate(rng.choices(STEPS, k=rng.randint(3, 12)), 1))
+    return title, description, steps, rng.randint(5, 180), ', '.join(ingredients)
+
+
+def setup_django(db_path=None):
+    """
+    Настраивает Django на временной базе SQLite и применяет миграции.
+
+    Возвращает путь к файлу базы.
+    """
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'recipes_project.settings')
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='recipes-bench-'), 'bench.sqlite3')
+
+    # Django и FastAPI-сервис берут базу из общей настройки (recipes/dbconfig.py)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return db_path
+
+
+def reset_recipes():
+    """
+    Удаляет все рецепты и связи с категориями.
+    """
+    from django.db import connection
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM recipes_recipecategory')
+        cursor.execute('DELETE FROM recipes_recipe')
+
+
+def fill_recipes(total, chunk=10000, seed=0, authors=None):
+    """
+    Быстро добавляет total рецептов пачками executemany.
+
+    Тексты генерируются детерминированно из seed. authors — id авторов,
+    между которыми распределяются рецепты (по умолчанию один автор bench).
+    """
+    from django.contrib.auth.models import User
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    if not authors:
+        authors = [User.objects.get_or_create(username='bench')[0].id]
+    rng = random.Random(seed)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    sql = ('INSERT INTO recipes_recipe '
+           '(title, description, steps, cooking_time, image, ingredients, author_id, updated_at) '
+           'VALUES (%s, %s, %s, %s, %s, %s, %s, %s)')
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, total, chunk):
+            rows = []
+            for n in range(start, min(start + chunk, total)):
+                title, description, steps, cooking_time, ingredients = make_recipe_row(n, rng)
+                rows.append((title, description, steps, cooking_time, None, ingredients, rng.choice(authors), now))
+            cursor.executemany(sql, rows)
+
+
+def fill_categories(count=20, per_recipe=3, seed=0):
+    """
+    Создаёт count категорий и связывает каждый рецепт с 1..per_recipe из них.
+
+    Популярность категорий неравномерна, как в реальном каталоге;
+    счётчики рецептов категорий пересчитываются.
+    """
+    from django.db import connection, transaction
+    from recipes import categories
+    from recipes.models import Category, Recipe
+
+    rng = random.Random(seed)
+    ids = [Category.objects.get_or_create(name=f'Категория {n}')[0].id for n in range(count)]
+    weights = [1 / (n + 1) for n in range(count)]
+    sql = 'INSERT OR IGNORE INTO recipes_recipecategory (recipe_id, category_id) VALUES (%s, %s)'
+    with transaction.atomic(), connection.cursor() as cursor:
+        rows = [(recipe_id, category_id)
+                for recipe_id in Recipe.objects.values_list('id', flat=True).iterator()
+                for category_id in set(rng.choices(ids, weights, k=rng.randint(1, per_recipe)))]
+        cursor.executemany(sql, rows)
+    categories.reconcile()
+    return ids
+
+
+def sync_ingredients(chunk=5000):
+    """
+    Строит индекс ингредиентов (Ingredient / RecipeIngredient) для всех рецептов.
+    """
+    from recipes import pantry
+    from recipes.models import Recipe
+
+    recipes = Recipe.objects.only('id', 'ingredients').order_by('id')
+    total = recipes.count()
+    for start in range(0, total, chunk):
+        pantry.sync_recipes(recipes[start:start + chunk])
+
+
+def measure(func, repeat=200, warmup=10):
+    """
+    Вызывает func repeat раз и возвращает перцентили времени в миллисекундах.
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'p50': statistics.median(timings),
+        'p95': timings[int(len(timings) * 0.95) - 1],
+        'max': timings[-1],
+    }
@@ -0,0 +1,48 @@
+"""
+Бенчмарк выбора случайных рецептов для главной страницы.
+
+Показывает, что время recipes.featured.random_recipes не растёт с размером
+каталога, в отличие от прежнего sample(list(Recipe.objects.all()), ...).
+
+Запуск: python -m benchmarks.featured --sizes 1000 100000 1000000
+"""
+
+import argparse
+import random
+
+from .common import fill_recipes, measure, reset_recipes, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--baseline', action='store_true',
+                        help='замерить также старый способ через list(Recipe.objects.all())')
+    args = parser.parse_args()
+
+    setup_django()
+    from recipes import featured
+    from recipes.models import Recipe
+
+    def baseline():
+        recipes = Recipe.objects.all()
+        return random.sample(list(recipes), min(5, recipes.count()))
+
+    print(f"{'recipes':>10} {'p50, ms':>10} {'p95, ms':>10} {'max, ms':>10}  method")
+    for size in args.sizes:
+        reset_recipes()
+        fill_recipes(size)
+        featured.invalidate()
+        cases = [('featured', lambda: featured.random_recipes(5))]
+        if args.baseline:
+            cases.append(('baseline', baseline))
+        for name, func in cases:
+            # Старый способ слишком медленный для сотен повторов на больших размерах
+            repeat = args.repeat if name == 'featured' else max(3, args.repeat // 50)
+            stats = measure(func, repeat=repeat, warmup=1)
+            print(f"{size:>10} {stats['p50']:>10.3f} {stats['p95']:>10.3f} {stats['max']:>10.3f}  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Бенчмарк общих фильтров списка рецептов (recipes/filterspec.py).
+
+Для частых сочетаний фильтров замеряется первая страница списка
+(20 рецептов) через Django (recipes/filters.py) и через запрос SQLAlchemy
+сервиса (recipes_api/filters.py). Для сравнения приводится прежний способ
+без общего движка: отдельный запрос на каждый фильтр (как отдельные
+маршруты /recipes/category/, /recipes/author/, /recipes/ingredient/)
+и пересечение id на клиенте.
+
+Запуск: python -m benchmarks.filters --size 100000
+"""
+
+import argparse
+import asyncio
+
+from .common import fill_categories, fill_recipes, measure, setup_django, sync_ingredients
+
+PAGE_SIZE = 20
+
+
+def cases(category_ids):
+    popular, rare = category_ids[0], category_ids[-1]
+    return [
+        ('категория', {'category': [popular]}),
+        ('категории ИЛИ', {'category': [popular, rare]}),
+        ('категории И', {'category_all': [popular, category_ids[1]]}),
+        ('время 20-40', {'time_min': [20], 'time_max': [40], 'order': 'cooking_time'}),
+        ('ингредиент', {'ingredient': ['грибы']}),
+        ('кат.+ингр.-искл.', {'category': [popular], 'ingredient': ['сыр'], 'exclude': ['бекон']}),
+        ('всё сразу', {'category': [popular], 'author': [1], 'time_max': [60], 'ingredient': ['лук'],
+                       'exclude': ['орехи'], 'order': 'title'}),
+    ]
+
+
+def getlist(params):
+    return lambda name: [str(value) for value in params.get(name, [])]
+
+
+def baseline_ids(params):
+    """
+    Прежний способ: по запросу на фильтр, пересечение множеств id в Python.
+    """
+    from recipes import ingredients
+    from recipes.models import Ingredient, RecipeCategory, RecipeIngredient
+
+    sets = []
+    for category_id in params.get('category', []):
+        sets.append(set(RecipeCategory.objects.filter(category_id=category_id).values_list('recipe_id', flat=True)))
+    for name in params.get('ingredient', []):
+        ingredient_ids = Ingredient.objects.filter(key__contains=ingredients.normalize(name)).values('id')
+        sets.append(set(RecipeIngredient.objects.filter(ingredient_id__in=ingredient_ids)
+                        .values_list('recipe_id', flat=True)))
+    ids = set.intersection(*sets) if sets else set()
+    return sorted(ids)[:PAGE_SIZE]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--categories', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    fill_recipes(args.size)
+    category_ids = fill_categories(args.categories)
+    sync_ingredients()
+
+    from recipes import filters, filterspec
+    from recipes.keyset import ORDERINGS
+    from recipes.models import Recipe
+    from recipes.pagination import paginate
+    from recipes_api import filters as api_filters
+    from recipes_api import serialization
+    from recipes_api.database import Recipe as ApiRecipe, ReadSessionLocal, async_read_engine
+    from recipes_api.pagination import paginate_statement
+
+    loop = asyncio.new_event_loop()
+
+    async def api_page(spec, order):
+        async with ReadSessionLocal() as db:
+            stmt = serialization.summary_select(serialization.SUMMARY_FIELDS, *ORDERINGS[order or 'id'])
+            where = api_filters.condition(spec)
+            if where is not None:
+                stmt = stmt.where(where)
+            stmt, _ = paginate_statement(stmt, ApiRecipe, page_size=PAGE_SIZE, ordering=order)
+            return (await db.execute(stmt)).all()
+
+    print(f"{'filters':>18} {'rows':>5} {'django p50':>11} {'p95':>8} {'api p50':>9} {'p95':>8} {'baseline p50':>13}")
+    for name, params in cases(category_ids):
+        spec = filterspec.parse(getlist(params))
+        order = params.get('order')
+        queryset = filters.apply(Recipe.objects.for_cards(), spec)
+        rows = len(paginate(queryset, page_size=PAGE_SIZE, ordering=order).items)
+        django = measure(lambda: paginate(queryset, page_size=PAGE_SIZE, ordering=order), repeat=args.repeat)
+        api = measure(lambda: loop.run_until_complete(api_page(spec, order)), repeat=args.repeat)
+        line = (f"{name:>18} {rows:>5} {django['p50']:>11.2f} {django['p95']:>8.2f} "
+                f"{api['p50']:>9.2f} {api['p95']:>8.2f}")
+        if set(params) <= {'category', 'ingredient'}:
+            baseline = measure(lambda: baseline_ids(params), repeat=max(3, args.repeat // 5), warmup=1)
+            line += f" {baseline['p50']:>13.2f}"
+        print(line)
+    loop.run_until_complete(async_read_engine.dispose())
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
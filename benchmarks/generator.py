@@ -0,0 +1,113 @@
+"""
+Генератор синтетического каталога для бенчмарков.
+
+Заполняет auth_user, Category, Recipe и RecipeCategory на заданный размер
+(1k, 100k, 1M рецептов) детерминированно из seed, затем строит производные
+данные так же, как приложение: индекс ингредиентов, полнотекстовый индекс,
+счётчики категорий и похожие рецепты. Популярность категорий и авторов
+неравномерна (закон Ципфа), у рецепта 1..--fan-out категорий.
+
+Базу удобно сгенерировать один раз и переиспользовать в прогонах:
+python -m benchmarks.generator --size 100000 --output /tmp/bench-100k.sqlite3
+python -m benchmarks.suite --db /tmp/bench-100k.sqlite3
+"""
+
+import argparse
+import random
+import time
+
+from .common import fill_categories, fill_recipes, setup_django, sync_ingredients
+
+# Пароль пользователей каталога (у одного — настоящий хеш для замера входа)
+PASSWORD = 'bench-password'
+
+
+def default_authors(size):
+    """
+    Число авторов для каталога: в среднем около 20 рецептов на автора.
+    """
+    return max(1, min(size // 20, 50000))
+
+
+def fill_users(count, chunk=5000):
+    """
+    Добавляет count пользователей bench_<n>; возвращает их id.
+
+    Пароль хешируется только у первого: хеширование всех заняло бы минуты,
+    а остальные в бенчмарках входят без пароля (force_login).
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+
+    existing = User.objects.filter(username__startswith='bench_').count()
+    users = [User(username=f'bench_{n}', email=f'bench_{n}@example.com', password='!')
+             for n in range(existing, count)]
+    if users:
+        users[0].password = make_password(PASSWORD)
+    for start in range(0, len(users), chunk):
+        User.objects.bulk_create(users[start:start + chunk])
+    return list(User.objects.filter(username__startswith='bench_').order_by('id').values_list('id', flat=True))
+
+
+def generate(size, authors=None, categories=30, fan_out=4, seed=0):
+    """
+    Заполняет пустую базу каталогом из size рецептов. Возвращает сводку о данных.
+    """
+    from recipes import search, similar
+
+    timings = {}
+    started = time.perf_counter()
+    author_ids = fill_users(authors or default_authors(size))
+    # Авторы по Ципфу: у немногих много рецептов, у большинства — несколько
+    rng = random.Random(seed)
+    weights = [1 / (n + 1) for n in range(len(author_ids))]
+    popular = rng.choices(author_ids, weights, k=min(len(author_ids) * 4, 200000))
+    timings['users'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    fill_recipes(size, seed=seed, authors=popular)
+    timings['recipes'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    category_ids = fill_categories(categories, per_recipe=fan_out, seed=seed)
+    timings['categories'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    sync_ingredients()
+    timings['ingredients'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    search.rebuild_index()
+    timings['search'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    similar.rebuild()
+    timings['similar'] = time.perf_counter() - started
+
+    return {
+        'size': size,
+        'authors': len(author_ids),
+        'categories': len(category_ids),
+        'fan_out': fan_out,
+        'seed': seed,
+        'timings': {name: round(seconds, 2) for name, seconds in timings.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000, help='число рецептов')
+    parser.add_argument('--authors', type=int, help='число авторов (по умолчанию size / 20)')
+    parser.add_argument('--categories', type=int, default=30)
+    parser.add_argument('--fan-out', type=int, default=4, help='наибольшее число категорий у рецепта')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='файл базы (по умолчанию — временный)')
+    args = parser.parse_args()
+
+    db_path = setup_django(args.output)
+    summary = generate(args.size, args.authors, args.categories, args.fan_out, args.seed)
+    print(f'{db_path}: {summary}')
+
+
+if __name__ == '__main__':
+    main()
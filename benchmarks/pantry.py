@@ -0,0 +1,50 @@
+"""
+Бенчмарк подбора рецептов по набору продуктов («что приготовить»).
+
+Запуск: python -m benchmarks.pantry --size 100000
+"""
+
+import argparse
+import time
+
+from .common import fill_recipes, measure, setup_django
+
+PANTRIES = [
+    ['мука', 'молоко', 'яйца', 'сахар', 'соль', 'масло'],
+    ['курица', 'лук', 'морковь', 'картофель', 'соль', 'перец', 'чеснок', 'сыр тёртый'],
+    ['тыква', 'мёд', 'орехи', 'изюм', 'творог', 'сметана', 'сахар', 'яблоки', 'соль', 'мука', 'молоко',
+     'яйца', 'масло', 'перец', 'лук', 'сыр', 'рис', 'морковь', 'чеснок', 'зелень'],
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from recipes import pantry
+    from recipes.models import Recipe
+
+    fill_recipes(args.size)
+    started = time.perf_counter()
+    last_id = 0
+    while True:
+        batch = list(Recipe.objects.only('id', 'ingredients').filter(id__gt=last_id).order_by('id')[:5000])
+        if not batch:
+            break
+        pantry.sync_recipes(batch)
+        last_id = batch[-1].id
+    print(f'Индекс ингредиентов для {args.size} рецептов построен за {time.perf_counter() - started:.1f} с')
+
+    print(f"{'products':>8} {'missing':>8} {'found':>6} {'p50, ms':>10} {'p95, ms':>10}")
+    for products in PANTRIES:
+        for max_missing in (0, 2):
+            found = len(pantry.cookable_ids(products, max_missing))
+            stats = measure(lambda: pantry.cookable_ids(products, max_missing), repeat=args.repeat, warmup=2)
+            print(f"{len(products):>8} {max_missing:>8} {found:>6} {stats['p50']:>10.3f} {stats['p95']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
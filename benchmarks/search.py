@@ -0,0 +1,46 @@
+"""
+Бенчмарк полнотекстового поиска против ILIKE '%x%'.
+
+Сравнивает прежний путь get_recipes_by_ingredient (подстрока по ингредиентам)
+с поиском по индексу FTS5 на каталоге заданного размера.
+
+Запуск: python -m benchmarks.search --size 100000
+"""
+
+import argparse
+import time
+
+from .common import fill_recipes, measure, setup_django
+
+QUERIES = ['грибы', 'сыр помидоры', 'курица сливки', 'бекон', 'тыква мёд']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    setup_django()
+    from recipes import search
+    from recipes.models import Recipe
+
+    fill_recipes(args.size)
+    started = time.perf_counter()
+    search.rebuild_index()
+    print(f'Индекс для {args.size} рецептов построен за {time.perf_counter() - started:.1f} с')
+
+    def ilike(query):
+        # Как в прежнем API: подстрока без учёта словоформ, без ранжирования
+        return list(Recipe.objects.filter(ingredients__icontains=query).values_list('id', flat=True))
+
+    print(f"{'query':<16} {'method':<8} {'p50, ms':>10} {'p95, ms':>10}")
+    for query in QUERIES:
+        for name, func in (('ilike', lambda: ilike(query)),
+                           ('fts', lambda: search.search_ids(query, limit=20))):
+            stats = measure(func, repeat=args.repeat, warmup=2)
+            print(f"{query:<16} {name:<8} {stats['p50']:>10.3f} {stats['p95']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
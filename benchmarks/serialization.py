@@ -0,0 +1,93 @@
+"""
+Бенчмарк сериализации больших списков рецептов FastAPI-сервиса.
+
+Сравниваются способы собрать тело ответа для limit рецептов:
+- orm — объекты ORM со связями через jsonable_encoder и JSONResponse (как раньше);
+- detail — те же объекты через модель RecipeDetail и orjson;
+- summary — краткие записи: выбор только столбцов и orjson (serialization.py);
+- fields — то же с fields=id,title.
+Время включает запрос к базе; память — пик tracemalloc на один ответ.
+
+Запуск: python -m benchmarks.serialization --size 20000 --limit 1000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from .common import fill_recipes, setup_django
+
+
+def cases(limit):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+
+    from recipes_api import serialization
+    from recipes_api.database import Recipe, with_related
+    from recipes_api.schemas import RecipeDetail
+
+    details = TypeAdapter(list[RecipeDetail])
+
+    async def orm(db):
+        recipes = (await db.scalars(with_related(select(Recipe)).order_by(Recipe.id).limit(limit))).all()
+        return JSONResponse(jsonable_encoder(recipes)).body
+
+    async def detail(db):
+        recipes = (await db.scalars(with_related(select(Recipe)).order_by(Recipe.id).limit(limit))).all()
+        return ORJSONResponse(details.dump_python(details.validate_python(recipes, from_attributes=True))).body
+
+    def summary(names):
+        async def run(db):
+            rows = await db.execute(serialization.summary_select(names).order_by(Recipe.id).limit(limit))
+            return serialization.json_response(serialization.to_dicts(rows, names)).body
+        return run
+
+    return [
+        ('orm', orm),
+        ('detail', detail),
+        ('summary', summary(serialization.SUMMARY_FIELDS)),
+        ('fields', summary(serialization.summary_fields('id,title'))),
+    ]
+
+
+async def bench(args):
+    from recipes_api.database import ReadSessionLocal, async_read_engine
+
+    print(f"{'method':>8} {'p50, ms':>9} {'p95, ms':>9} {'KiB':>8} {'peak, KiB':>10}")
+    for name, func in cases(args.limit):
+        timings = []
+        for n in range(args.repeat + 2):
+            async with ReadSessionLocal() as db:
+                started = time.perf_counter()
+                body = await func(db)
+                if n >= 2:  # Первые прогоны — прогрев
+                    timings.append((time.perf_counter() - started) * 1000)
+        async with ReadSessionLocal() as db:
+            tracemalloc.start()
+            await func(db)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        print(f'{name:>8} {statistics.median(timings):>9.2f} {p95:>9.2f} {len(body) / 1024:>8.0f} {peak / 1024:>10.0f}')
+    await async_read_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    fill_recipes(args.size)
+    asyncio.run(bench(args))
+
+
+if __name__ == '__main__':
+    main()
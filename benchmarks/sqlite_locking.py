@@ -0,0 +1,134 @@
+"""
+Бенчмарк блокировок SQLite при одновременной работе нескольких процессов.
+
+Процессы-читатели выполняют запросы страниц (список, рецепт по id),
+процессы-писатели — типичное сохранение рецепта: чтение и запись в одной
+транзакции. Сравниваются два профиля соединений:
+- default — журнал отката, отложенные транзакции (как до recipes/sqlitetuning.py);
+- tuned — WAL и PRAGMA из recipes/sqlitetuning.py, транзакции BEGIN IMMEDIATE.
+Ожиданием блокировки считается операция дольше --wait-threshold мс.
+
+Запуск: python -m benchmarks.sqlite_locking --size 20000 --readers 8 --writers 2 --seconds 5
+"""
+
+import argparse
+import multiprocessing
+import random
+import sqlite3
+import statistics
+import time
+
+from .common import fill_recipes, setup_django
+
+PROFILES = ['default', 'tuned']
+
+
+def connect(db_path, profile, read_only=False):
+    """
+    Соединение как у приложения в выбранном профиле.
+    """
+    from recipes import sqlitetuning
+
+    # isolation_level=None: транзакции открываются явно, как в Django
+    connection = sqlite3.connect(db_path, timeout=sqlitetuning.BUSY_TIMEOUT / 1000, isolation_level=None)
+    if profile == 'tuned':
+        sqlitetuning.apply(connection, read_only)
+    return connection
+
+
+def reader(db_path, profile, start, deadline, max_id, seed, results):
+    connection = connect(db_path, profile, read_only=True)
+    time.sleep(max(0, start - time.time()))
+    rng = random.Random(seed)
+    timings, errors = [], 0
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            if rng.random() < 0.5:
+                connection.execute('SELECT id, title, description FROM recipes_recipe WHERE id > ? '
+                                   'ORDER BY id LIMIT 20', (rng.randint(0, max_id),)).fetchall()
+            else:
+                connection.execute('SELECT * FROM recipes_recipe WHERE id = ?', (rng.randint(1, max_id),)).fetchone()
+        except sqlite3.OperationalError:
+            errors += 1
+        timings.append((time.perf_counter() - started) * 1000)
+    results.put(('read', timings, errors))
+
+
+def writer(db_path, profile, start, deadline, max_id, seed, results):
+    connection = connect(db_path, profile)
+    time.sleep(max(0, start - time.time()))
+    begin = 'BEGIN IMMEDIATE' if profile == 'tuned' else 'BEGIN'
+    rng = random.Random(seed)
+    timings, errors = [], 0
+    while time.time() < deadline:
+        recipe_id = rng.randint(1, max_id)
+        started = time.perf_counter()
+        try:
+            connection.execute(begin)
+            connection.execute('SELECT cooking_time FROM recipes_recipe WHERE id = ?', (recipe_id,)).fetchone()
+            connection.execute('UPDATE recipes_recipe SET cooking_time = ? WHERE id = ?',
+                               (rng.randint(5, 180), recipe_id))
+            connection.execute('COMMIT')
+        except sqlite3.OperationalError:
+            errors += 1
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+        timings.append((time.perf_counter() - started) * 1000)
+    results.put(('write', timings, errors))
+
+
+def run_profile(db_path, profile, args, max_id):
+    """
+    Запускает читателей и писателей на args.seconds секунд. Возвращает сводку по видам операций.
+    """
+    journal_mode = 'wal' if profile == 'tuned' else 'delete'
+    sqlite3.connect(db_path).execute(f'PRAGMA journal_mode = {journal_mode}').fetchone()
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    # Все процессы начинают одновременно, когда уже запущены
+    start = time.time() + 2
+    deadline = start + args.seconds
+    workers = [context.Process(target=reader, args=(db_path, profile, start, deadline, max_id, n, results))
+               for n in range(args.readers)]
+    workers += [context.Process(target=writer, args=(db_path, profile, start, deadline, max_id, 1000 + n, results))
+                for n in range(args.writers)]
+    for process in workers:
+        process.start()
+    summary = {'read': ([], 0), 'write': ([], 0)}
+    for _ in workers:
+        kind, timings, errors = results.get()
+        summary[kind] = (summary[kind][0] + timings, summary[kind][1] + errors)
+    for process in workers:
+        process.join()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=20000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--wait-threshold', type=float, default=20, help='операция дольше, мс — ожидание блокировки')
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    fill_recipes(args.size)
+    from django.db import connections
+    connections.close_all()  # Режим журнала меняется только без других соединений
+
+    print(f"{'profile':>8} {'kind':>6} {'ops/s':>9} {'p50, ms':>9} {'p95, ms':>9} {'max, ms':>9} "
+          f"{'waits, %':>9} {'locked':>7}")
+    for profile in PROFILES:
+        for kind, (timings, errors) in run_profile(db_path, profile, args, args.size).items():
+            timings.sort()
+            waits = sum(1 for timing in timings if timing > args.wait_threshold) / len(timings) * 100
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f'{profile:>8} {kind:>6} {len(timings) / args.seconds:>9.0f} {statistics.median(timings):>9.2f} '
+                  f'{p95:>9.2f} {timings[-1]:>9.1f} {waits:>9.2f} {errors:>7}')
+
+
+if __name__ == '__main__':
+    main()
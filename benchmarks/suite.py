@@ -0,0 +1,394 @@
+"""
+Набор бенчмарков всех страниц Django и всех маршрутов FastAPI-сервиса.
+
+Каждое представление из recipes/urls.py и каждый маршрут recipes_api/main.py
+вызывается в процессе (django.test.Client и httpx через ASGI) на каталоге
+из benchmarks/generator.py. По каждому случаю записываются перцентили
+времени ответа, число SQL-запросов на запрос и пик памяти (tracemalloc,
+отдельным прогоном, чтобы трассировка не искажала время).
+
+Результат сохраняется в JSON вместе с размером каталога и коммитом; при
+--compare прогон сравнивается с сохранённым, и рост p50 больше порога или
+числа SQL-запросов считается регрессией (код выхода 1).
+
+Запуск:
+python -m benchmarks.generator --size 100000 --output /tmp/bench-100k.sqlite3
+python -m benchmarks.suite --db /tmp/bench-100k.sqlite3 --output base.json
+python -m benchmarks.suite --db /tmp/bench-100k.sqlite3 --compare base.json
+"""
+
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .common import BASE_DIR, setup_django
+from .generator import PASSWORD, generate
+
+# Случаи Django: (имя, имя URL, нужен ли вход, запрос по номеру итерации -> (метод, путь, данные))
+# Случаи API: (имя, (метод, шаблон маршрута), запрос по номеру итерации -> (метод, путь, параметры httpx))
+# Необязательный последний элемент — доля от --repeat для тяжёлых случаев (выгрузка всего каталога)
+
+# Время ниже этого порога (мс) не сравнивается: разброс больше самого времени
+NOISE_MS = 0.5
+
+
+def recipe_form(ctx, n):
+    return {
+        'title': f'Рецепт бенчмарка {n}',
+        'description': 'Описание рецепта бенчмарка.',
+        'steps': '1. Смешайте.\n2. Запеките.',
+        'cooking_time': 30,
+        'ingredients': 'мука, яйца, молоко',
+        'categories': ctx['category_ids'][:2],
+    }
+
+
+def recipe_item(ctx, n, **fields):
+    return dict(recipe_form(ctx, n), author_id=ctx['author_id'], **fields)
+
+
+def django_cases(ctx):
+    from django.urls import reverse
+
+    recipe_ids = ctx['recipe_ids']
+    popular = ctx['category_ids'][0]
+    own = ctx['own_recipe_id']
+    counter = ctx['counter']
+
+    def detail(n):
+        return 'get', reverse('recipe_detail', args=[recipe_ids[n % len(recipe_ids)]]), None
+
+    return [
+        ('index', 'index', False, lambda n: ('get', reverse('index'), None)),
+        ('recipe_detail', 'recipe_detail', False, detail),
+        ('register GET', 'register', False, lambda n: ('get', reverse('register'), None)),
+        ('register POST', 'register', False, lambda n: ('post', reverse('register'), {
+            'username': f'bench_new_{next(counter)}', 'email': 'new@example.com',
+            'password': PASSWORD, 'password_confirm': PASSWORD})),
+        ('login GET', 'login', False, lambda n: ('get', reverse('login'), None)),
+        ('login POST', 'login', False, lambda n: ('post', reverse('login'), {
+            'username': ctx['username'], 'password': PASSWORD})),
+        ('logout', 'logout', True, lambda n: ('get', reverse('logout'), None)),
+        ('recipe_create GET', 'recipe_create', True, lambda n: ('get', reverse('recipe_create'), None)),
+        ('recipe_create POST', 'recipe_create', True,
+         lambda n: ('post', reverse('recipe_create'), recipe_form(ctx, next(counter)))),
+        ('recipe_edit GET', 'recipe_edit', True, lambda n: ('get', reverse('recipe_edit', args=[own]), None)),
+        ('recipe_edit POST', 'recipe_edit', True,
+         lambda n: ('post', reverse('recipe_edit', args=[own]), recipe_form(ctx, n))),
+        ('recipe_list', 'recipe_list', False, lambda n: ('get', reverse('recipe_list'), None)),
+        ('recipe_list category', 'recipe_list', False,
+         lambda n: ('get', reverse('recipe_list'), {'category': popular})),
+        ('recipe_list filters', 'recipe_list', False, lambda n: ('get', reverse('recipe_list'), {
+            'category': popular, 'time_max': 60, 'ingredient': 'лук', 'order': 'cooking_time'})),
+        ('recipe_list search', 'recipe_list', False, lambda n: ('get', reverse('recipe_list'), {'q': 'грибы'})),
+        ('category_create GET', 'category_create', True, lambda n: ('get', reverse('category_create'), None)),
+        ('category_create POST', 'category_create', True,
+         lambda n: ('post', reverse('category_create'), {'name': f'Категория бенчмарка {next(counter)}'})),
+        ('metrics', 'metrics', False, lambda n: ('get', reverse('metrics'), None)),
+    ]
+
+
+def api_cases(ctx):
+    recipe_ids = ctx['recipe_ids']
+    titles = ctx['titles']
+    popular = ctx['category_ids'][0]
+    counter = ctx['counter']
+
+    def bulk_create(n):
+        start = next(counter)
+        items = [recipe_item(ctx, f'{start}-{k}') for k in range(ctx['bulk'])]
+        return 'post', '/recipes/bulk', {'json': items}
+
+    def bulk_update(n):
+        items = [{'id': recipe_id, 'description': f'Обновлено {n}'} for recipe_id in recipe_ids[:ctx['bulk']]]
+        return 'put', '/recipes/bulk', {'json': items}
+
+    return [
+        ('GET /recipes/', ('GET', '/recipes/'), lambda n: ('get', '/recipes/', {'params': {'limit': 20}})),
+        ('GET /recipes/ filters', ('GET', '/recipes/'), lambda n: ('get', '/recipes/', {'params': {
+            'category': popular, 'time_max': 60, 'ingredient': 'лук', 'order': 'cooking_time'}})),
+        ('GET /recipes/cookable', ('GET', '/recipes/cookable'), lambda n: ('get', '/recipes/cookable', {
+            'params': {'ingredients': 'соль,перец,масло,лук,мука,яйца', 'max_missing': 1}})),
+        ('GET /recipes/export', ('GET', '/recipes/export'), lambda n: ('get', '/recipes/export', {}), 0.1),
+        ('GET /recipes/{title}', ('GET', '/recipes/{recipe_title}'),
+         lambda n: ('get', f'/recipes/{titles[n % len(titles)]}', {})),
+        ('GET /recipes/batch', ('GET', '/recipes/batch'), lambda n: ('get', '/recipes/batch', {'params': {
+            'ids': ','.join(map(str, recipe_ids[n % len(recipe_ids):][:50]))}})),
+        ('GET /recipes/ingredient', ('GET', '/recipes/ingredient/{ingredient}'),
+         lambda n: ('get', '/recipes/ingredient/грибы', {})),
+        ('GET /recipes/category', ('GET', '/recipes/category/{category_id}'),
+         lambda n: ('get', f'/recipes/category/{popular}', {})),
+        ('GET /categories', ('GET', '/categories'), lambda n: ('get', '/categories', {})),
+        ('GET /search', ('GET', '/search'), lambda n: ('get', '/search', {'params': {'q': 'грибы'}})),
+        ('GET /search prefix', ('GET', '/search'),
+         lambda n: ('get', '/search', {'params': {'q': 'сыр помид', 'prefix': 'true'}})),
+        ('GET /recipes/{id}/similar', ('GET', '/recipes/{recipe_id}/similar'),
+         lambda n: ('get', f'/recipes/{recipe_ids[n % len(recipe_ids)]}/similar', {})),
+        ('GET /recipes/author', ('GET', '/recipes/author/{author_id}'),
+         lambda n: ('get', f'/recipes/author/{ctx["author_id"]}', {})),
+        ('POST /recipes/', ('POST', '/recipes/'),
+         lambda n: ('post', '/recipes/', {'json': recipe_item(ctx, next(counter))})),
+        ('POST /recipes/bulk', ('POST', '/recipes/bulk'), bulk_create, 0.2),
+        ('PUT /recipes/bulk', ('PUT', '/recipes/bulk'), bulk_update, 0.2),
+        ('PUT /recipes/{id}', ('PUT', '/recipes/{recipe_id}'), lambda n: ('put', f'/recipes/{recipe_ids[0]}', {
+            'json': {'description': f'Обновлено {n}', 'categories': ctx['category_ids'][:2]}})),
+        ('GET /metrics', ('GET', '/metrics'), lambda n: ('get', '/metrics', {})),
+    ]
+
+
+def uncovered(django_list, api_list):
+    """
+    Имена URL Django и маршруты API, для которых нет ни одного случая.
+    """
+    from fastapi.routing import APIRoute
+
+    from recipes.urls import urlpatterns
+    from recipes_api.main import app
+
+    names = {pattern.name for pattern in urlpatterns} - {case[1] for case in django_list}
+    # Маршруты приложения без служебных /docs и /openapi.json
+    routes = {(method, route.path) for route in app.routes if isinstance(route, APIRoute)
+              for method in route.methods}
+    return sorted(names), sorted(routes - {case[1] for case in api_list})
+
+
+def catalogue(size):
+    """
+    Выбирает из каталога рецепты, категории и пользователя для запросов.
+    """
+    from django.contrib.auth.models import User
+    from recipes.models import Category, Recipe
+
+    user = User.objects.filter(username__startswith='bench_').order_by('id').first()
+    recipe_ids = list(Recipe.objects.order_by('?').values_list('id', flat=True)[:50])
+    own = Recipe.objects.filter(author=user).values_list('id', flat=True).first()
+    return {
+        'size': size,
+        'username': user.username,
+        'author_id': user.id,
+        'recipe_ids': recipe_ids,
+        'titles': list(Recipe.objects.filter(id__in=recipe_ids).values_list('title', flat=True)),
+        'own_recipe_id': own,
+        'category_ids': list(Category.objects.order_by('-recipe_count', 'id').values_list('id', flat=True)),
+        'bulk': 50,
+        'counter': itertools.count(),
+    }
+
+
+def percentile(timings, share):
+    """
+    Перцентиль по ближайшему рангу из отсортированного списка.
+    """
+    return timings[max(0, math.ceil(len(timings) * share) - 1)]
+
+
+def summarize(timings, queries, peak):
+    timings = sorted(timings)
+    return {
+        'p50': round(statistics.median(timings), 3),
+        'p95': round(percentile(timings, 0.95), 3),
+        'p99': round(percentile(timings, 0.99), 3),
+        'max': round(timings[-1], 3),
+        'queries': max(queries),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run_case(call, repeat, warmup, queries):
+    """
+    Замеряет call(n): время и SQL-запросы на каждую итерацию, затем пик памяти.
+
+    call возвращает функцию подготовки, которую нужно выполнить вне замера
+    (например, вход пользователя), и сам запрос.
+    """
+    timings, counts = [], []
+    for n in range(warmup + repeat):
+        prepare, request = call(n)
+        prepare()
+        before = queries[0]
+        started = time.perf_counter()
+        request()
+        elapsed = (time.perf_counter() - started) * 1000
+        if n >= warmup:
+            timings.append(elapsed)
+            counts.append(queries[0] - before)
+    prepare, request = call(warmup + repeat)
+    prepare()
+    tracemalloc.start()
+    request()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return summarize(timings, counts, peak)
+
+
+def bench_django(cases, repeat, warmup):
+    from django.conf import settings
+    from django.db import connections
+    from django.test import Client
+
+    settings.ALLOWED_HOSTS.append('testserver')
+    queries = [0]
+
+    def count(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+
+    for alias in connections:
+        connections[alias].execute_wrappers.append(count)
+
+    client = Client()
+    results = {}
+    for name, url_name, login, build, *scale in cases:
+        def call(n, build=build, login=login):
+            method, path, data = build(n)
+            prepare = (lambda: client.force_login(bench_user())) if login else client.logout
+            return prepare, lambda: getattr(client, method)(path, data)
+        results[name] = run_case(call, max(1, int(repeat * (scale[0] if scale else 1))), warmup, queries)
+        print(format_line(name, results[name]))
+    return results
+
+
+def bench_user():
+    from django.contrib.auth.models import User
+    return User.objects.filter(username__startswith='bench_').order_by('id').first()
+
+
+def bench_api(cases, repeat, warmup):
+    import httpx
+    from sqlalchemy import event
+
+    from recipes_api.database import async_engine, async_read_engine
+    from recipes_api.main import app
+
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    for engine in {async_engine, async_read_engine}:
+        event.listen(engine.sync_engine, 'after_cursor_execute', count)
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://api', timeout=600)
+    results = {}
+    for name, route, build, *scale in cases:
+        def call(n, build=build, name=name):
+            method, path, kwargs = build(n)
+
+            def request():
+                response = loop.run_until_complete(client.request(method.upper(), path, **kwargs))
+                if response.status_code >= 400:
+                    raise RuntimeError(f'{name}: HTTP {response.status_code} {response.text[:200]}')
+            return (lambda: None), request
+        results[name] = run_case(call, max(1, int(repeat * (scale[0] if scale else 1))), warmup, queries)
+        print(format_line(name, results[name]))
+    loop.run_until_complete(client.aclose())
+    loop.run_until_complete(async_engine.dispose())
+    loop.run_until_complete(async_read_engine.dispose())
+    loop.close()
+    return results
+
+
+def format_line(name, result):
+    return (f"{name:>26} {result['p50']:>9.2f} {result['p95']:>9.2f} {result['p99']:>9.2f} "
+            f"{result['max']:>9.2f} {result['queries']:>7} {result['peak_kib']:>10.1f}")
+
+
+def compare(results, baseline, threshold):
+    """
+    Регрессии относительно сохранённого прогона: рост p50 больше чем на
+    threshold (доля) и рост числа SQL-запросов.
+    """
+    regressions = []
+    for app_name, cases in results.items():
+        for name, result in cases.items():
+            before = baseline.get(app_name, {}).get(name)
+            if before is None:
+                continue
+            if result['queries'] > before['queries']:
+                regressions.append(f"{app_name} {name}: SQL {before['queries']} -> {result['queries']}")
+            if max(result['p50'], before['p50']) >= NOISE_MS and result['p50'] > before['p50'] * (1 + threshold):
+                regressions.append(f"{app_name} {name}: p50 {before['p50']:.2f} -> {result['p50']:.2f} мс")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', help='база из benchmarks.generator (прогон идёт на её копии)')
+    parser.add_argument('--size', type=int, default=1000, help='размер каталога, если --db не задан')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--only', choices=['django', 'api'], help='только одно приложение')
+    parser.add_argument('--output', help='куда сохранить результаты (JSON)')
+    parser.add_argument('--compare', help='JSON прошлого прогона для поиска регрессий')
+    parser.add_argument('--threshold', type=float, default=0.2, help='допустимый рост p50 (доля)')
+    args = parser.parse_args()
+
+    # Случаи с записью меняют каталог, поэтому исходная база не трогается
+    db_path = os.path.join(tempfile.mkdtemp(prefix='recipes-suite-'), 'bench.sqlite3')
+    if args.db:
+        shutil.copyfile(args.db, db_path)
+    setup_django(db_path)
+    if args.db:
+        from recipes.models import Recipe
+        size = Recipe.objects.count()
+    else:
+        size = args.size
+        generate(size)
+
+    ctx = catalogue(size)
+    results = {}
+    print(f"{'case':>26} {'p50, ms':>9} {'p95, ms':>9} {'p99, ms':>9} {'max, ms':>9} {'SQL':>7} {'peak, KiB':>10}")
+    if args.only in (None, 'django'):
+        results['django'] = bench_django(django_cases(ctx), args.repeat, args.warmup)
+    if args.only in (None, 'api'):
+        results['api'] = bench_api(api_cases(ctx), args.repeat, args.warmup)
+
+    report = {
+        'meta': {
+            'size': size,
+            'repeat': args.repeat,
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline['meta']['size'] != size:
+            print(f"Внимание: прошлый прогон на каталоге {baseline['meta']['size']}, текущий — {size}")
+        regressions = compare(results, baseline['results'], args.threshold)
+        for line in regressions:
+            print(f'РЕГРЕССИЯ {line}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,9 @@
 from django.contrib import admin
-from .models import Category, Recipe, RecipeCategory
+from .models import Category, Ingredient, Job, Recipe, RecipeCategory, SimilarRecipe
 
 admin.site.register(Category)
 admin.site.register(Recipe)
 admin.site.register(RecipeCategory)
+admin.site.register(Ingredient)
+admin.site.register(Job)
+admin.site.register(SimilarRecipe)
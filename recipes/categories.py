@@ -0,0 +1,108 @@
+"""
+Счётчики рецептов в категориях для Django.
+
+Category.recipe_count выводится в фильтре списка рецептов и в API
+(/categories) без GROUP BY по связям. Счётчики меняются вместе со связями
+RecipeCategory (сигналы в recipes/signals.py и recipes_api/categories.py);
+расхождения исправляет manage.py reconcile_category_counts.
+
+Форма рецепта назначает категории через assign: по разнице с текущими
+связями, а не общим путём save_m2m (удаление каждой связи с сигналами
+и вставка заново).
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from . import categorydiff, pagecache, tasks
+from .models import Category, Recipe, RecipeCategory
+
+
+def adjust_counts(deltas):
+    """
+    Изменяет Category.recipe_count на величины из {id: приращение}.
+    """
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        Category.objects.filter(id__in=pks).update(recipe_count=Greatest(F('recipe_count') + delta, 0))
+
+
+def links_added(category_ids):
+    """
+    Каждый id в category_ids — новая связь рецепта с категорией.
+    """
+    adjust_counts(Counter(category_ids))
+
+
+def links_removed(category_ids):
+    """
+    Каждый id в category_ids — удалённая связь рецепта с категорией.
+    """
+    adjust_counts({pk: -count for pk, count in Counter(category_ids).items()})
+
+
+def assign(assignments, validate=True):
+    """
+    Назначает рецептам категории по словарю {id рецепта: [id категорий]}.
+
+    Удаляются и добавляются только изменившиеся связи — по одному запросу,
+    без сигналов моделей; счётчики, updated_at, кэш страниц и похожие
+    рецепты обновляются только для них. Возвращает categorydiff.Changes;
+    при validate несуществующие категории — categorydiff.UnknownCategories.
+    """
+    if not assignments:
+        return categorydiff.Changes()
+    with transaction.atomic():
+        if validate:
+            wanted = categorydiff.wanted_ids(assignments)
+            categorydiff.check(assignments, Category.objects.filter(id__in=wanted).values_list('id', flat=True))
+        current = RecipeCategory.objects.filter(recipe_id__in=assignments).values_list('id', 'recipe_id', 'category_id')
+        changes = categorydiff.diff(current, assignments)
+        if not changes:
+            return changes
+        if changes.removed:
+            # _raw_delete — один DELETE без загрузки связей и post_delete на каждую
+            removed = RecipeCategory.objects.filter(id__in=changes.removed)
+            removed._raw_delete(removed.db)
+        RecipeCategory.objects.bulk_create([RecipeCategory(recipe_id=recipe_id, category_id=category_id)
+                                            for recipe_id, category_id in changes.added])
+        adjust_counts(changes.deltas)
+        # Категории входят в ответы API, а значит, и в ETag / Last-Modified
+        Recipe.objects.filter(id__in=changes.recipes).update(updated_at=timezone.now())
+        tasks.enqueue('update_similar', recipe_ids=sorted(changes.recipes))
+    for recipe_id in changes.recipes:
+        pagecache.invalidate_recipe(recipe_id)
+    return changes
+
+
+def actual_counts():
+    """
+    Подзапрос с настоящим числом рецептов категории (для пересчёта).
+    """
+    return Coalesce(Subquery(
+        RecipeCategory.objects.filter(category_id=OuterRef('pk')).order_by()
+        .values('category_id').annotate(total=Count('id')).values('total')
+    ), 0)
+
+
+def reconcile(dry_run=False):
+    """
+    Сверяет счётчики с таблицей связей и исправляет расхождения.
+
+    Возвращает список (категория, было, стало) для расходившихся категорий.
+    """
+    drift = [
+        (category, category.recipe_count, category.actual)
+        for category in Category.objects.annotate(actual=actual_counts()).exclude(recipe_count=F('actual'))
+    ]
+    if not dry_run:
+        for category, _, actual in drift:
+            Category.objects.filter(pk=category.pk).update(recipe_count=actual)
+    return drift
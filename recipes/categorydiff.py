@@ -0,0 +1,85 @@
+"""
+Назначение категорий рецептам: разница между текущими и нужными связями.
+
+Общая часть для Django (recipes/categories.py) и FastAPI-сервиса
+(recipes_api/categories.py). Набор категорий рецепта не переписывается
+целиком: удаляются только связи, которых больше нет, и добавляются только
+новые, поэтому у популярного рецепта при смене одной категории не
+переписываются остальные строки и не трогаются их счётчики. Рецепты,
+у которых набор не изменился, не отмечаются изменёнными и не сбрасывают
+кэши.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+
+
+class UnknownCategories(ValueError):
+    """
+    Среди назначаемых категорий есть несуществующие.
+    """
+
+    def __init__(self, ids):
+        self.ids = sorted(ids)
+        super().__init__(f'Категории не найдены: {self.ids}')
+
+
+@dataclass(frozen=True)
+class Changes:
+    """
+    Что нужно изменить в связях: id удаляемых связей, новые пары
+    (рецепт, категория), приращения счётчиков категорий и рецепты,
+    у которых набор категорий изменился.
+    """
+    removed: tuple = ()
+    added: tuple = ()
+    deltas: Counter = field(default_factory=Counter)
+    recipes: frozenset = frozenset()
+
+    def __bool__(self):
+        return bool(self.removed or self.added)
+
+
+def wanted_ids(assignments):
+    """
+    Все категории из {id рецепта: [id категорий]} — для проверки одним запросом.
+    """
+    return {category_id for category_ids in assignments.values() for category_id in category_ids}
+
+
+def check(assignments, known):
+    """
+    Проверяет, что все назначаемые категории есть среди known.
+    """
+    missing = wanted_ids(assignments) - set(known)
+    if missing:
+        raise UnknownCategories(missing)
+
+
+def diff(current, assignments):
+    """
+    Разница между текущими связями и назначением.
+
+    current — строки (id связи, id рецепта, id категории) рецептов из
+    assignments; assignments — {id рецепта: [id категорий]}, повторы
+    категорий не учитываются.
+    """
+    wanted = {recipe_id: set(category_ids) for recipe_id, category_ids in assignments.items()}
+    existing = {recipe_id: set() for recipe_id in wanted}
+    removed, deltas, recipes = [], Counter(), set()
+    for link_id, recipe_id, category_id in current:
+        if category_id in wanted[recipe_id]:
+            existing[recipe_id].add(category_id)
+        else:
+            removed.append(link_id)
+            deltas[category_id] -= 1
+            recipes.add(recipe_id)
+    added = []
+    for recipe_id, category_ids in assignments.items():
+        for category_id in dict.fromkeys(category_ids):
+            if category_id not in existing[recipe_id]:
+                added.append((recipe_id, category_id))
+                deltas[category_id] += 1
+                recipes.add(recipe_id)
+    return Changes(tuple(removed), tuple(added), Counter({pk: delta for pk, delta in deltas.items() if delta}),
+                   frozenset(recipes))
@@ -0,0 +1,63 @@
+"""
+Валидаторы условных HTTP-запросов (ETag, Last-Modified), общие для Django и FastAPI.
+
+Не зависит от ORM: ETag строится из любых частей, однозначно описывающих
+содержимое ответа (id и время изменения рецепта, параметры списка,
+id и время изменения попавших в него рецептов). Если клиент прислал
+совпадающий If-None-Match или не более старый If-Modified-Since,
+отвечаем 304 без загрузки и сериализации рецептов.
+"""
+
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+
+def make_etag(*parts):
+    """
+    Слабый ETag (W/"...") из частей, описывающих содержимое ответа.
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def as_utc(value):
+    """
+    Время в UTC с точностью до секунды (наивное время из SQLite считается UTC).
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def http_date(value):
+    """
+    Время в формате заголовка Last-Modified.
+    """
+    return format_datetime(as_utc(value), usegmt=True)
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Совпадает ли ETag с одним из перечисленных в If-None-Match (слабое сравнение).
+    """
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == opaque for tag in if_none_match.split(','))
+
+
+def not_modified(if_none_match, if_modified_since, etag, last_modified=None):
+    """
+    Можно ли ответить 304: If-None-Match проверяется первым, If-Modified-Since —
+    только без него (RFC 9110, 13.2.2).
+    """
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return as_utc(last_modified) <= as_utc(since)
+    return False
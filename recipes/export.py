@@ -0,0 +1,38 @@
+"""
+Выгрузка каталога рецептов для Django.
+
+Адаптер к recipes/records.py: рецепты читаются пачками по ключу id
+(id > :last ORDER BY id LIMIT n) вместе с авторами и категориями,
+так что в памяти одновременно находится не больше одной пачки.
+"""
+
+from . import records
+from .models import Recipe
+
+
+def iter_recipes(batch_size=records.BATCH_SIZE):
+    """
+    Все рецепты по возрастанию id с автором и категориями, пачками.
+    """
+    last_id = 0
+    while True:
+        batch = list(Recipe.objects.with_related().filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not batch:
+            return
+        yield from batch
+        last_id = batch[-1].id
+
+
+def iter_records(batch_size=records.BATCH_SIZE):
+    """
+    Записи выгрузки для всех рецептов.
+    """
+    for recipe in iter_recipes(batch_size):
+        yield records.make_record(recipe, recipe.author, recipe.categories.all())
+
+
+def stream(fmt='ndjson', compress=False, batch_size=records.BATCH_SIZE):
+    """
+    Порции байтов выгрузки всего каталога.
+    """
+    return records.stream(iter_records(batch_size), fmt, compress, batch_size)
@@ -0,0 +1,83 @@
+"""
+Выбор случайных рецептов для главной страницы.
+
+Вместо загрузки всех рецептов в память выборка строится по диапазону id:
+границы диапазона (минимальный и максимальный id) берутся из индекса
+первичного ключа, кэшируются и сбрасываются сигналами при создании или
+удалении рецепта, а сами рецепты выбираются одним запросом по случайным
+id из диапазона. Количество рецептов не считается: COUNT просматривает
+всю таблицу. Стоимость запросов не зависит от размера каталога.
+"""
+
+import random
+
+from django.core.cache import cache
+from django.db.models import Max, Min
+
+from .models import Recipe
+
+# Ключ кэша для границ диапазона id
+BOUNDS_CACHE_KEY = 'recipes:featured:bounds'
+
+# Время жизни границ в кэше (сек.): ограничивает устаревание в других процессах
+BOUNDS_TIMEOUT = 300
+
+# Максимальное число кандидатов в одном запросе id IN (...)
+MAX_CANDIDATES = 500
+
+# Кандидатов на один нужный рецепт в первом запросе
+CANDIDATES_PER_RECIPE = 3
+
+
+def invalidate():
+    """
+    Сбрасывает закэшированные границы диапазона id.
+    """
+    cache.delete(BOUNDS_CACHE_KEY)
+
+
+def get_bounds():
+    """
+    Возвращает кортеж (min_id, max_id) из кэша или из базы; (None, None) — рецептов нет.
+
+    MIN и MAX выбираются отдельными запросами: SQLite берёт одиночный
+    MIN или MAX из индекса, а оба в одном запросе — просмотром таблицы.
+    """
+    bounds = cache.get(BOUNDS_CACHE_KEY)
+    if bounds is None:
+        bounds = (Recipe.objects.aggregate(low=Min('id'))['low'], Recipe.objects.aggregate(high=Max('id'))['high'])
+        cache.set(BOUNDS_CACHE_KEY, bounds, BOUNDS_TIMEOUT)
+    return bounds
+
+
+def random_recipes(count=5, queryset=None, rng=random):
+    """
+    Возвращает до count случайных рецептов без полного просмотра таблицы.
+
+    Сначала одним запросом выбираются рецепты по случайным id с запасом
+    CANDIDATES_PER_RECIPE. Если из-за пропусков в id рецептов не хватило,
+    недостающие добираются по одному индексными запросами «id >= x» от случайного x.
+    """
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    low, high = get_bounds()
+    if low is None or count <= 0:
+        return []
+
+    span = high - low + 1
+    wanted = min(span, MAX_CANDIDATES, count * CANDIDATES_PER_RECIPE)
+    candidates = rng.sample(range(low, high + 1), wanted)
+    found = {recipe.id: recipe for recipe in queryset.filter(id__in=candidates)}
+    picked = [found[pk] for pk in candidates if pk in found][:count]
+    if wanted == span:
+        return picked  # Проверен весь диапазон
+
+    # Добор при пропусках в id: каждый запрос идёт по первичному ключу и
+    # пропускает уже выбранные рецепты, так что либо находит новый, либо их больше нет
+    while len(picked) < count:
+        start, rest = rng.randint(low, high), queryset.exclude(id__in=[recipe.id for recipe in picked])
+        recipe = rest.filter(id__gte=start).order_by('id').first() or rest.filter(id__lt=start).order_by('-id').first()
+        if recipe is None:
+            break
+        picked.append(recipe)
+    return picked
@@ -0,0 +1,55 @@
+"""
+Фильтры списка рецептов для QuerySet'ов Django.
+
+Адаптер к общей логике из recipes/filterspec.py: фильтры превращаются
+в один объект Q, категории и ингредиенты — в подзапросы id IN (...)
+по индексам таблиц связей.
+"""
+
+from django.db.models import Q
+
+from .models import Ingredient, RecipeCategory, RecipeIngredient
+
+
+def _in_categories(category_ids):
+    return Q(id__in=RecipeCategory.objects.filter(category_id__in=category_ids).values('recipe_id'))
+
+
+def _with_ingredients(keys):
+    """
+    Рецепты, у которых есть ингредиент с ключом, содержащим одну из основ keys.
+    """
+    matching = Q()
+    for key in keys:
+        matching |= Q(key__contains=key)
+    ingredient_ids = Ingredient.objects.filter(matching).values('id')
+    return Q(id__in=RecipeIngredient.objects.filter(ingredient_id__in=ingredient_ids).values('recipe_id'))
+
+
+def condition(spec):
+    """
+    Условие Q для фильтров filterspec.RecipeFilter.
+    """
+    q = Q()
+    if spec.any_categories:
+        q &= _in_categories(spec.any_categories)
+    for category_id in spec.all_categories:
+        q &= _in_categories([category_id])
+    if spec.author is not None:
+        q &= Q(author_id=spec.author)
+    if spec.time_min is not None:
+        q &= Q(cooking_time__gte=spec.time_min)
+    if spec.time_max is not None:
+        q &= Q(cooking_time__lte=spec.time_max)
+    for key in spec.include:
+        q &= _with_ingredients([key])
+    if spec.exclude:
+        q &= ~_with_ingredients(spec.exclude)
+    return q
+
+
+def apply(queryset, spec):
+    """
+    Ограничивает queryset рецептов фильтрами spec.
+    """
+    return queryset.filter(condition(spec)) if spec else queryset
@@ -0,0 +1,114 @@
+"""
+Фильтры списка рецептов: разбор параметров запроса.
+
+Общая часть для Django-представления recipe_list и FastAPI-сервиса (/recipes/).
+Модуль не зависит ни от Django, ни от SQLAlchemy — условия запросов строят
+адаптеры recipes/filters.py и recipes_api/filters.py. Любое сочетание
+фильтров превращается в одно условие WHERE с подзапросами по индексам
+связей, поэтому список выбирается одним запросом.
+
+Параметры (значения можно повторять или перечислять через запятую):
+- category=1,2 — хотя бы одна из категорий (ИЛИ);
+- category_all=1,2 — все категории сразу (И);
+- author=5 — рецепты автора;
+- time_min=10, time_max=30 — время приготовления в минутах;
+- ingredient=мука,яйца — все перечисленные ингредиенты
+  (как в /recipes/ingredient/: по основе слова, «сыр» находит и «сыр тёртый»);
+- exclude=орехи — ни одного из перечисленных ингредиентов.
+Сортировка задаётся параметром order (см. recipes/keyset.py).
+"""
+
+from dataclasses import dataclass
+
+from . import ingredients
+
+# Параметры запроса, которые разбирает parse
+PARAMS = ('category', 'category_all', 'author', 'time_min', 'time_max', 'ingredient', 'exclude')
+
+# Не больше стольких значений в одном параметре: каждое — отдельный подзапрос
+MAX_VALUES = 10
+
+
+class InvalidFilter(ValueError):
+    """
+    Параметр фильтра не удалось разобрать.
+    """
+
+
+@dataclass(frozen=True)
+class RecipeFilter:
+    """
+    Разобранные фильтры; пустые поля не ограничивают выборку.
+    """
+    any_categories: tuple = ()
+    all_categories: tuple = ()
+    author: int | None = None
+    time_min: int | None = None
+    time_max: int | None = None
+    include: tuple = ()
+    exclude: tuple = ()
+
+    def __bool__(self):
+        return self != EMPTY
+
+    def key(self):
+        """
+        Строка, однозначно описывающая фильтры (для ETag и кэша).
+        """
+        return repr(tuple(getattr(self, name) for name in self.__dataclass_fields__))
+
+
+EMPTY = RecipeFilter()
+
+
+def _values(getlist, name):
+    """
+    Непустые значения параметра: повторы и перечисления через запятую.
+    """
+    values = [part.strip() for raw in getlist(name) for part in str(raw).split(',')]
+    values = list(dict.fromkeys(value for value in values if value))
+    if len(values) > MAX_VALUES:
+        raise InvalidFilter(f'{name}: не больше {MAX_VALUES} значений')
+    return values
+
+
+def _ints(getlist, name):
+    try:
+        numbers = [int(value) for value in _values(getlist, name)]
+    except ValueError:
+        raise InvalidFilter(f'{name}: ожидаются целые числа') from None
+    if any(number < 0 for number in numbers):
+        raise InvalidFilter(f'{name}: ожидаются неотрицательные числа')
+    return tuple(sorted(numbers))
+
+
+def _int(getlist, name):
+    numbers = _ints(getlist, name)
+    if len(numbers) > 1:
+        raise InvalidFilter(f'{name}: ожидается одно значение')
+    return numbers[0] if numbers else None
+
+
+def _ingredient_keys(getlist, name):
+    return tuple(sorted({key for key in map(ingredients.normalize, _values(getlist, name)) if key}))
+
+
+def parse(getlist):
+    """
+    Разбирает фильтры; getlist(name) возвращает все значения параметра
+    (request.GET.getlist в Django, request.query_params.getlist в FastAPI).
+
+    Некорректные значения приводят к InvalidFilter.
+    """
+    spec = RecipeFilter(
+        any_categories=_ints(getlist, 'category'),
+        all_categories=_ints(getlist, 'category_all'),
+        author=_int(getlist, 'author'),
+        time_min=_int(getlist, 'time_min'),
+        time_max=_int(getlist, 'time_max'),
+        include=_ingredient_keys(getlist, 'ingredient'),
+        exclude=_ingredient_keys(getlist, 'exclude'),
+    )
+    if spec.time_min is not None and spec.time_max is not None and spec.time_min > spec.time_max:
+        raise InvalidFilter('time_min больше time_max')
+    return spec
@@ -6,6 +6,7 @@
 
 from django import forms
 from django.contrib.auth.models import User
+from . import categories
 from .models import Recipe, Category
 
 
@@ -14,7 +15,17 @@ class RecipeForm(forms.ModelForm):
     """
     Форма, связанная с моделью Recipe.
     Используется для создания и редактирования рецептов.
+
+    Категории не входят в Meta.fields: стандартное сохранение связей
+    многие-ко-многим их не трогает, их сохраняет save() через
+    categories.assign — по разнице с текущими связями.
     """
+    categories = forms.ModelMultipleChoiceField(
+        queryset=Category.objects.all(),
+        widget=forms.CheckboxSelectMultiple(),  # Множественный выбор категорий
+        label='Категории рецепта',
+    )
+
     class Meta:
         model = Recipe  # Связь с моделью Recipe
         fields = [
@@ -24,14 +35,12 @@ class RecipeForm(forms.ModelForm):
             'cooking_time',
             'image',
             'ingredients',
-            'categories',
         ]
         widgets = {
             # Настройка виджетов для текстовых полей
             'description': forms.Textarea(attrs={'rows': 5, 'cols': 50}),
             'steps': forms.Textarea(attrs={'rows': 10, 'cols': 50}),
             'ingredients': forms.Textarea(attrs={'rows': 5, 'cols': 50}),
-            'categories': forms.CheckboxSelectMultiple(),  # Множественный выбор категорий
         }
         labels = {
             # Человекочитаемые подписи для полей
@@ -41,7 +50,6 @@ class RecipeForm(forms.ModelForm):
             'cooking_time': 'Время приготовления (в минутах)',
             'image': 'Изображение блюда',
             'ingredients': 'Список ингредиентов',
-            'categories': 'Категории рецепта',
         }
 
     def __init__(self, *args, **kwargs):
@@ -49,11 +57,39 @@ class RecipeForm(forms.ModelForm):
         Инициализация формы: настройка стилей или дополнительных параметров.
         """
         super().__init__(*args, **kwargs)
+        if self.instance.pk and 'categories' not in self.initial:
+            self.initial['categories'] = list(self.instance.categories.values_list('pk', flat=True))
         # Добавляем CSS-классы для стилизации
         for field in self.fields:
             if field != 'categories':  # Исключаем категории
                 self.fields[field].widget.attrs.update({'class': 'form-control'})
 
+    def save(self, commit=True):
+        """
+        Сохраняет рецепт и его категории. При commit=False категории
+        сохраняются вместе с остальными связями в form.save_m2m().
+        """
+        recipe = super().save(commit=commit)
+        if commit:
+            self.save_categories()
+        else:
+            save_m2m = self.save_m2m
+
+            def save_m2m_and_categories():
+                save_m2m()
+                self.save_categories()
+
+            self.save_m2m = save_m2m_and_categories
+        return recipe
+
+    def save_categories(self):
+        """
+        Сохраняет категории по разнице с текущими связями. Категории уже
+        проверены полем формы.
+        """
+        categories.assign({self.instance.pk: [category.pk for category in self.cleaned_data['categories']]},
+                          validate=False)
+
 
 # Форма для регистрации нового пользователя
 class UserRegisterForm(forms.ModelForm):
@@ -0,0 +1,85 @@
+"""
+Уменьшенные копии и современные форматы изображений рецептов.
+
+Для загруженного изображения recipes/name.jpg рядом с ним сохраняются
+копии нескольких ширин: recipes/name.320w.jpg, recipes/name.320w.webp
+и, если Pillow собран с поддержкой, recipes/name.320w.avif. Карточки
+и страница рецепта выбирают подходящую копию через <picture> и srcset
+(тег {% recipe_picture %}), а не загружают оригинал в 150–400 КБ.
+
+Модуль работает с путями файлов и не зависит от Django, поэтому
+копии можно строить в пуле процессов (manage.py build_thumbnails).
+"""
+
+import os
+
+from PIL import Image, ImageOps
+
+# Ширины копий в пикселях: карточки (~350px) и страница рецепта (~550px) на обычных и HiDPI-экранах
+WIDTHS = (320, 640, 960)
+
+# Форматы копий и параметры сохранения; оригинальный формат — запасной для старых браузеров
+Image.init()
+FORMATS = {
+    'avif': {'quality': 60},
+    'webp': {'quality': 80, 'method': 4},
+    'jpg': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+if 'AVIF' not in Image.SAVE:
+    del FORMATS['avif']
+PIL_FORMATS = {'avif': 'AVIF', 'webp': 'WEBP', 'jpg': 'JPEG'}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpg': 'image/jpeg'}
+
+
+def variant_name(name, width, ext):
+    """
+    Имя копии изображения: recipes/name.jpg -> recipes/name.320w.webp.
+    """
+    root, _ = os.path.splitext(name)
+    return f'{root}.{width}w.{ext}'
+
+
+def variant_names(name):
+    """
+    Все имена копий изображения: {(ширина, расширение): имя}.
+    """
+    return {(width, ext): variant_name(name, width, ext) for width in WIDTHS for ext in FORMATS}
+
+
+def build_variants(path, force=False):
+    """
+    Строит копии изображения по пути файла. Возвращает число созданных файлов.
+
+    Изображение не увеличивается: копия шире оригинала не создаётся.
+    Существующие копии новее оригинала пропускаются, если не задан force.
+    """
+    created = 0
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        mtime = os.path.getmtime(path)
+        for width in WIDTHS:
+            if width > image.width:
+                continue
+            height = max(1, round(image.height * width / image.width))
+            resized = None
+            for ext, options in FORMATS.items():
+                target = variant_name(path, width, ext)
+                if not force and os.path.exists(target) and os.path.getmtime(target) >= mtime:
+                    continue
+                if resized is None:
+                    resized = image.resize((width, height), Image.Resampling.LANCZOS)
+                frame = resized.convert('RGB') if ext == 'jpg' and resized.mode != 'RGB' else resized
+                frame.save(target, PIL_FORMATS[ext], **options)
+                created += 1
+    return created
+
+
+def remove_variants(path):
+    """
+    Удаляет копии изображения (например, после замены оригинала).
+    """
+    for name in variant_names(path).values():
+        if os.path.exists(name):
+            os.remove(name)
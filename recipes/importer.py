@@ -0,0 +1,130 @@
+"""
+Массовая загрузка рецептов для Django (manage.py import_recipes).
+
+Строки разбираются функциями recipes/records.py, записываются пачками:
+рецепты и связи с категориями — через bulk_create, категории и авторы
+ищутся через кэши в памяти, а не запросом на строку. bulk_create не
+отправляет сигналы, поэтому поисковый индекс, индекс ингредиентов
+и счётчики рецептов в категориях обновляются явно для всей пачки в той же
+транзакции, там же ставится задача пересчёта похожих рецептов, а кэши
+сбрасываются после неё.
+
+После фиксации каждой пачки её конец записывается в файл состояния,
+и прерванную загрузку можно продолжить с этого места.
+"""
+
+import json
+import os
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import categories as category_counts
+from . import featured, pagecache, pantry, search, tasks
+from .models import Category, Recipe, RecipeCategory
+
+
+class Caches:
+    """
+    Кэши id категорий и авторов по названию, общие для всех пачек загрузки.
+    """
+
+    def __init__(self, default_author=None):
+        self.categories = {}
+        self.authors = {}
+        self.default_author = default_author
+
+    def category_ids(self, names):
+        """
+        Возвращает {название: id}, создавая недостающие категории.
+        """
+        missing = [name for name in dict.fromkeys(names) if name not in self.categories]
+        if missing:
+            self.categories.update(Category.objects.filter(name__in=missing).values_list('name', 'id'))
+            new = [Category(name=name) for name in missing if name not in self.categories]
+            if new:
+                Category.objects.bulk_create(new, ignore_conflicts=True)
+                created = [category.name for category in new]
+                self.categories.update(Category.objects.filter(name__in=created).values_list('name', 'id'))
+        return self.categories
+
+    def author_ids(self, usernames):
+        """
+        Возвращает {имя пользователя: id} для существующих пользователей.
+        """
+        missing = [name for name in dict.fromkeys(usernames) if name and name not in self.authors]
+        if missing:
+            found = dict(User.objects.filter(username__in=missing).values_list('username', 'id'))
+            for name in missing:
+                self.authors[name] = found.get(name)
+        return self.authors
+
+
+def write_batch(parsed, caches):
+    """
+    Записывает пачку разобранных строк одной транзакцией.
+
+    parsed — тройки (номер строки, запись, ошибка) из records.parse_lines.
+    Возвращает (число записанных рецептов, [(номер строки, ошибка)]).
+    """
+    errors = [(number, error) for number, _, error in parsed if error]
+    rows = [(number, record) for number, record, error in parsed if not error]
+    authors = caches.author_ids(record['author'] for _, record in rows)
+
+    valid = []
+    for number, record in rows:
+        author_id = authors.get(record['author']) or caches.default_author
+        if author_id is None:
+            errors.append((number, f"Автор не найден: {record['author']}"))
+        else:
+            valid.append((record, author_id))
+    if not valid:
+        return 0, errors
+
+    with transaction.atomic():
+        categories = caches.category_ids(name for record, _ in valid for name in record['categories'])
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                title=record['title'],
+                description=record['description'],
+                steps=record['steps'],
+                cooking_time=record['cooking_time'],
+                ingredients=record['ingredients'],
+                image=record['image'],
+                author_id=author_id,
+            )
+            for record, author_id in valid
+        ])
+        links = RecipeCategory.objects.bulk_create([
+            RecipeCategory(recipe_id=recipe.id, category_id=categories[name])
+            for recipe, (record, _) in zip(recipes, valid) for name in record['categories']
+        ])
+        category_counts.links_added(link.category_id for link in links)
+        search.index_recipes(recipes, replace=False)
+        pantry.sync_recipes(recipes)
+        # Похожие для новых рецептов (и их соседей) пересчитает фоновая задача
+        tasks.enqueue('update_similar', recipe_ids=[recipe.id for recipe in recipes])
+    featured.invalidate()
+    pagecache.invalidate_lists()
+    return len(recipes), errors
+
+
+def load_state(path):
+    """
+    Читает файл состояния загрузки; без файла загрузка начинается сначала.
+    """
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {'offset': 0, 'imported': 0}
+
+
+def save_state(path, state):
+    """
+    Атомарно записывает файл состояния (через временный файл и rename).
+    """
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(state, file)
+    os.replace(temporary, path)
@@ -0,0 +1,76 @@
+"""
+Разбор текстового списка ингредиентов рецепта.
+
+Поле Recipe.ingredients хранит свободный текст вида
+«200 г муки, 300 мл молока, 2 яйца, щепотка соли». Здесь он разбивается на
+отдельные ингредиенты без количеств и единиц измерения, а каждому
+ингредиенту сопоставляется нормализованный ключ из основ слов, по которому
+«муки», «мука» и «200 г муки» считаются одним ингредиентом.
+
+Модуль не зависит от ORM и используется как Django, так и FastAPI.
+"""
+
+import re
+
+from .stemming import stem, tokenize
+
+# Разделители позиций в списке ингредиентов
+SEPARATORS_RE = re.compile(r'[,;\n]+')
+
+# Количества, единицы измерения и служебные слова, не относящиеся к продукту
+UNITS = {
+    'г', 'гр', 'грамм', 'граммов', 'кг', 'мг', 'мл', 'л', 'литр', 'литра', 'ст', 'ч', 'шт', 'штук',
+    'штуки', 'штука', 'стакан', 'стакана', 'стаканов', 'щепотка', 'щепотки', 'зубчик', 'зубчика',
+    'зубчиков', 'пучок', 'пучка', 'стебель', 'стебля', 'стеблей', 'ломтик', 'ломтика', 'ломтиков',
+    'банка', 'банки', 'упаковка', 'упаковки', 'кусок', 'куска', 'кусочек', 'горсть', 'по', 'вкусу',
+    'для', 'подачи', 'около',
+}
+
+MAX_NAME_LENGTH = 100
+
+# Верхняя граница недостающих ингредиентов в подборе «что приготовить»:
+# с каждым допущенным продуктом кандидатов становится заметно больше
+MAX_MISSING = 3
+
+
+def _words(item):
+    """
+    Слова позиции без количеств и единиц измерения.
+    """
+    return [word for word in tokenize(item) if not word.isdigit() and word not in UNITS]
+
+
+def normalize(name):
+    """
+    Возвращает ключ ингредиента: основы слов через пробел.
+    """
+    return ' '.join(stem(word) for word in _words(name))[:MAX_NAME_LENGTH]
+
+
+def parse(text):
+    """
+    Разбирает текст на список пар (ключ, название) без повторов.
+
+    Порядок сохраняется, позиции без слов (например, «2 шт.») пропускаются.
+    """
+    result = {}
+    for item in SEPARATORS_RE.split(text or ''):
+        words = _words(item)
+        if not words:
+            continue
+        key = ' '.join(stem(word) for word in words)[:MAX_NAME_LENGTH]
+        result.setdefault(key, ' '.join(words)[:MAX_NAME_LENGTH])
+    return list(result.items())
+
+
+def rank_by_rarity(ingredient_ids, recipe_counts):
+    """
+    Возвращает {id ингредиента: ранг}, где 0 — самый редкий ингредиент рецепта.
+
+    recipe_counts — {id: число рецептов с ингредиентом}. Ранги нужны запросу
+    «что приготовить»: рецепт, которому не хватает не более k ингредиентов,
+    обязательно содержит в наборе продуктов один из своих k + 1 самых редких,
+    поэтому кандидатов достаточно искать по связям с рангом не больше k.
+    """
+    ordered = sorted(ingredient_ids, key=lambda pk: (recipe_counts.get(pk, 0), pk))
+    return {pk: rank for rank, pk in enumerate(ordered)}
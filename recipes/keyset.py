@@ -0,0 +1,170 @@
+"""
+Курсорная (keyset) пагинация списка рецептов.
+
+Общая часть для Django-представлений и FastAPI-сервиса: описание
+сортировок, кодирование курсоров и сборка страницы из выбранных строк.
+Модуль не зависит ни от Django, ни от SQLAlchemy — адаптеры под конкретную
+ORM находятся в recipes/pagination.py и recipes_api/pagination.py.
+
+Страница выбирается условием по ключу сортировки от курсора
+(например, id > :last_id ORDER BY id LIMIT n + 1), поэтому глубокие
+страницы стоят столько же, сколько первая, в отличие от OFFSET.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+
+from decouple import config
+
+# Поддерживаемые сортировки: имя -> поля ключа (последнее поле уникально)
+ORDERINGS = {
+    'id': ('id',),
+    'title': ('title', 'id'),
+    'cooking_time': ('cooking_time', 'id'),
+}
+DEFAULT_ORDERING = 'id'
+
+
+def _integer(value):
+    if type(value) is not int:
+        raise TypeError(value)
+    return value
+
+
+def _string(value):
+    if not isinstance(value, str):
+        raise TypeError(value)
+    return value
+
+
+# Разбор значений ключа из курсора: поле -> функция, приводящая значение к типу поля
+FIELD_TYPES = {
+    'id': _integer,
+    'title': _string,
+    'cooking_time': _integer,
+    'updated_at': lambda value: datetime.fromisoformat(_string(value)),
+}
+
+# Размер страницы по умолчанию и его верхняя граница
+DEFAULT_PAGE_SIZE = config('RECIPES_PAGE_SIZE', default=12, cast=int)
+MAX_PAGE_SIZE = config('RECIPES_MAX_PAGE_SIZE', default=100, cast=int)
+
+
+class InvalidCursor(ValueError):
+    """
+    Курсор повреждён или не соответствует выбранной сортировке.
+    """
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """
+    Позиция в списке: значения ключа сортировки и направление перехода.
+
+    backwards=True означает «страница перед этой позицией».
+    """
+    ordering: str
+    values: tuple
+    backwards: bool = False
+
+
+@dataclass
+class Page:
+    """
+    Страница результатов с курсорами соседних страниц.
+    """
+    items: list
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+    ordering: str = DEFAULT_ORDERING
+    page_size: int = DEFAULT_PAGE_SIZE
+
+
+def resolve_ordering(ordering):
+    """
+    Возвращает имя сортировки, подставляя значение по умолчанию.
+    """
+    if not ordering:
+        return DEFAULT_ORDERING
+    if ordering not in ORDERINGS:
+        raise InvalidCursor(f'Неизвестная сортировка: {ordering}')
+    return ordering
+
+
+def clamp_page_size(value, default=None):
+    """
+    Приводит запрошенный размер страницы к диапазону 1..MAX_PAGE_SIZE.
+    """
+    if default is None:
+        default = DEFAULT_PAGE_SIZE
+    try:
+        size = int(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(cursor):
+    """
+    Кодирует курсор в компактную строку, безопасную для URL.
+    """
+    payload = {'o': cursor.ordering, 'v': list(cursor.values)}
+    if cursor.backwards:
+        payload['b'] = 1
+    raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, ordering=DEFAULT_ORDERING):
+    """
+    Разбирает строку курсора и проверяет, что он подходит к сортировке
+    и значения ключа имеют типы полей (FIELD_TYPES).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw.decode('utf-8'))
+        cursor = Cursor(payload['o'], tuple(payload['v']), bool(payload.get('b')))
+    except (binascii.Error, ValueError, UnicodeDecodeError, KeyError, TypeError) as exc:
+        raise InvalidCursor('Некорректный курсор') from exc
+    fields = ORDERINGS[ordering]
+    if cursor.ordering != ordering or len(cursor.values) != len(fields):
+        raise InvalidCursor('Курсор не соответствует сортировке')
+    try:
+        values = tuple(FIELD_TYPES[name](value) for name, value in zip(fields, cursor.values))
+    except (TypeError, ValueError) as exc:
+        raise InvalidCursor('Некорректные значения курсора') from exc
+    return Cursor(cursor.ordering, values, cursor.backwards)
+
+
+def build_page(rows, page_size, ordering, cursor=None, key=None):
+    """
+    Собирает страницу из строк, выбранных адаптером ORM.
+
+    rows — до page_size + 1 строк, выбранных от курсора в направлении
+    перехода (для backwards — в обратном порядке); лишняя строка лишь
+    сигнализирует, что дальше есть ещё данные. key(row) возвращает
+    значения ключа сортировки для строки.
+    """
+    fields = ORDERINGS[ordering]
+    if key is None:
+        def key(row):
+            return tuple(getattr(row, name) for name in fields)
+
+    backwards = cursor is not None and cursor.backwards
+    has_more = len(rows) > page_size
+    items = list(rows[:page_size])
+    if backwards:
+        items.reverse()
+
+    page = Page(items=items, ordering=ordering, page_size=page_size)
+    if not items:
+        return page
+    first, last = key(items[0]), key(items[-1])
+    if has_more or backwards:
+        page.next_cursor = encode_cursor(Cursor(ordering, last))
+    if (has_more and backwards) or (cursor is not None and not backwards):
+        page.prev_cursor = encode_cursor(Cursor(ordering, first, backwards=True))
+    return page
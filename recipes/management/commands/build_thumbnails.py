@@ -0,0 +1,60 @@
+"""
+Команда построения уменьшенных копий и WebP/AVIF-вариантов для уже загруженных изображений.
+
+    python manage.py build_thumbnails --workers 4
+    python manage.py build_thumbnails --force   # пересоздать все копии
+
+Изображения обрабатываются в пуле процессов; готовые копии новее
+оригинала пропускаются, поэтому команду можно запускать повторно.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.core.management.base import BaseCommand
+
+from recipes import images, pagecache
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные копии и WebP/AVIF-варианты изображений рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='число процессов (по умолчанию — по числу ядер)')
+        parser.add_argument('--force', action='store_true', help='пересоздать существующие копии')
+
+    def handle(self, *args, **options):
+        rows = Recipe.objects.exclude(image='').exclude(image=None).values_list('id', 'image')
+        jobs = {}
+        for recipe_id, name in rows.iterator():
+            path = Recipe.image.field.storage.path(name)
+            if os.path.exists(path):
+                jobs.setdefault(path, []).append(recipe_id)
+            else:
+                self.stderr.write(f'Рецепт {recipe_id}: файл не найден: {name}')
+
+        started = time.perf_counter()
+        created = failed = 0
+        build = partial(images.build_variants, force=options['force'])
+        with ProcessPoolExecutor(max(1, options['workers'])) as pool:
+            futures = {path: pool.submit(build, path) for path in jobs}
+            for path, future in futures.items():
+                try:
+                    count = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'{path}: {exc}')
+                    continue
+                created += count
+                if count:
+                    for recipe_id in jobs[path]:
+                        pagecache.invalidate_recipe(recipe_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Изображений: {len(jobs)}, создано копий: {created}, с ошибками: {failed}, '
+            f'за {time.perf_counter() - started:.1f} с'
+        ))
@@ -0,0 +1,115 @@
+"""
+Проверка, что модели SQLAlchemy FastAPI-сервиса (recipes_api/database.py) соответствуют миграциям Django.
+
+Схему базы создают и меняют только миграции Django, сервис лишь
+повторяет нужные ему таблицы. Команда сравнивает эти модели с состоянием
+моделей после всех миграций: таблицы, столбцы и их типы, длины строк,
+NOT NULL и индексы. Кроме того, у таблиц, в которые пишет сервис, должны
+быть повторены все обязательные столбцы без значения по умолчанию в БД —
+иначе INSERT из сервиса упадёт.
+
+    python manage.py check_api_schema
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import NOT_PROVIDED
+from sqlalchemy import JSON, Boolean, DateTime, Float, Integer, String, Text
+
+# Таблицы, повторённые в сервисе частично и только для чтения
+PARTIAL_TABLES = {'auth_user'}
+
+# Тип столбца SQLAlchemy для внутренних типов полей Django
+FIELD_TYPES = {
+    'AutoField': Integer,
+    'BigAutoField': Integer,
+    'IntegerField': Integer,
+    'BigIntegerField': Integer,
+    'SmallIntegerField': Integer,
+    'PositiveIntegerField': Integer,
+    'PositiveBigIntegerField': Integer,
+    'PositiveSmallIntegerField': Integer,
+    'CharField': String,
+    'FileField': String,
+    'ImageField': String,
+    'SlugField': String,
+    'EmailField': String,
+    'TextField': Text,
+    'DateTimeField': DateTime,
+    'FloatField': Float,
+    'BooleanField': Boolean,
+    'JSONField': JSON,
+}
+
+
+def migrated_models():
+    """
+    Модели в состоянии после всех миграций: {имя таблицы: модель}.
+    """
+    state = MigrationLoader(None, ignore_no_migrations=True).project_state()
+    return {model._meta.db_table: model for model in state.apps.get_models()}
+
+
+def field_type(field):
+    """
+    Внутренний тип поля Django; для внешнего ключа — тип столбца, на который он ссылается.
+    """
+    if field.is_relation:
+        return field.target_field.get_internal_type().replace('AutoField', 'IntegerField')
+    return field.get_internal_type()
+
+
+def compare(metadata, models):
+    """
+    Список расхождений моделей SQLAlchemy (metadata) с моделями Django по таблицам.
+    """
+    problems = []
+    for table in metadata.sorted_tables:
+        model = models.get(table.name)
+        if model is None:
+            problems.append(f'{table.name}: таблицы нет в миграциях Django')
+            continue
+        fields = {field.column: field for field in model._meta.concrete_fields}
+        for column in table.columns:
+            field = fields.get(column.name)
+            where = f'{table.name}.{column.name}'
+            if field is None:
+                problems.append(f'{where}: столбца нет в миграциях Django')
+                continue
+            expected = FIELD_TYPES.get(field_type(field))
+            if expected is None or not isinstance(column.type, expected):
+                problems.append(f'{where}: {type(column.type).__name__} не соответствует {field_type(field)}')
+            length = getattr(column.type, 'length', None)
+            if length and field.max_length and length != field.max_length:
+                problems.append(f'{where}: длина {length}, в Django max_length={field.max_length}')
+            if not column.nullable and field.null:
+                problems.append(f'{where}: NOT NULL в сервисе, но NULL в Django')
+
+        if table.name not in PARTIAL_TABLES:
+            for name, field in fields.items():
+                required = not field.null and not field.primary_key and field.db_default is NOT_PROVIDED
+                if required and name not in table.columns:
+                    problems.append(f'{table.name}.{name}: обязательный столбец Django не повторён в сервисе')
+
+        indexes = {index.name: [model._meta.get_field(name).column for name in index.fields]
+                   for index in model._meta.indexes}
+        for index in table.indexes:
+            if index.name is None or index.name.startswith('ix_'):
+                continue  # index=True у столбцов сервиса: в базе, созданной миграциями, их нет и они не нужны
+            columns = [column.name for column in index.columns]
+            if indexes.get(index.name) != columns:
+                problems.append(f'{table.name}: индекс {index.name} ({", ".join(columns)}) отсутствует в миграциях')
+    return problems
+
+
+class Command(BaseCommand):
+    help = 'Проверяет соответствие моделей SQLAlchemy сервиса миграциям Django'
+
+    def handle(self, *args, **options):
+        from recipes_api.database import Base
+
+        problems = compare(Base.metadata, migrated_models())
+        if problems:
+            raise CommandError('Модели сервиса расходятся с миграциями:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS(f'Модели сервиса соответствуют миграциям '
+                                             f'({len(Base.metadata.tables)} таблиц)'))
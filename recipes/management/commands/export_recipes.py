@@ -0,0 +1,45 @@
+"""
+Команда выгрузки всего каталога рецептов с авторами и категориями.
+
+Примеры:
+    python manage.py export_recipes > recipes.ndjson
+    python manage.py export_recipes --format csv --gzip --output recipes.csv.gz
+"""
+
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes import export, records
+
+
+class Command(BaseCommand):
+    help = 'Выгружает все рецепты в NDJSON или CSV (опционально со сжатием gzip)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=records.FORMATS, default='ndjson')
+        parser.add_argument('--gzip', action='store_true', help='сжать вывод в gzip')
+        parser.add_argument('--output', '-o', help='файл для записи (по умолчанию — стандартный вывод)')
+        parser.add_argument('--batch-size', type=int, default=records.BATCH_SIZE,
+                            help='число рецептов, читаемых из базы за один запрос')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        chunks = export.stream(options['format'], options['gzip'], max(1, options['batch_size']))
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                written = self.write(chunks, output)
+        else:
+            written = self.write(chunks, sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено {written / 1024 / 1024:.1f} МБ за {time.perf_counter() - started:.1f} с'
+        ))
+
+    def write(self, chunks, output):
+        written = 0
+        for chunk in chunks:
+            output.write(chunk)
+            written += len(chunk)
+        return written
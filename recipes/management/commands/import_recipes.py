@@ -0,0 +1,132 @@
+"""
+Команда потоковой загрузки рецептов из JSONL/NDJSON или CSV (в том числе .gz).
+
+Формат совпадает с выгрузкой export_recipes. Примеры:
+    python manage.py import_recipes recipes.ndjson --author admin
+    python manage.py import_recipes recipes.csv.gz --workers 4 --batch-size 2000
+
+Прерванная загрузка продолжается с последней зафиксированной пачки
+(файл состояния <файл>.state); --restart начинает заново.
+"""
+
+import csv
+import gzip
+import itertools
+import time
+from collections import deque
+from functools import partial
+from multiprocessing import Pool
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import importer, records
+
+
+def open_source(path):
+    """
+    Открывает файл загрузки как текст, распаковывая .gz на лету.
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def numbered(source, fmt):
+    """
+    Выдаёт пары (номер записи с 1, строка NDJSON или словарь строки CSV).
+    """
+    if fmt == 'csv':
+        return enumerate(csv.DictReader(source), start=1)
+    return enumerate((line for line in source if line.strip()), start=1)
+
+
+def batched(items, size):
+    """
+    Группирует записи в списки по size.
+    """
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def parse_batches(batches, fmt, workers=0):
+    """
+    Разбирает пачки строк по порядку, при workers > 0 — в пуле процессов.
+
+    В работе одновременно не больше 2 * workers пачек: файл читается
+    по мере записи, а не целиком вперёд.
+    """
+    parse = partial(records.parse_lines, fmt)
+    if workers <= 0:
+        yield from map(parse, batches)
+        return
+    with Pool(workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.apply_async(parse, (batch,)))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+class Command(BaseCommand):
+    help = 'Загружает рецепты из JSONL/NDJSON или CSV пачками через bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл .jsonl/.ndjson/.csv, можно со сжатием .gz')
+        parser.add_argument('--format', choices=records.FORMATS,
+                            help='формат файла (по умолчанию — по расширению)')
+        parser.add_argument('--author', help='пользователь для строк без автора или с неизвестным автором')
+        parser.add_argument('--batch-size', type=int, default=records.BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=0,
+                            help='число процессов для разбора строк (0 — в текущем процессе)')
+        parser.add_argument('--state', help='файл состояния (по умолчанию <path>.state)')
+        parser.add_argument('--restart', action='store_true', help='игнорировать сохранённое состояние')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.removesuffix('.gz').endswith('.csv') else 'ndjson')
+        batch_size = max(1, options['batch_size'])
+        state_path = options['state'] or f'{path}.state'
+        state = {'offset': 0, 'imported': 0} if options['restart'] else importer.load_state(state_path)
+
+        default_author = None
+        if options['author']:
+            default_author = User.objects.filter(username=options['author']).values_list('id', flat=True).first()
+            if default_author is None:
+                raise CommandError(f"Пользователь {options['author']} не найден")
+        caches = importer.Caches(default_author)
+
+        if state['offset']:
+            self.stdout.write(f"Продолжение с записи {state['offset'] + 1}")
+        started = time.perf_counter()
+        imported = failed = 0
+        try:
+            source = open_source(path)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        with source:
+            # Уже загруженные записи пропускаются без разбора
+            items = itertools.islice(numbered(source, fmt), state['offset'], None)
+            for parsed in parse_batches(batched(items, batch_size), fmt, options['workers']):
+                written, errors = importer.write_batch(parsed, caches)
+                imported += written
+                failed += len(errors)
+                for number, error in errors:
+                    self.stderr.write(f'Запись {number}: {error}')
+                state = {'offset': parsed[-1][0], 'imported': state['imported'] + written}
+                importer.save_state(state_path, state)
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"Записей обработано: {state['offset']}, загружено: {imported}, "
+                                  f"{(imported + failed) / elapsed:.0f} строк/с")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено рецептов: {imported}, с ошибками: {failed}, за {elapsed:.1f} с '
+            f'({(imported + failed) / max(elapsed, 1e-9):.0f} строк/с)'
+        ))
+
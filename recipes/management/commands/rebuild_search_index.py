@@ -0,0 +1,20 @@
+"""
+Команда перестроения полнотекстового индекса рецептов.
+
+Нужна после массовой загрузки данных в обход ORM: python manage.py rebuild_search_index
+"""
+
+from django.core.management.base import BaseCommand
+
+from recipes import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс рецептов (SQLite FTS5)'
+
+    def handle(self, *args, **options):
+        if not search.is_enabled():
+            self.stdout.write(self.style.WARNING('Полнотекстовый индекс доступен только для SQLite'))
+            return
+        total = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано рецептов: {total}'))
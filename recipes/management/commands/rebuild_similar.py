@@ -0,0 +1,18 @@
+"""
+Команда перестроения списков похожих рецептов (recipes/similar.py).
+
+Нужна после массовой загрузки данных в обход ORM и периодически — чтобы
+выровнять веса признаков: python manage.py rebuild_similar
+"""
+
+from django.core.management.base import BaseCommand
+
+from recipes import similar
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает списки похожих рецептов (TF-IDF по ингредиентам и категориям)'
+
+    def handle(self, *args, **options):
+        total = similar.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Похожие рецепты посчитаны для {total} рецептов'))
@@ -0,0 +1,29 @@
+"""
+Команда сверки счётчиков рецептов в категориях (Category.recipe_count).
+
+Нужна после загрузки связей в обход ORM и API или если счётчики разошлись
+с таблицей связей: python manage.py reconcile_category_counts [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+
+from recipes import categories, pagecache
+
+
+class Command(BaseCommand):
+    help = 'Исправляет счётчики рецептов в категориях по таблице связей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='только показать расхождения')
+
+    def handle(self, *args, **options):
+        drift = categories.reconcile(dry_run=options['dry_run'])
+        for category, stored, actual in drift:
+            self.stdout.write(f'{category.name}: {stored} -> {actual}')
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Счётчики категорий совпадают со связями'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Расходятся категорий: {len(drift)}'))
+        else:
+            pagecache.invalidate_lists()
+            self.stdout.write(self.style.SUCCESS(f'Исправлено категорий: {len(drift)}'))
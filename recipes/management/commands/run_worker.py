@@ -0,0 +1,59 @@
+"""
+Исполнитель фоновых задач (recipes/tasks.py).
+
+    python manage.py run_worker --threads 4
+    python manage.py run_worker --once   # выполнить готовые задачи и выйти
+
+Задачи выполняются в пуле потоков; пока очередь пуста, исполнитель
+опрашивает её раз в --poll секунд. По Ctrl+C новые задачи не берутся,
+начатые доделываются.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from recipes import tasks
+
+
+def run_in_thread(job):
+    """
+    Выполняет задачу в потоке пула и закрывает соединение этого потока с БД.
+    """
+    try:
+        return tasks.run(job)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в пуле потоков'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help='число потоков')
+        parser.add_argument('--poll', type=float, default=1.0, help='интервал опроса пустой очереди (сек.)')
+        parser.add_argument('--once', action='store_true', help='выполнить готовые задачи и завершиться')
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        done = failed = 0
+        with ThreadPoolExecutor(threads) as pool:
+            try:
+                while True:
+                    jobs = tasks.claim(threads * 2)
+                    if not jobs:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll'])
+                        continue
+                    for job, ok in zip(jobs, pool.map(run_in_thread, jobs)):
+                        if ok:
+                            done += 1
+                        else:
+                            failed += 1
+                            self.stderr.write(f'{job}: ошибка, попытка {job.attempts} из {job.max_attempts}')
+            except KeyboardInterrupt:
+                self.stdout.write('Остановка: новые задачи не берутся')
+        self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}, с ошибкой: {failed}'))
@@ -0,0 +1,30 @@
+"""
+Команда включения режима журнала SQLite (по умолчанию WAL, SQLITE_JOURNAL_MODE).
+
+Режим хранится в самом файле базы, поэтому задаётся один раз при
+развёртывании, а не при каждом подключении:
+python manage.py sqlite_journal_mode [--mode wal] [--database default]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from recipes import sqlitetuning
+
+
+class Command(BaseCommand):
+    help = 'Переключает режим журнала файла базы SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', default=sqlitetuning.JOURNAL_MODE, help='режим журнала (wal, delete, ...)')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='псевдоним базы')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'База {options["database"]} — не SQLite')
+        connection.ensure_connection()
+        mode = sqlitetuning.set_journal_mode(connection.connection, options['mode'])
+        if mode.lower() != options['mode'].lower():
+            raise CommandError(f'Режим журнала не изменён: {mode}')
+        self.stdout.write(self.style.SUCCESS(f'Режим журнала: {mode}'))
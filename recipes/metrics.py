@@ -0,0 +1,188 @@
+"""
+Метрики производительности запросов.
+
+Общая часть для middleware Django (recipes/middleware.py) и FastAPI
+(recipes_api/metrics.py). Модуль не зависит ни от Django, ни от
+SQLAlchemy: адаптеры открывают замер запроса (start), сообщают о каждом
+SQL-запросе и отрисовке шаблона, а в конце передают маршрут, статус
+и размер ответа (finish).
+
+По каждому маршруту собираются гистограммы времени ответа, числа
+и времени SQL-запросов, времени отрисовки шаблонов и размера ответа.
+Метрики хранятся в памяти процесса и отдаются в текстовом формате
+Prometheus на /metrics (у Django и у сервиса — свои). Если задан
+SLOW_REQUEST_MS, запросы дольше этого порога пишутся в журнал
+recipes.slow вместе с выполненным SQL.
+"""
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from decouple import config
+
+ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Порог медленного запроса в миллисекундах; 0 — журнал выключен
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=0, cast=int)
+# Сколько SQL-запросов медленного запроса попадает в журнал
+SLOW_REQUEST_MAX_SQL = config('SLOW_REQUEST_MAX_SQL', default=50, cast=int)
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+logger = logging.getLogger('recipes.slow')
+
+
+class Histogram:
+    """
+    Гистограмма Prometheus с метками: накопительные корзины, сумма и количество.
+    """
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            # [число попаданий в корзины, сумма, количество]
+            series = self.series.setdefault(label_values, [[0] * len(self.buckets), 0.0, 0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = sorted((labels, (list(counts), total, count))
+                            for labels, (counts, total, count) in self.series.items())
+        for label_values, (counts, total, count) in series:
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values))
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+ROUTE_LABELS = ('app', 'method', 'route')
+
+REQUEST_SECONDS = Histogram('recipes_http_request_duration_seconds', 'Время ответа',
+                            ROUTE_LABELS + ('status',), SECONDS_BUCKETS)
+RESPONSE_BYTES = Histogram('recipes_http_response_size_bytes', 'Размер тела ответа', ROUTE_LABELS, SIZE_BUCKETS)
+SQL_QUERIES = Histogram('recipes_db_queries_per_request', 'Число SQL-запросов за запрос', ROUTE_LABELS, QUERY_BUCKETS)
+SQL_SECONDS = Histogram('recipes_db_query_duration_seconds', 'Время SQL-запросов за запрос',
+                        ROUTE_LABELS, SECONDS_BUCKETS)
+TEMPLATE_SECONDS = Histogram('recipes_template_render_seconds', 'Время отрисовки шаблонов за запрос',
+                             ROUTE_LABELS, SECONDS_BUCKETS)
+HISTOGRAMS = (REQUEST_SECONDS, RESPONSE_BYTES, SQL_QUERIES, SQL_SECONDS, TEMPLATE_SECONDS)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestStats:
+    """
+    Замер одного запроса: SQL-запросы и время отрисовки шаблонов.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.statements = []
+        self.template_seconds = 0.0
+
+    def add_query(self, sql, seconds):
+        self.queries += 1
+        self.sql_seconds += seconds
+        if SLOW_REQUEST_MS and len(self.statements) < SLOW_REQUEST_MAX_SQL:
+            self.statements.append((sql, seconds))
+
+
+# Замер текущего запроса: у каждого потока Django и задачи asyncio — свой
+current = ContextVar('recipes_request_stats', default=None)
+
+
+def start():
+    """
+    Открывает замер запроса. Возвращает (замер, токен для finish).
+    """
+    stats = RequestStats()
+    return stats, current.set(stats)
+
+
+def record_query(sql, seconds):
+    """
+    SQL-запрос выполнен за seconds секунд (вне замера запроса не учитывается).
+    """
+    stats = current.get()
+    if stats is not None:
+        stats.add_query(sql, seconds)
+
+
+def record_template(seconds):
+    """
+    Шаблон отрисован за seconds секунд.
+    """
+    stats = current.get()
+    if stats is not None:
+        stats.template_seconds += seconds
+
+
+def finish(stats, token, app, method, route, status, size=None):
+    """
+    Закрывает замер и записывает метрики маршрута; size — размер тела, если известен.
+    """
+    current.reset(token)
+    seconds = time.perf_counter() - stats.started
+    labels = (app, method, route)
+    REQUEST_SECONDS.observe(seconds, *labels, str(status))
+    SQL_QUERIES.observe(stats.queries, *labels)
+    SQL_SECONDS.observe(stats.sql_seconds, *labels)
+    if stats.template_seconds:
+        TEMPLATE_SECONDS.observe(stats.template_seconds, *labels)
+    if size is not None:
+        RESPONSE_BYTES.observe(size, *labels)
+    if SLOW_REQUEST_MS and seconds * 1000 >= SLOW_REQUEST_MS:
+        log_slow(stats, seconds, app, method, route, status)
+
+
+def log_slow(stats, seconds, app, method, route, status):
+    lines = [f'{app} {method} {route} {status}: {seconds * 1000:.0f} мс, '
+             f'SQL {stats.queries} за {stats.sql_seconds * 1000:.0f} мс, '
+             f'шаблоны {stats.template_seconds * 1000:.0f} мс']
+    lines.extend(f'  {sql_seconds * 1000:8.2f} мс  {" ".join(sql.split())}' for sql, sql_seconds in stats.statements)
+    if stats.queries > len(stats.statements):
+        lines.append(f'  ... ещё {stats.queries - len(stats.statements)} запросов')
+    logger.warning('\n'.join(lines))
+
+
+def render():
+    """
+    Все метрики в текстовом формате Prometheus.
+    """
+    return '\n'.join(line for histogram in HISTOGRAMS for line in histogram.render()) + '\n'
+
+
+def reset():
+    """
+    Сбрасывает накопленные метрики (для тестов).
+    """
+    for histogram in HISTOGRAMS:
+        histogram.clear()
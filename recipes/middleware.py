@@ -0,0 +1,66 @@
+"""
+Middleware приложения recipes.
+"""
+
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from . import metrics
+from .routers import mark_sticky, read_only_request
+
+# Методы, которые не меняют данные
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+def read_only_requests(get_response):
+    """
+    Отмечает безопасные запросы, чтобы ReadOnlyRouter читал их данные через соединение только для чтения.
+    После остальных запросов клиент на время читает из основной базы, а не из реплик.
+    """
+    def middleware(request):
+        safe = request.method in SAFE_METHODS
+        token = read_only_request.set(safe)
+        try:
+            response = get_response(request)
+        finally:
+            read_only_request.reset(token)
+        if not safe:
+            mark_sticky(response)
+        return response
+    return middleware
+
+
+def request_metrics(get_response):
+    """
+    Замеряет запрос для /metrics: время ответа, SQL-запросы всех соединений,
+    отрисовку шаблонов (recipes/templating.py) и размер ответа.
+    """
+    if not metrics.ENABLED:
+        return get_response
+
+    def record_sql(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics.record_query(sql, time.perf_counter() - started)
+
+    def middleware(request):
+        stats, token = metrics.start()
+        response = None
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(record_sql))
+                response = get_response(request)
+            return response
+        finally:
+            match = request.resolver_match
+            # Шаблон маршрута, а не путь: /recipe/<int:recipe_id>/, а не /recipe/12/
+            route = f'/{match.route}' if match else '<unmatched>'
+            size = None if response is None or response.streaming else len(response.content)
+            metrics.finish(stats, token, 'django', request.method, route,
+                           response.status_code if response is not None else 500, size)
+    return middleware
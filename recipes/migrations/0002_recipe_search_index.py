@@ -0,0 +1,36 @@
+from django.db import migrations
+
+from recipes import textsearch
+
+
+def create_index(apps, schema_editor):
+    """
+    Создаёт таблицу FTS5 и индексирует существующие рецепты (только SQLite).
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Recipe = apps.get_model('recipes', 'Recipe')
+    columns = ', '.join(textsearch.FIELDS)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(textsearch.CREATE_TABLE_SQL)
+        rows = [(recipe.id, *textsearch.document(recipe)) for recipe in Recipe.objects.iterator()]
+        cursor.executemany(
+            f'INSERT INTO {textsearch.FTS_TABLE} (rowid, {columns}) VALUES (%s, %s, %s, %s, %s)', rows
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(textsearch.DROP_TABLE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.6 on 2026-10-17 11:17
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from recipes import ingredients
+
+
+def backfill(apps, schema_editor):
+    """
+    Разбирает текстовые списки ингредиентов существующих рецептов.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+
+    parsed = {recipe.id: ingredients.parse(recipe.ingredients)
+              for recipe in Recipe.objects.only('id', 'ingredients').iterator()}
+    names = {key: name for pairs in parsed.values() for key, name in pairs}
+    frequency = Counter(key for pairs in parsed.values() for key, _ in pairs)
+    Ingredient.objects.bulk_create(
+        [Ingredient(key=key, name=name, recipe_count=frequency[key]) for key, name in names.items()]
+    )
+    ids = dict(Ingredient.objects.values_list('key', 'id'))
+
+    links = []
+    for recipe_id, pairs in parsed.items():
+        ranked = sorted((key for key, _ in pairs), key=lambda key: (frequency[key], ids[key]))
+        links.extend(RecipeIngredient(recipe_id=recipe_id, ingredient_id=ids[key], rank=rank)
+                     for rank, key in enumerate(ranked))
+        Recipe.objects.filter(id=recipe_id).update(ingredient_count=len(pairs))
+    RecipeIngredient.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True, verbose_name='Ключ')),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('recipe_count', models.PositiveIntegerField(db_default=0, default=0, editable=False, verbose_name='Количество рецептов')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент',
+                'verbose_name_plural': 'Ингредиенты',
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_count',
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False, verbose_name='Количество ингредиентов'),
+        ),
+        migrations.CreateModel(
+            name='RecipeIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(db_default=0, default=0, verbose_name='Ранг редкости')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_links', to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredient_links', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Связь рецепта и ингредиента',
+                'verbose_name_plural': 'Связи рецептов и ингредиентов',
+                'indexes': [models.Index(fields=['ingredient', 'rank', 'recipe'], name='recipes_ri_ingredient_rank')],
+                'unique_together': {('recipe', 'ingredient')},
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-17 12:11
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill(apps, schema_editor):
+    """
+    Заполняет счётчики рецептов существующих категорий.
+    """
+    Category = apps.get_model('recipes', 'Category')
+    RecipeCategory = apps.get_model('recipes', 'RecipeCategory')
+    counts = RecipeCategory.objects.order_by().values('category_id').annotate(total=Count('id'))
+    for row in counts:
+        Category.objects.filter(pk=row['category_id']).update(recipe_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='recipe_count',
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
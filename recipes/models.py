@@ -5,6 +5,7 @@
 """
 
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User  # Встроенная модель пользователя Django
 
 # Модель категории рецептов
@@ -17,6 +18,12 @@ class Category(models.Model):
         unique=True,              # Название должно быть уникальным
         verbose_name="Название"
     )
+    recipe_count = models.PositiveIntegerField(
+        default=0,                # Сколько рецептов в категории (для фильтра списка, без GROUP BY)
+        db_default=0,
+        editable=False,
+        verbose_name="Количество рецептов"
+    )
 
     def __str__(self):
         """
@@ -28,6 +35,27 @@ class Category(models.Model):
         verbose_name = "Категория"         # Название модели в единственном числе
         verbose_name_plural = "Категории"
 
+# Набор запросов рецептов с жадной загрузкой связанных данных
+class RecipeQuerySet(models.QuerySet):
+    """
+    Запросы рецептов, заранее подгружающие то, что читают шаблоны.
+    """
+
+    def with_related(self):
+        """
+        Автор одним JOIN'ом, категории — одним запросом через RecipeCategory.
+        """
+        return self.select_related('author').prefetch_related(
+            models.Prefetch('categories', queryset=Category.objects.order_by('name'))
+        )
+
+    def for_cards(self):
+        """
+        Только поля, нужные для карточек, ключей сортировки и ETag списков (без шагов и ингредиентов).
+        """
+        return self.only('id', 'title', 'description', 'image', 'cooking_time', 'updated_at')
+
+
 # Модель рецепта
 class Recipe(models.Model):
     """
@@ -68,6 +96,18 @@ class Recipe(models.Model):
         help_text="Список ингредиентов",
         verbose_name="Ингредиенты"
     )
+    ingredient_count = models.PositiveIntegerField(
+        default=0,                         # Число разобранных ингредиентов (для подбора по продуктам)
+        db_default=0,
+        editable=False,
+        verbose_name="Количество ингредиентов"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,                     # Время последнего изменения (для ETag и Last-Modified)
+        verbose_name="Изменён"
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     def __str__(self):
         """
@@ -78,6 +118,14 @@ class Recipe(models.Model):
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            # Поиск по точному названию (API) и страницы списка в порядке названия (order=title)
+            models.Index(fields=['title', 'id'], name='recipes_recipe_title_id'),
+            # MAX(updated_at) для ETag списков без просмотра таблицы
+            models.Index(fields=['updated_at'], name='recipes_recipe_updated_at'),
+            # Фильтр по времени приготовления и страницы в порядке времени (order=cooking_time)
+            models.Index(fields=['cooking_time', 'id'], name='recipes_recipe_time_id'),
+        ]
 
 # Связующая таблица для отношения многие-ко-многим между Recipe и Category
 class RecipeCategory(models.Model):
@@ -92,6 +140,7 @@ class RecipeCategory(models.Model):
     category = models.ForeignKey(
         Category,                          # Связь с категорией
         on_delete=models.CASCADE,          # Удаление связи при удалении категории
+        db_index=False,                    # Покрывается составным индексом (category, recipe)
         verbose_name="Категория"
     )
 
@@ -104,4 +153,187 @@ class RecipeCategory(models.Model):
     class Meta:
         verbose_name = "Связь рецепта и категории"
         verbose_name_plural = "Связи рецептов и категорий"
-        unique_together = ('recipe', 'category')  # Уникальность связки рецепт-категория
\ No newline at end of file
+        unique_together = ('recipe', 'category')  # Уникальность связки рецепт-категория
+        indexes = [
+            # Рецепты категории (фильтр списка, /recipes/category/{id}) без обращения к таблице связей
+            models.Index(fields=['category', 'recipe'], name='recipes_rc_category_recipe'),
+        ]
+
+# Модель нормализованного ингредиента
+class Ingredient(models.Model):
+    """
+    Ингредиент, выделенный из текстового списка рецепта (например, «мука»).
+    """
+    key = models.CharField(
+        max_length=100,           # Нормализованный ключ: основы слов
+        unique=True,
+        verbose_name="Ключ"
+    )
+    name = models.CharField(
+        max_length=100,           # Название в том виде, в котором встретилось впервые
+        verbose_name="Название"
+    )
+    recipe_count = models.PositiveIntegerField(
+        default=0,                # Сколько рецептов используют ингредиент (для выбора редких)
+        db_default=0,
+        editable=False,
+        verbose_name="Количество рецептов"
+    )
+
+    def __str__(self):
+        """
+        Строковое представление ингредиента (название).
+        """
+        return self.name
+
+    class Meta:
+        verbose_name = "Ингредиент"
+        verbose_name_plural = "Ингредиенты"
+
+# Связующая таблица рецептов и ингредиентов — инвертированный индекс «ингредиент -> рецепты»
+class RecipeIngredient(models.Model):
+    """
+    Связь между рецептом и нормализованным ингредиентом.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,          # Удаление связи при удалении рецепта
+        related_name='ingredient_links',
+        verbose_name="Рецепт"
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,          # Удаление связи при удалении ингредиента
+        related_name='recipe_links',
+        verbose_name="Ингредиент"
+    )
+    rank = models.PositiveSmallIntegerField(
+        default=0,                         # Место ингредиента в рецепте по редкости (0 — самый редкий)
+        db_default=0,
+        verbose_name="Ранг редкости"
+    )
+
+    def __str__(self):
+        """
+        Строковое представление связи (например, «Блины - мука»).
+        """
+        return f"{self.recipe} - {self.ingredient}"
+
+    class Meta:
+        verbose_name = "Связь рецепта и ингредиента"
+        verbose_name_plural = "Связи рецептов и ингредиентов"
+        unique_together = ('recipe', 'ingredient')
+        indexes = [
+            # Рецепты, для которых ингредиент — один из самых редких (запрос «что приготовить»)
+            models.Index(fields=['ingredient', 'rank', 'recipe'], name='recipes_ri_ingredient_rank'),
+        ]
+
+# Фоновая задача — очередь медленной работы после сохранения (manage.py run_worker)
+class Job(models.Model):
+    """
+    Задача очереди: имя зарегистрированной функции и её аргументы.
+
+    Выполненные задачи удаляются; упавшие повторяются с растущей задержкой,
+    после max_attempts попыток остаются в статусе failed для разбора.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    name = models.CharField(
+        max_length=100,                    # Имя задачи из recipes/tasks.py
+        verbose_name="Задача"
+    )
+    payload = models.JSONField(
+        default=dict,                      # Именованные аргументы функции задачи
+        verbose_name="Аргументы"
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name="Статус"
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,                         # Сколько раз задача уже запускалась
+        verbose_name="Попытки"
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=5,
+        verbose_name="Максимум попыток"
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,              # Не раньше этого момента (задержка перед повтором)
+        verbose_name="Запуск не раньше"
+    )
+    locked_at = models.DateTimeField(
+        null=True,                         # Когда исполнитель взял задачу (для зависших задач)
+        blank=True,
+        verbose_name="Взята в работу"
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name="Последняя ошибка"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Создана"
+    )
+
+    def __str__(self):
+        """
+        Строковое представление задачи (например, «build_image_variants #12»).
+        """
+        return f"{self.name} #{self.pk}"
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        indexes = [
+            # Выбор готовых к запуску задач: status = 'pending' AND run_at <= now
+            models.Index(fields=['status', 'run_at'], name='recipes_job_status_run_at'),
+        ]
+
+# Похожие рецепты — заранее вычисленные ближайшие соседи (recipes/similar.py)
+class SimilarRecipe(models.Model):
+    """
+    Рецепт similar на месте rank в списке похожих на recipe.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,          # Список удаляется вместе с рецептом
+        related_name='similar_links',
+        db_index=False,                    # Покрывается составным индексом (recipe, rank)
+        verbose_name="Рецепт"
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,          # Удалённый рецепт пропадает из чужих списков
+        related_name='similar_to',
+        verbose_name="Похожий рецепт"
+    )
+    score = models.FloatField(
+        verbose_name="Сходство"            # Косинус TF-IDF векторов (recipes/similarity.py)
+    )
+    rank = models.PositiveSmallIntegerField(
+        verbose_name="Место в списке"      # 0 — самый похожий
+    )
+
+    def __str__(self):
+        """
+        Строковое представление (например, «Борщ ~ Щи»).
+        """
+        return f"{self.recipe_id} ~ {self.similar_id}"
+
+    class Meta:
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+        indexes = [
+            # Список похожих одного рецепта по порядку — один просмотр индекса
+            models.Index(fields=['recipe', 'rank'], name='recipes_similar_recipe_rank'),
+        ]
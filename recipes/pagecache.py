@@ -0,0 +1,112 @@
+"""
+Кэш отрисованных фрагментов страниц рецептов.
+
+Основное содержимое страниц index, recipe_list и recipe_detail кэшируется
+тегом {% cache %}; шапка с пользователем и сообщения отрисовываются
+каждый раз. Ключи страниц рецептов и списков включают id и время
+изменения показанных рецептов (их выбирают представления), поэтому
+запись в обход сигналов — через API, из другого процесса или
+QuerySet.update — тоже даёт новый ключ.
+
+Вместо удаления записей при изменениях ключи фрагментов включают
+номера версий, которые сигналы увеличивают:
+- версия каталога — при изменении категорий (видны на всех страницах);
+- версия списков — при любом изменении рецептов (список и главная);
+- версия рецепта — при изменении самого рецепта или его категорий.
+Устаревшие фрагменты больше не запрашиваются и вытесняются кэшем (LRU).
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+CATALOG_KEY = 'recipes:pages:catalog'
+LISTS_KEY = 'recipes:pages:lists'
+RECIPE_KEY = 'recipes:pages:recipe:{}'
+
+
+def _versions(*keys):
+    """
+    Возвращает текущие версии по ключам, заводя недостающие.
+
+    Новая версия берётся из часов, а не с нуля: если версия была вытеснена
+    из кэша, старые фрагменты с прежним номером не оживут.
+    """
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate_recipe(recipe_id):
+    """
+    Рецепт создан, изменён или удалён: сбрасываются его страница, списки и главная.
+    """
+    _bump(RECIPE_KEY.format(recipe_id))
+    _bump(LISTS_KEY)
+
+
+def invalidate_details(recipe_ids):
+    """
+    Изменилось только то, что видно на страницах рецептов (например, похожие рецепты).
+    """
+    for recipe_id in recipe_ids:
+        _bump(RECIPE_KEY.format(recipe_id))
+
+
+def invalidate_lists():
+    """
+    Сбрасываются списки и главная (например, после массовой загрузки).
+    """
+    _bump(LISTS_KEY)
+
+
+def invalidate_all():
+    """
+    Изменились категории: сбрасываются все страницы.
+    """
+    _bump(CATALOG_KEY)
+
+
+def auth_state(request):
+    """
+    Состояние авторизации для ключа: аноним или конкретный пользователь.
+    """
+    return f'user:{request.user.pk}' if request.user.is_authenticated else 'anon'
+
+
+def detail_key(request, recipe_id, *version):
+    """
+    Части ключа фрагмента страницы рецепта; version — данные, от которых
+    зависит страница (время изменения рецепта и его похожих).
+    """
+    return [recipe_id, *version, *_versions(CATALOG_KEY, RECIPE_KEY.format(recipe_id)), auth_state(request)]
+
+
+def list_key(request, *params):
+    """
+    Части ключа фрагмента списка или главной: параметры запроса и версии.
+    """
+    return [*params, *_versions(CATALOG_KEY, LISTS_KEY), auth_state(request)]
+
+
+def context(fragment, key, timeout=None):
+    """
+    Возвращает (есть ли фрагмент в кэше, переменные шаблона для тега cache).
+
+    Шаблон оборачивает фрагмент в {% cache page_cache.timeout <fragment> page_cache.key %}.
+    """
+    timeout = settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout
+    cached = cache.has_key(make_template_fragment_key(fragment, [key]))
+    return cached, {'page_cache': {'key': key, 'timeout': timeout}}
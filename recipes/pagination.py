@@ -0,0 +1,46 @@
+"""
+Курсорная пагинация QuerySet'ов Django.
+
+Адаптер к общей логике из recipes/keyset.py.
+"""
+
+from django.db.models import Q
+
+from .keyset import ORDERINGS, build_page, clamp_page_size, decode_cursor, resolve_ordering
+
+
+def keyset_filter(fields, values, backwards=False):
+    """
+    Условие «строго после (до) курсора» для ключа сортировки.
+
+    Для составного ключа (title, id) условие записывается как
+    title >= :t AND (title > :t OR id > :id), чтобы первая часть
+    давала поиск по индексу, а не просмотр с начала.
+    """
+    op = 'lt' if backwards else 'gt'
+    inclusive = 'lte' if backwards else 'gte'
+    *prefix, last = zip(fields, values)
+    condition = Q(**{f'{last[0]}__{op}': last[1]})
+    for name, value in reversed(prefix):
+        condition = Q(**{f'{name}__{inclusive}': value}) & (Q(**{f'{name}__{op}': value}) | condition)
+    return condition
+
+
+def paginate(queryset, cursor=None, page_size=None, ordering=None):
+    """
+    Возвращает страницу keyset.Page для queryset.
+
+    cursor — строка курсора из запроса (None для первой страницы).
+    Некорректный курсор приводит к исключению keyset.InvalidCursor.
+    """
+    ordering = resolve_ordering(ordering)
+    page_size = clamp_page_size(page_size)
+    fields = ORDERINGS[ordering]
+    position = decode_cursor(cursor, ordering) if cursor else None
+
+    if position is not None:
+        queryset = queryset.filter(keyset_filter(fields, position.values, position.backwards))
+    backwards = position is not None and position.backwards
+    queryset = queryset.order_by(*(f'-{name}' if backwards else name for name in fields))
+    rows = list(queryset[:page_size + 1])
+    return build_page(rows, page_size, ordering, position)
@@ -0,0 +1,152 @@
+"""
+Инвертированный индекс ингредиентов для Django.
+
+Поддерживает таблицы Ingredient / RecipeIngredient в соответствии с текстом
+Recipe.ingredients и отвечает на запрос «что можно приготовить из этих
+продуктов». Разбор текста и ранжирование по редкости — в recipes/ingredients.py.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from . import ingredients
+from .models import Ingredient, Recipe, RecipeIngredient
+
+
+def resolve(keys_with_names, create=False):
+    """
+    Возвращает словарь {ключ: id ингредиента} одним запросом.
+
+    keys_with_names — пары (ключ, название); при create=True недостающие
+    ингредиенты создаются.
+    """
+    names = dict(keys_with_names)
+    found = dict(Ingredient.objects.filter(key__in=names).values_list('key', 'id'))
+    missing = [key for key in names if key not in found]
+    if create and missing:
+        Ingredient.objects.bulk_create(
+            [Ingredient(key=key, name=names[key]) for key in missing], ignore_conflicts=True
+        )
+        found.update(Ingredient.objects.filter(key__in=missing).values_list('key', 'id'))
+    return found
+
+
+def adjust_counts(deltas):
+    """
+    Изменяет Ingredient.recipe_count на величины из {id: приращение}.
+    """
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        Ingredient.objects.filter(id__in=pks).update(recipe_count=Greatest(F('recipe_count') + delta, 0))
+
+
+@transaction.atomic
+def sync_recipes(recipes):
+    """
+    Приводит связи рецептов с ингредиентами к их текстовым спискам.
+
+    Удаляются и добавляются только изменившиеся связи; у оставшихся
+    пересчитывается ранг редкости.
+    """
+    parsed = {recipe.id: ingredients.parse(recipe.ingredients) for recipe in recipes}
+    if not parsed:
+        return
+    ids = resolve([pair for pairs in parsed.values() for pair in pairs], create=True)
+    wanted = {recipe_id: {ids[key] for key, _ in pairs} for recipe_id, pairs in parsed.items()}
+
+    current = defaultdict(dict)
+    for link_id, recipe_id, ingredient_id, rank in RecipeIngredient.objects.filter(
+            recipe_id__in=parsed).values_list('id', 'recipe_id', 'ingredient_id', 'rank'):
+        current[recipe_id][ingredient_id] = (link_id, rank)
+
+    deltas = Counter()
+    for recipe_id, pks in wanted.items():
+        deltas.update(pks - current[recipe_id].keys())
+        deltas.subtract(current[recipe_id].keys() - pks)
+    adjust_counts(deltas)
+    counts = dict(Ingredient.objects.filter(id__in=set().union(*wanted.values())).values_list('id', 'recipe_count'))
+
+    to_add, to_rerank, removed = [], [], []
+    for recipe_id, pks in wanted.items():
+        ranks = ingredients.rank_by_rarity(pks, counts)
+        for pk, (link_id, rank) in current[recipe_id].items():
+            if pk not in ranks:
+                removed.append(link_id)
+            elif ranks[pk] != rank:
+                to_rerank.append(RecipeIngredient(id=link_id, rank=ranks[pk]))
+        to_add.extend(RecipeIngredient(recipe_id=recipe_id, ingredient_id=pk, rank=rank)
+                      for pk, rank in ranks.items() if pk not in current[recipe_id])
+    if removed:
+        RecipeIngredient.objects.filter(id__in=removed).delete()
+    RecipeIngredient.objects.bulk_create(to_add)
+    RecipeIngredient.objects.bulk_update(to_rerank, ['rank'])
+
+    by_count = defaultdict(list)
+    for recipe_id, pks in wanted.items():
+        by_count[len(pks)].append(recipe_id)
+    for count, recipe_ids in by_count.items():
+        Recipe.objects.filter(id__in=recipe_ids).exclude(ingredient_count=count).update(ingredient_count=count)
+    for recipe in recipes:
+        recipe.ingredient_count = len(wanted[recipe.id])
+
+
+def forget_recipes(recipe_ids):
+    """
+    Уменьшает счётчики ингредиентов удаляемых рецептов (связи удалит каскад).
+    """
+    deltas = Counter()
+    for ingredient_id in RecipeIngredient.objects.filter(recipe_id__in=recipe_ids).values_list(
+            'ingredient_id', flat=True):
+        deltas[ingredient_id] -= 1
+    adjust_counts(deltas)
+
+
+def cookable_ids(names, max_missing=0, limit=100):
+    """
+    Возвращает id рецептов, которые можно приготовить из перечисленных продуктов.
+
+    Рецепт подходит, если все его ингредиенты (кроме не более max_missing)
+    входят в набор. Кандидаты берутся по индексу (ingredient, rank, recipe):
+    при max_missing=0 в наборе должны быть два самых редких ингредиента
+    рецепта (пересечение двух коротких списков), иначе — хотя бы один из
+    max_missing + 1 самых редких. Затем у кандидатов проверяется число
+    совпавших ингредиентов. Рецепты с наименьшим числом недостающих
+    ингредиентов идут первыми.
+    """
+    keys = [ingredients.normalize(name) for name in names]
+    ingredient_ids = list(resolve([(key, key) for key in keys if key]).values())
+    if not ingredient_ids:
+        return []
+    links = RecipeIngredient.objects.filter(ingredient_id__in=ingredient_ids)
+    if max_missing == 0:
+        rarest = links.filter(rank=0).values('recipe_id')
+        second = links.filter(rank=1).values('recipe_id')
+        single = links.filter(rank=0, recipe__ingredient_count=1).values('recipe_id')
+        candidates = rarest.intersection(second).union(single)
+    else:
+        candidates = links.filter(rank__lte=max_missing).values('recipe_id')
+    # Ингредиенты кандидата вне набора: просматриваются только его собственные связи
+    outside = (
+        RecipeIngredient.objects
+        .filter(recipe_id=OuterRef('pk'))
+        .exclude(ingredient_id__in=ingredient_ids)
+        .order_by()
+        .values('recipe_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    rows = (
+        Recipe.objects
+        .filter(id__in=candidates)
+        .annotate(missing=Coalesce(Subquery(outside), 0))
+        .filter(missing__lte=max_missing)
+        .order_by(*(('missing', 'id') if max_missing else ('id',)))
+        .values_list('id', flat=True)
+    )
+    return list(rows[:limit])
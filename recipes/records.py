@@ -0,0 +1,199 @@
+"""
+Формат выгрузки каталога рецептов: записи, NDJSON, CSV и gzip.
+
+Общая часть для Django (manage.py export_recipes, recipes/export.py)
+и FastAPI (GET /recipes/export, recipes_api/export.py). Все функции
+кодируют записи пачками и не держат в памяти больше одной пачки,
+поэтому потребление памяти не зависит от размера каталога.
+
+Здесь же разбор строк загрузки (manage.py import_recipes): функции
+не обращаются к базе и могут выполняться в отдельных процессах.
+"""
+
+import csv
+import io
+import json
+import zlib
+
+# Поля рецепта, попадающие в запись как есть
+FIELDS = ('id', 'title', 'description', 'steps', 'cooking_time', 'ingredients', 'image')
+
+# Колонки CSV: автор и категории разворачиваются в плоские поля
+CSV_COLUMNS = FIELDS + ('author_id', 'author', 'category_ids', 'categories')
+
+# Разделитель списков в колонках CSV
+LIST_SEPARATOR = ';'
+
+# Обязательные текстовые поля загружаемого рецепта
+REQUIRED_FIELDS = ('title', 'description', 'steps', 'ingredients')
+MAX_TITLE_LENGTH = 200
+
+FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+# Размер пачки рецептов: читается из базы одним запросом и кодируется целиком
+BATCH_SIZE = 1000
+
+
+def make_record(recipe, author, categories):
+    """
+    Возвращает запись рецепта для выгрузки.
+
+    recipe — объект с полями из FIELDS (модель Django или SQLAlchemy),
+    author — объект с id и username или None, categories — объекты с id и name.
+    """
+    record = {name: getattr(recipe, name) for name in FIELDS}
+    # ImageField отдаёт FieldFile, колонка SQLAlchemy — строку
+    record['image'] = str(record['image']) if record['image'] else None
+    record['author'] = {'id': author.id, 'username': author.username} if author else None
+    record['categories'] = [{'id': category.id, 'name': category.name} for category in categories]
+    return record
+
+
+def ndjson_lines(records):
+    """
+    Строки NDJSON: по одной записи на строку.
+    """
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def csv_row(record):
+    """
+    Строка CSV для записи в порядке CSV_COLUMNS.
+    """
+    author = record['author'] or {}
+    categories = record['categories']
+    return [record[name] for name in FIELDS] + [
+        author.get('id'),
+        author.get('username'),
+        LIST_SEPARATOR.join(str(category['id']) for category in categories),
+        LIST_SEPARATOR.join(category['name'] for category in categories),
+    ]
+
+
+class Writer:
+    """
+    Кодировщик выгрузки, получающий записи пачками.
+
+    write() возвращает байты очередной пачки, close() — хвост потока.
+    Между пачками сохраняется состояние: заголовок CSV пишется один раз,
+    а при compress=True все пачки образуют один поток gzip.
+    """
+
+    def __init__(self, fmt='ndjson', compress=False, level=6):
+        if fmt not in FORMATS:
+            raise ValueError(f'Неизвестный формат выгрузки: {fmt}')
+        self.fmt = fmt
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+        self.header_written = False
+
+    def encode(self, records):
+        if self.fmt == 'ndjson':
+            return ''.join(ndjson_lines(records))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not self.header_written:
+            writer.writerow(CSV_COLUMNS)
+            self.header_written = True
+        writer.writerows(csv_row(record) for record in records)
+        return buffer.getvalue()
+
+    def write(self, records):
+        data = self.encode(records).encode('utf-8')
+        return self.compressor.compress(data) if self.compressor else data
+
+    def close(self):
+        data = b'' if self.fmt == 'ndjson' or self.header_written else self.encode([]).encode('utf-8')
+        if self.compressor:
+            return self.compressor.compress(data) + self.compressor.flush()
+        return data
+
+
+def batched(records, size=BATCH_SIZE):
+    """
+    Группирует записи в списки по size.
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream(records, fmt='ndjson', compress=False, batch_size=BATCH_SIZE):
+    """
+    Порции байтов выгрузки: по одной на пачку из batch_size записей.
+    """
+    writer = Writer(fmt, compress)
+    for batch in batched(records, batch_size):
+        data = writer.write(batch)
+        if data:
+            yield data
+    tail = writer.close()
+    if tail:
+        yield tail
+
+
+class InvalidRecord(ValueError):
+    """
+    Строка загрузки не описывает корректный рецепт.
+    """
+
+
+def parse_record(data):
+    """
+    Проверяет и нормализует запись загрузки.
+
+    Принимает словарь в формате выгрузки (NDJSON) или строку CSV и
+    возвращает словарь с полями рецепта, именем автора (author, может
+    отсутствовать) и списком названий категорий (categories).
+    """
+    if not isinstance(data, dict):
+        raise InvalidRecord('Ожидается объект')
+    record = {}
+    for name in REQUIRED_FIELDS:
+        value = data.get(name)
+        if not isinstance(value, str) or not value.strip():
+            raise InvalidRecord(f'Не заполнено поле {name}')
+        record[name] = value.strip() if name == 'title' else value
+    if len(record['title']) > MAX_TITLE_LENGTH:
+        raise InvalidRecord(f'Название длиннее {MAX_TITLE_LENGTH} символов')
+    try:
+        record['cooking_time'] = int(data.get('cooking_time'))
+    except (TypeError, ValueError):
+        raise InvalidRecord('cooking_time должно быть целым числом') from None
+    if record['cooking_time'] < 0:
+        raise InvalidRecord('cooking_time не может быть отрицательным')
+    record['image'] = data.get('image') or None
+
+    # Автор и категории: объекты выгрузки NDJSON или плоские колонки CSV
+    author = data.get('author')
+    record['author'] = (author.get('username') if isinstance(author, dict) else author) or None
+    categories = data.get('categories') or []
+    if isinstance(categories, str):
+        categories = categories.split(LIST_SEPARATOR)
+    names = (category.get('name') if isinstance(category, dict) else category for category in categories)
+    record['categories'] = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+    return record
+
+
+def parse_lines(fmt, lines):
+    """
+    Разбирает пачку строк загрузки.
+
+    lines — список пар (номер строки, строка NDJSON или словарь строки CSV).
+    Возвращает список троек (номер, запись или None, ошибка или None).
+    Функция верхнего уровня, чтобы её можно было выполнять в пуле процессов.
+    """
+    parsed = []
+    for number, line in lines:
+        try:
+            data = json.loads(line) if fmt == 'ndjson' else line
+            parsed.append((number, parse_record(data), None))
+        except (ValueError, InvalidRecord) as exc:
+            parsed.append((number, None, str(exc)))
+    return parsed
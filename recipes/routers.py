@@ -0,0 +1,105 @@
+"""
+Маршрутизация запросов к базе: чтение в GET-запросах — через соединение только для чтения.
+
+Псевдоним READ_ALIAS указывает на тот же файл SQLite, но открывается
+с query_only=ON (recipes/sqlitetuning.py). Middleware
+recipes.middleware.read_only_requests отмечает GET/HEAD-запросы; всё остальное
+(записи, POST-запросы, команды manage.py) идёт в default.
+
+Представления, которым не страшно небольшое отставание данных (главная,
+список, страница рецепта), отмечены декоратором replica_reads и читают из
+реплики replica_N (recipes/dbconfig.py), если реплики настроены. Реплика
+выбирается одна на запрос, чтобы все его запросы видели одно состояние.
+После POST-запроса клиент REPLICA_STICKY_SECONDS секунд читает из основной
+базы (cookie STICKY_COOKIE): свои изменения он видит сразу.
+"""
+
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .dbconfig import REPLICA_PREFIX
+
+READ_ALIAS = 'readonly'
+
+# Cookie со временем, до которого клиент читает из основной базы
+STICKY_COOKIE = 'primary_until'
+
+# Выполняется ли сейчас запрос только на чтение (GET/HEAD)
+read_only_request = ContextVar('recipes_read_only_request', default=False)
+# Реплика, из которой читает текущее представление
+read_replica = ContextVar('recipes_read_replica', default=None)
+
+
+def replica_aliases():
+    """
+    Псевдонимы настроенных реплик.
+    """
+    return [alias for alias in connections if alias.startswith(REPLICA_PREFIX)]
+
+
+def is_sticky(request):
+    """
+    Клиент недавно что-то менял и должен читать из основной базы.
+    """
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def mark_sticky(response):
+    """
+    Отправляет клиенту cookie: следующие REPLICA_STICKY_SECONDS секунд читать из основной базы.
+    """
+    seconds = settings.REPLICA_STICKY_SECONDS
+    if seconds:
+        response.set_cookie(STICKY_COOKIE, f'{time.time() + seconds:.3f}', max_age=seconds,
+                            httponly=True, samesite='Lax')
+
+
+def replica_reads(view):
+    """
+    Декоратор представления: чтение в GET-запросах — из случайной реплики.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        replicas = replica_aliases()
+        if not replicas or not read_only_request.get() or is_sticky(request):
+            return view(request, *args, **kwargs)
+        token = read_replica.set(random.choice(replicas))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            read_replica.reset(token)
+    return wrapper
+
+
+class ReadOnlyRouter:
+    """
+    Чтение в GET-запросах — из реплики или READ_ALIAS, запись — всегда в default.
+    """
+
+    def db_for_read(self, model, **hints):
+        # Внутри транзакции читаем из неё же: иначе не увидим своих незафиксированных записей
+        if not read_only_request.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        replica = read_replica.get()
+        if replica is not None:
+            return replica
+        return READ_ALIAS if READ_ALIAS in connections else None
+
+    def db_for_write(self, model, **hints):
+        # Объекты, прочитанные через READ_ALIAS или реплику, сохраняются в default
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Все псевдонимы — одни и те же данные
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != READ_ALIAS and not db.startswith(REPLICA_PREFIX)
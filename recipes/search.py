@@ -0,0 +1,110 @@
+"""
+Полнотекстовый поиск рецептов для Django.
+
+Адаптер к recipes/textsearch.py: синхронизация индекса FTS5 с моделью
+Recipe и ранжированный поиск. На базах, отличных от SQLite, поиск
+откатывается к icontains по названию и ингредиентам.
+"""
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from . import textsearch
+from .models import Recipe
+
+FTS_TABLE = textsearch.FTS_TABLE
+COLUMNS = ', '.join(textsearch.FIELDS)
+
+
+def is_enabled():
+    """
+    Индекс FTS5 есть только в SQLite.
+    """
+    return connection.vendor == 'sqlite'
+
+
+def index_recipes(recipes, replace=True):
+    """
+    Добавляет или обновляет рецепты в поисковом индексе.
+
+    replace=False пропускает удаление старых записей (для заведомо новых рецептов).
+    """
+    if not is_enabled():
+        return
+    rows = [(recipe.id, *textsearch.document(recipe)) for recipe in recipes]
+    if not rows:
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        if replace:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, {COLUMNS}) VALUES (%s, %s, %s, %s, %s)', rows
+        )
+
+
+def remove_recipes(recipe_ids):
+    """
+    Удаляет рецепты из поискового индекса.
+    """
+    if not is_enabled() or not recipe_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in recipe_ids])
+
+
+def rebuild_index(batch_size=2000):
+    """
+    Полностью перестраивает индекс по таблице рецептов. Возвращает число рецептов.
+    """
+    if not is_enabled():
+        return 0
+    total, last_id = 0, 0
+    queryset = Recipe.objects.only('id', *textsearch.FIELDS).order_by('id')
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                return total
+            index_recipes(batch, replace=False)
+            total += len(batch)
+            last_id = batch[-1].id
+
+
+def search_ids(query, prefix=False, category_id=None, limit=textsearch.MAX_RESULTS):
+    """
+    Возвращает id рецептов, подходящих под запрос, от самых релевантных.
+    """
+    if not is_enabled():
+        condition = Q(title__icontains=query) | Q(ingredients__icontains=query)
+        queryset = Recipe.objects.filter(condition)
+        if category_id:
+            queryset = queryset.filter(categories__id=category_id)
+        return list(queryset.values_list('id', flat=True)[:limit])
+
+    expression = textsearch.match_expression(query, prefix)
+    if expression is None:
+        return []
+    sql = f'SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE}'
+    params = [expression]
+    if category_id:
+        sql += (f' JOIN recipes_recipecategory rc ON rc.recipe_id = {FTS_TABLE}.rowid'
+                ' AND rc.category_id = %s')
+        params.insert(0, category_id)
+    sql += f' WHERE {FTS_TABLE} MATCH %s ORDER BY {textsearch.RANK_SQL} LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_recipes(query, prefix=False, category_id=None, limit=textsearch.MAX_RESULTS, queryset=None):
+    """
+    Возвращает список рецептов, упорядоченный по релевантности.
+    """
+    ids = search_ids(query, prefix, category_id, limit)
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    found = queryset.in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found]
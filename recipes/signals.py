@@ -0,0 +1,136 @@
+"""
+Обработчики сигналов моделей приложения recipes.
+
+Поддерживают в актуальном состоянии производные данные (кэши и т.п.)
+при создании, изменении и удалении рецептов и категорий.
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import categories, featured, pagecache, pantry, search, tasks, textsearch
+from .models import Category, Recipe, RecipeCategory, SimilarRecipe
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    """
+    Новый рецепт расширяет диапазон id — сбрасываем кэш случайной выборки.
+    Изменённые текстовые поля переиндексируются для полнотекстового поиска,
+    а список ингредиентов — в инвертированном индексе ингредиентов.
+    """
+    if created:
+        featured.invalidate()
+    update_fields = kwargs.get('update_fields')
+    if update_fields is None or set(update_fields) & set(textsearch.FIELDS):
+        search.index_recipes([instance])
+    if update_fields is None or 'ingredients' in update_fields:
+        pantry.sync_recipes([instance])
+        schedule_similar([instance.pk])
+    pagecache.invalidate_recipe(instance.pk)
+
+
+def schedule_similar(recipe_ids):
+    """
+    Ставит в очередь пересчёт похожих рецептов: изменились ингредиенты или категории.
+    """
+    if recipe_ids:
+        tasks.enqueue('update_similar', recipe_ids=sorted(recipe_ids))
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, **kwargs):
+    """
+    Пока связи с ингредиентами не удалены каскадом, уменьшаем их счётчики
+    и запоминаем рецепты, в списках похожих которых был удаляемый.
+    """
+    pantry.forget_recipes([instance.pk])
+    instance._similar_referrers = list(SimilarRecipe.objects.filter(similar_id=instance.pk)
+                                       .values_list('recipe_id', flat=True))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """
+    Удалённый рецепт меняет диапазон и количество id — сбрасываем кэш
+    и убираем рецепт из поискового индекса.
+    """
+    featured.invalidate()
+    search.remove_recipes([instance.pk])
+    pagecache.invalidate_recipe(instance.pk)
+    schedule_similar(getattr(instance, '_similar_referrers', ()))
+
+
+def touch_recipes(recipe_ids):
+    """
+    Отмечает рецепты изменёнными (updated_at) без сигналов post_save:
+    их категории входят в ответы, а значит, и в ETag / Last-Modified.
+    """
+    Recipe.objects.filter(id__in=recipe_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    """
+    Названия категорий выводятся на всех страницах — сбрасываем весь кэш страниц.
+    Переименованная категория меняет ответы API с её рецептами.
+    """
+    pagecache.invalidate_all()
+    if kwargs.get('created') is False:
+        touch_recipes(RecipeCategory.objects.filter(category_id=instance.pk).values('recipe_id'))
+
+
+@receiver(post_save, sender=RecipeCategory)
+@receiver(post_delete, sender=RecipeCategory)
+def recipe_category_changed(sender, instance, **kwargs):
+    """
+    Связь рецепта с категорией изменена напрямую, минуя recipe.categories.
+    """
+    touch_recipes([instance.recipe_id])
+    pagecache.invalidate_recipe(instance.recipe_id)
+
+
+@receiver(post_save, sender=RecipeCategory)
+def recipe_category_saved(sender, instance, created, **kwargs):
+    """
+    Новая связь увеличивает счётчик рецептов категории.
+    """
+    if created:
+        categories.links_added([instance.category_id])
+        schedule_similar([instance.recipe_id])
+
+
+@receiver(post_delete, sender=RecipeCategory)
+def recipe_category_deleted(sender, instance, **kwargs):
+    """
+    Удалённая связь (в том числе remove/clear/set у recipe.categories
+    и каскад при удалении рецепта) уменьшает счётчик категории.
+    """
+    categories.links_removed([instance.category_id])
+
+
+@receiver(m2m_changed, sender=Recipe.categories.through)
+def recipe_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Изменён набор категорий рецепта (например, form.save_m2m() в recipe_edit).
+    """
+    if not action.startswith('post_'):
+        return
+    if pk_set != set():
+        # Пустой pk_set — набор не изменился (например, set() с теми же категориями)
+        schedule_similar((pk_set or ()) if reverse else [instance.pk])
+    if action == 'post_add':
+        # Связи добавляются bulk_create без post_save; pk_set — только новые связи
+        categories.adjust_counts({instance.pk: len(pk_set)} if reverse else dict.fromkeys(pk_set, 1))
+    if reverse:
+        # Со стороны категории: затронуты рецепты из pk_set (при clear — неизвестно какие)
+        if pk_set is None:
+            pagecache.invalidate_all()
+        touch_recipes(pk_set or ())
+        for recipe_id in pk_set or ():
+            pagecache.invalidate_recipe(recipe_id)
+    else:
+        touch_recipes([instance.pk])
+        pagecache.invalidate_recipe(instance.pk)
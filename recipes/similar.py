@@ -0,0 +1,177 @@
+"""
+Похожие рецепты для Django.
+
+Адаптер к recipes/similarity.py. Для каждого рецепта в таблице
+SimilarRecipe хранится до TOP_K ближайших соседей, поэтому страница
+рецепта и маршрут API /recipes/{id}/similar читают их одним запросом
+по индексу (recipe, rank).
+
+Полностью таблица строится командой manage.py rebuild_similar (после
+массовой загрузки и периодически). После изменения ингредиентов или
+категорий рецепта задача update_similar (recipes/tasks.py) пересчитывает
+только затронутые списки: самого рецепта, рецептов, у которых он был
+в списке, и его новых соседей. Веса признаков берутся из текущих
+счётчиков Ingredient.recipe_count и Category.recipe_count; медленный
+дрейф весов у остальных рецептов выравнивает полная перестройка.
+"""
+
+from django.db import transaction
+
+from . import pagecache, similarity
+from .models import Category, Ingredient, Recipe, RecipeCategory, RecipeIngredient, SimilarRecipe
+
+# Сколько id передаётся в одном условии IN
+CHUNK_SIZE = 2000
+
+
+def for_recipe(recipe_id):
+    """
+    Похожие рецепты для карточек, от самого похожего (ленивый QuerySet, один запрос).
+    """
+    return Recipe.objects.for_cards().filter(similar_to__recipe_id=recipe_id).order_by('similar_to__rank')
+
+
+def signature(recipe_id):
+    """
+    Похожие рецепты и время их изменения — для ETag страницы рецепта (один запрос по индексу).
+    """
+    return list(SimilarRecipe.objects.filter(recipe_id=recipe_id).order_by('rank')
+                .values_list('similar_id', 'similar__updated_at'))
+
+
+def weights():
+    """
+    Квадраты весов признаков по текущим счётчикам рецептов.
+    """
+    frequencies = dict(Ingredient.objects.values_list('id', 'recipe_count'))
+    frequencies.update((similarity.category_term(pk), count)
+                       for pk, count in Category.objects.values_list('id', 'recipe_count'))
+    return similarity.idf_weights(frequencies, Recipe.objects.count())
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+
+def features(recipe_ids):
+    """
+    Признаки рецептов {id: [признаки]}; у рецептов без признаков записи нет.
+    """
+    result = {}
+    for chunk in _chunks(recipe_ids):
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(recipe_id__in=chunk).values_list(
+                'recipe_id', 'ingredient_id'):
+            result.setdefault(recipe_id, []).append(ingredient_id)
+        for recipe_id, category_id in RecipeCategory.objects.filter(recipe_id__in=chunk).values_list(
+                'recipe_id', 'category_id'):
+            result.setdefault(recipe_id, []).append(similarity.category_term(category_id))
+    return result
+
+
+def term_postings(terms):
+    """
+    Списки рецептов по признакам — по запросу LIMIT на признак через индексы
+    (ingredient, rank, recipe) и (category, recipe): сначала рецепты,
+    для которых ингредиент самый редкий.
+    """
+    index = {}
+    for term in terms:
+        if term < 0:
+            links = RecipeCategory.objects.filter(category_id=-term).order_by('recipe_id')
+        else:
+            links = RecipeIngredient.objects.filter(ingredient_id=term).order_by('rank', 'recipe_id')
+        index[term] = list(links.values_list('recipe_id', flat=True)[:similarity.MAX_POSTINGS])
+    return index
+
+
+def compute(recipe_ids, term_weights):
+    """
+    Соседи рецептов {id: [(id, сходство)]}; удалённым рецептам — пустой список.
+    """
+    own = {recipe_id: similarity.profile(terms, term_weights) for recipe_id, terms in features(recipe_ids).items()}
+    index = term_postings({term for terms, _ in own.values() for term in terms})
+    candidates = {other for ids in index.values() for other in ids} - own.keys()
+    profiles = dict(own)
+    profiles.update((recipe_id, similarity.profile(terms, term_weights))
+                    for recipe_id, terms in features(candidates).items())
+    return {recipe_id: similarity.neighbours(recipe_id, own[recipe_id], index, profiles, term_weights)
+            if recipe_id in own else [] for recipe_id in recipe_ids}
+
+
+def store(results):
+    """
+    Заменяет списки похожих у рецептов из results.
+    """
+    with transaction.atomic():
+        for chunk in _chunks(results):
+            SimilarRecipe.objects.filter(recipe_id__in=chunk).delete()
+        SimilarRecipe.objects.bulk_create([
+            SimilarRecipe(recipe_id=recipe_id, similar_id=other, score=score, rank=rank)
+            for recipe_id, pairs in results.items() for rank, (other, score) in enumerate(pairs)
+        ], batch_size=CHUNK_SIZE)
+
+
+def update(recipe_ids):
+    """
+    Пересчитывает списки похожих после изменения или удаления рецептов recipe_ids.
+
+    Возвращает число пересчитанных списков.
+    """
+    changed = set(recipe_ids)
+    term_weights = weights()
+    referrers = set()
+    for chunk in _chunks(changed):
+        referrers.update(SimilarRecipe.objects.filter(similar_id__in=chunk).values_list('recipe_id', flat=True))
+    results = compute(changed, term_weights)
+    # Сходство симметрично: изменённый рецепт мог войти в списки своих новых соседей
+    affected = referrers | {other for pairs in results.values() for other, _ in pairs}
+    results.update(compute(affected - changed, term_weights))
+    store(results)
+    pagecache.invalidate_details(results)
+    return len(results)
+
+
+def rebuild(chunk_size=10000):
+    """
+    Строит все списки похожих заново. Возвращает число рецептов с признаками.
+
+    Признаки и усечённые списки читаются двумя проходами по индексам
+    в порядке характерности, соседи пишутся пачками по chunk_size рецептов.
+    """
+    term_weights = weights()
+    terms = {}
+
+    def links():
+        ingredient_links = RecipeIngredient.objects.order_by('ingredient_id', 'rank', 'recipe_id')
+        for ingredient_id, recipe_id in ingredient_links.values_list('ingredient_id', 'recipe_id').iterator(
+                chunk_size=chunk_size):
+            yield ingredient_id, recipe_id
+        category_links = RecipeCategory.objects.order_by('category_id', 'recipe_id')
+        for category_id, recipe_id in category_links.values_list('category_id', 'recipe_id').iterator(
+                chunk_size=chunk_size):
+            yield similarity.category_term(category_id), recipe_id
+
+    def collect(rows):
+        for term, recipe_id in rows:
+            terms.setdefault(recipe_id, []).append(term)
+            yield term, recipe_id
+
+    index = similarity.postings(collect(links()))
+    profiles = {recipe_id: similarity.profile(recipe_terms, term_weights) for recipe_id, recipe_terms in terms.items()}
+    terms.clear()
+
+    with transaction.atomic():
+        SimilarRecipe.objects.all().delete()
+        batch = []
+        for recipe_id, own in profiles.items():
+            batch.extend(SimilarRecipe(recipe_id=recipe_id, similar_id=other, score=score, rank=rank)
+                         for rank, (other, score) in enumerate(
+                             similarity.neighbours(recipe_id, own, index, profiles, term_weights)))
+            if len(batch) >= chunk_size:
+                SimilarRecipe.objects.bulk_create(batch)
+                batch = []
+        SimilarRecipe.objects.bulk_create(batch)
+    pagecache.invalidate_all()
+    return len(profiles)
@@ -0,0 +1,115 @@
+"""
+Похожие рецепты: TF-IDF по ингредиентам и категориям.
+
+Общая часть без Django и SQLAlchemy: адаптер (recipes/similar.py) читает
+признаки рецептов из индекса ингредиентов и связей с категориями, а здесь
+строятся разреженные векторы и ищутся ближайшие соседи.
+
+Признак рецепта — id ингредиента (положительное число) или категории
+(отрицательное). Вес признака — IDF: редкий ингредиент («шафран»)
+говорит о сходстве больше, чем соль, а признак, который есть у всех
+рецептов, не говорит ничего (вес 0); категории грубее
+ингредиентов и весят CATEGORY_WEIGHT от своего IDF. Сходство — косинус
+векторов. Вектор хранится компактно, как профиль (признаки, норма): вес
+признака один для всех рецептов, поэтому на миллионе рецептов в памяти
+нет миллиона словарей.
+
+Соседей не ищут перебором всех пар: кандидаты берутся из списков рецептов
+по каждому признаку (инвертированный индекс), причём из длинных списков
+частых признаков — только первые MAX_POSTINGS, для которых признак
+наиболее характерен. Кандидаты упорядочиваются по сумме весов общих
+признаков, а лучшие CANDIDATES из них оцениваются точным косинусом.
+"""
+
+import heapq
+import math
+from collections import defaultdict
+
+from decouple import config
+
+# Сколько похожих рецептов хранится для каждого
+TOP_K = config('SIMILAR_TOP_K', default=8, cast=int)
+# Вес категории относительно ингредиента с тем же IDF
+CATEGORY_WEIGHT = config('SIMILAR_CATEGORY_WEIGHT', default=0.5, cast=float)
+# Сколько рецептов берётся из списка одного признака
+MAX_POSTINGS = config('SIMILAR_MAX_POSTINGS', default=100, cast=int)
+# Сколько кандидатов оценивается точным косинусом
+CANDIDATES = config('SIMILAR_CANDIDATES', default=50, cast=int)
+# Меньшее сходство не считается: например, общая только соль
+MIN_SCORE = 0.05
+
+
+def category_term(category_id):
+    """
+    Признак категории (отрицательный, чтобы не совпасть с id ингредиента).
+    """
+    return -category_id
+
+
+def idf_weights(frequencies, total):
+    """
+    Квадраты весов признаков {признак: IDF²} по числу рецептов с признаком.
+
+    В косинус веса входят только попарными произведениями одного и того же
+    признака, поэтому хранятся сразу квадраты.
+    """
+    weights = {}
+    for term, count in frequencies.items():
+        weight = math.log((1 + total) / (1 + count))
+        if term < 0:
+            weight *= CATEGORY_WEIGHT
+        weights[term] = weight * weight
+    return weights
+
+
+def profile(terms, weights):
+    """
+    Профиль рецепта: (признаки, норма вектора).
+    """
+    terms = tuple(set(terms))
+    return terms, math.sqrt(sum(weights.get(term, 0.0) for term in terms))
+
+
+def postings(rows):
+    """
+    Инвертированный индекс {признак: [id рецептов]} из пар (признак, id).
+
+    Пары должны идти в порядке характерности признака для рецепта (как по
+    индексу); в списке остаются первые MAX_POSTINGS.
+    """
+    index = defaultdict(list)
+    for term, recipe_id in rows:
+        ids = index[term]
+        if len(ids) < MAX_POSTINGS:
+            ids.append(recipe_id)
+    return index
+
+
+def neighbours(recipe_id, own, index, profiles, weights, top_k=TOP_K):
+    """
+    До top_k рецептов, похожих на recipe_id: [(id, сходство)] по убыванию сходства.
+
+    own — профиль рецепта, index — списки рецептов по его признакам,
+    profiles — профили всех рецептов из этих списков.
+    """
+    terms, norm = own
+    if not norm:
+        return []
+    partial = defaultdict(float)
+    for term in terms:
+        weight = weights.get(term, 0.0)
+        if weight:
+            for other in index.get(term, ()):
+                partial[other] += weight
+    partial.pop(recipe_id, None)
+    # Грубый отбор по сумме весов общих признаков, точный косинус — только у лучших
+    candidates = heapq.nlargest(CANDIDATES, partial, key=partial.__getitem__)
+    own_terms = set(terms)
+    scored = []
+    for other in candidates:
+        other_terms, other_norm = profiles[other]
+        shared = sum(weights.get(term, 0.0) for term in other_terms if term in own_terms)
+        score = shared / (norm * other_norm) if other_norm else 0.0
+        if score >= MIN_SCORE:
+            scored.append((other, round(score, 6)))
+    return heapq.nlargest(top_k, scored, key=lambda pair: (pair[1], -pair[0]))
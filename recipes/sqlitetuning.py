@@ -0,0 +1,74 @@
+"""
+Настройки соединений SQLite для нескольких процессов (gunicorn + uvicorn), общие для Django и FastAPI.
+
+Режим журнала WAL (читатели не блокируют писателя и наоборот) — свойство
+самого файла базы: он включается один раз при развёртывании командой
+python manage.py sqlite_journal_mode, а не при каждом подключении, чтобы
+manage.py check и другие команды не переписывали заголовок файла.
+
+Параметры применяются при каждом подключении:
+- synchronous=NORMAL — в режиме WAL безопасно и без fsync на каждую транзакцию;
+- busy_timeout — ожидание блокировки вместо немедленной ошибки «database is locked»;
+- cache_size и mmap_size — страничный кэш и чтение через отображение в память;
+- temp_store=MEMORY — временные индексы сортировок в памяти.
+Соединения для чтения дополнительно открываются с query_only=ON.
+
+Значения задаются переменными окружения SQLITE_* (SQLITE_TUNING=False
+отключает всё, кроме busy_timeout).
+"""
+
+from decouple import config
+
+ENABLED = config('SQLITE_TUNING', default=True, cast=bool)
+BUSY_TIMEOUT = config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int)  # мс
+JOURNAL_MODE = config('SQLITE_JOURNAL_MODE', default='wal')
+
+PRAGMAS = {
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='normal'),
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-32000, cast=int),  # < 0 — в КиБ, т.е. ~32 МБ
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=128 * 1024 * 1024, cast=int),
+    'temp_store': 'memory',
+}
+
+
+def statements(read_only=False, enabled=ENABLED):
+    """
+    Команды PRAGMA для нового соединения.
+    """
+    pragmas = {**PRAGMAS} if enabled else {}
+    pragmas['busy_timeout'] = BUSY_TIMEOUT
+    if read_only:
+        pragmas['query_only'] = 'on'
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+def init_command(read_only=False):
+    """
+    Команды одной строкой для OPTIONS['init_command'] в DATABASES Django.
+    """
+    return '; '.join(statements(read_only))
+
+
+def apply(connection, read_only=False):
+    """
+    Выполняет команды на DB-API соединении (для событий connect в SQLAlchemy).
+    """
+    cursor = connection.cursor()
+    try:
+        for statement in statements(read_only):
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+
+
+def set_journal_mode(connection, mode=None):
+    """
+    Переключает режим журнала файла базы (по умолчанию JOURNAL_MODE).
+    Возвращает установленный режим.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f'PRAGMA journal_mode = {mode or JOURNAL_MODE}')
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
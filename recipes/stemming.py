@@ -0,0 +1,156 @@
+"""
+Стеммер русского языка (алгоритм Snowball «russian»).
+
+Приводит словоформы к общей основе: «грибов», «грибами», «грибы» -> «гриб».
+Используется полнотекстовым поиском, чтобы запрос находил рецепты
+независимо от падежа и числа слов. Реализация без внешних зависимостей.
+"""
+
+import re
+from functools import lru_cache
+
+VOWELS = set('аеиоуыэюя')
+
+PERFECTIVE_GERUND_1 = ('вшись', 'вши', 'в')
+PERFECTIVE_GERUND_2 = ('ывшись', 'ившись', 'ывши', 'ивши', 'ыв', 'ив')
+ADJECTIVE = (
+    'ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое', 'ей', 'ий', 'ый',
+    'ой', 'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею',
+)
+PARTICIPLE_1 = ('ем', 'нн', 'вш', 'ющ', 'щ')
+PARTICIPLE_2 = ('ивш', 'ывш', 'ующ')
+REFLEXIVE = ('ся', 'сь')
+VERB_1 = (
+    'ете', 'йте', 'ешь', 'нно', 'ла', 'на', 'ли', 'ем', 'ло', 'но', 'ет', 'ют', 'ны',
+    'ть', 'й', 'л', 'н',
+)
+VERB_2 = (
+    'ейте', 'уйте', 'ила', 'ыла', 'ена', 'ите', 'или', 'ыли', 'ило', 'ыло', 'ено', 'ует',
+    'уют', 'ены', 'ить', 'ыть', 'ишь', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ят',
+    'ит', 'ыт', 'ую', 'ю',
+)
+NOUN = (
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ев', 'ов', 'ие', 'ье', 'еи', 'ии',
+    'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом', 'ах', 'ях', 'ию', 'ью', 'ия', 'ья', 'а',
+    'е', 'и', 'й', 'о', 'у', 'ы', 'ь', 'ю', 'я',
+)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _regions(word):
+    """
+    Возвращает начала областей RV и R2 (индексы в слове).
+    """
+    rv = r1 = r2 = len(word)
+    for i, char in enumerate(word):
+        if char in VOWELS:
+            rv = i + 1
+            break
+    for i in range(1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+def _strip(rv_part, endings):
+    """
+    Удаляет самое длинное подходящее окончание из части слова в RV.
+
+    Возвращает укороченную строку или None, если окончание не найдено.
+    """
+    for ending in sorted(endings, key=len, reverse=True):
+        if rv_part.endswith(ending):
+            return rv_part[:-len(ending)]
+    return None
+
+
+def _strip_any(rv_part, group_1, group_2):
+    """
+    Удаляет самое длинное окончание из групп 1 и 2.
+
+    Окончания группы 1 удаляются, только если перед ними стоит «а» или «я».
+    """
+    for ending in sorted(group_1 + group_2, key=len, reverse=True):
+        if rv_part.endswith(ending):
+            stem = rv_part[:-len(ending)]
+            if ending in group_2 or stem.endswith(('а', 'я')):
+                return stem
+            return None
+    return None
+
+
+def _strip_adjectival(rv_part):
+    stem = _strip(rv_part, ADJECTIVE)
+    if stem is None:
+        return None
+    participle = _strip_any(stem, PARTICIPLE_1, PARTICIPLE_2)
+    return participle if participle is not None else stem
+
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    """
+    Возвращает основу русского слова. Слова без кириллицы не меняются.
+    """
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    head, part = word[:rv], word[rv:]
+
+    # Шаг 1: деепричастия, иначе возвратность и прилагательные/глаголы/существительные
+    stemmed = _strip_any(part, PERFECTIVE_GERUND_1, PERFECTIVE_GERUND_2)
+    if stemmed is not None:
+        part = stemmed
+    else:
+        reflexive = _strip(part, REFLEXIVE)
+        if reflexive is not None:
+            part = reflexive
+        for strip in (_strip_adjectival,
+                      lambda p: _strip_any(p, VERB_1, VERB_2),
+                      lambda p: _strip(p, NOUN)):
+            stemmed = strip(part)
+            if stemmed is not None:
+                part = stemmed
+                break
+
+    # Шаг 2: конечная «и»
+    if part.endswith('и'):
+        part = part[:-1]
+
+    # Шаг 3: словообразовательные суффиксы в R2
+    r2_start = max(r2 - rv, 0)
+    derivational = _strip(part[r2_start:], DERIVATIONAL)
+    if derivational is not None:
+        part = part[:r2_start] + derivational
+
+    # Шаг 4: «нн» -> «н», превосходная степень, мягкий знак
+    superlative = _strip(part, SUPERLATIVE)
+    if superlative is not None:
+        part = superlative
+    if part.endswith('нн'):
+        part = part[:-1]
+    elif superlative is None and part.endswith('ь'):
+        part = part[:-1]
+
+    return head + part
+
+
+def tokenize(text):
+    """
+    Разбивает текст на слова в нижнем регистре.
+    """
+    return WORD_RE.findall((text or '').lower().replace('ё', 'е'))
+
+
+def stem_text(text):
+    """
+    Возвращает текст из основ слов, разделённых пробелами.
+    """
+    return ' '.join(stem(token) for token in tokenize(text))
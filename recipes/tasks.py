@@ -0,0 +1,123 @@
+"""
+Фоновые задачи: небольшая очередь в таблице recipes_job без Redis и Celery.
+
+Представления ставят медленную работу в очередь (enqueue) и сразу
+отвечают; задачи выполняет manage.py run_worker в пуле потоков.
+Задача берётся исполнителем условным UPDATE ... WHERE status = 'pending',
+поэтому несколько исполнителей не выполнят одну задачу дважды.
+Выполненные задачи удаляются, упавшие повторяются с экспоненциальной
+задержкой, после TASKS_MAX_ATTEMPTS попыток остаются в статусе failed.
+
+Исполнитель сбрасывает кэш страниц в своём процессе, поэтому при
+отдельном процессе исполнителя нужен общий кэш (CACHE_BACKEND, см. settings).
+"""
+
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from . import images, pagecache, similar
+from .models import Job, Recipe
+
+_registry = {}
+
+
+def task(func):
+    """
+    Регистрирует функцию как задачу под её именем.
+    """
+    _registry[func.__name__] = func
+    return func
+
+
+def enqueue(name, **payload):
+    """
+    Ставит задачу в очередь; при TASKS_EAGER выполняет её сразу.
+    """
+    if name not in _registry:
+        raise KeyError(f'Неизвестная задача: {name}')
+    if settings.TASKS_EAGER:
+        _registry[name](**payload)
+        return None
+    return Job.objects.create(name=name, payload=payload, max_attempts=settings.TASKS_MAX_ATTEMPTS)
+
+
+def retry_delay(attempts):
+    """
+    Задержка перед следующей попыткой: удваивается с каждой неудачей.
+    """
+    return timedelta(seconds=min(settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1), settings.TASKS_RETRY_MAX_DELAY))
+
+
+def claim(limit):
+    """
+    Берёт в работу до limit готовых к запуску задач и возвращает их.
+    """
+    now = timezone.now()
+    # Задачи исполнителя, остановленного посреди работы, снова становятся ожидающими
+    Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT)) \
+        .update(status=Job.PENDING, locked_at=None)
+
+    ids = Job.objects.filter(status=Job.PENDING, run_at__lte=now).order_by('run_at', 'id') \
+        .values_list('id', flat=True)[:limit]
+    claimed = []
+    for job_id in ids:
+        # Задачу мог перехватить другой исполнитель — тогда обновится 0 строк
+        if Job.objects.filter(id=job_id, status=Job.PENDING).update(
+                status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1):
+            claimed.append(job_id)
+    return list(Job.objects.filter(id__in=claimed).order_by('run_at', 'id'))
+
+
+def run(job):
+    """
+    Выполняет взятую задачу. Возвращает True при успехе.
+    """
+    try:
+        func = _registry.get(job.name)
+        if func is None:
+            raise KeyError(f'Неизвестная задача: {job.name}')
+        func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+        job.save(update_fields=['status', 'run_at', 'locked_at', 'last_error'])
+        return False
+    job.delete()
+    return True
+
+
+def run_pending(limit=100):
+    """
+    Выполняет готовые задачи в текущем потоке. Возвращает (успешно, с ошибкой).
+    """
+    results = [run(job) for job in claim(limit)]
+    return results.count(True), results.count(False)
+
+
+@task
+def build_image_variants(recipe_id):
+    """
+    Уменьшенные копии и WebP/AVIF-варианты изображения рецепта (recipes/images.py).
+    """
+    recipe = Recipe.objects.filter(id=recipe_id).only('id', 'image').first()
+    if recipe is None or not recipe.image:
+        return
+    if images.build_variants(recipe.image.path):
+        pagecache.invalidate_recipe(recipe_id)
+
+
+@task
+def update_similar(recipe_ids):
+    """
+    Пересчёт похожих рецептов после изменения ингредиентов или категорий (recipes/similar.py).
+    """
+    similar.update(recipe_ids)
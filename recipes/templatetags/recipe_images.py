@@ -0,0 +1,46 @@
+"""
+Теги шаблонов для изображений рецептов.
+
+{% recipe_picture recipe.image recipe.title sizes="..." %} выводит <picture>
+с <source srcset> для AVIF/WebP и <img srcset> с уменьшенными JPEG-копиями.
+В srcset попадают только существующие копии (recipes/images.py), без них
+выводится оригинал. Проверка файлов выполняется лишь при отрисовке
+фрагмента: готовые карточки и страницы берутся из кэша (recipes/pagecache.py).
+"""
+
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from recipes import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def recipe_picture(image, alt='', sizes='100vw', css_class='', style='', loading='lazy'):
+    """
+    Разметка <picture> для поля ImageField рецепта.
+    """
+    if not image:
+        return ''
+    storage = image.storage
+    sources = {ext: [] for ext in images.FORMATS}
+    for (width, ext), name in images.variant_names(image.name).items():
+        if storage.exists(name):
+            sources[ext].append(f'{storage.url(name)} {width}w')
+
+    jpeg = sources.pop('jpg', [])
+    modern = [(images.MIME_TYPES[ext], ', '.join(srcset), sizes) for ext, srcset in sources.items() if srcset]
+    img = format_html(
+        '<img src="{}"{} alt="{}" class="{}" style="{}" loading="{}" decoding="async">',
+        image.url,
+        format_html(' srcset="{}" sizes="{}"', ', '.join(jpeg), sizes) if jpeg else '',
+        alt, css_class, style, loading,
+    )
+    if not modern:
+        return img
+    return format_html(
+        '<picture>{}{}</picture>',
+        format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', modern),
+        img,
+    )
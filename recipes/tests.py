@@ -1,3 +1,1703 @@
-from django.test import TestCase
+"""
+Тесты приложения recipes.
+"""
 
-# Create your tests here.
+import csv
+import gzip
+import io
+import json
+import asyncio
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+from contextlib import asynccontextmanager, contextmanager
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (categories, categorydiff, conditional, dbconfig, export, filters, filterspec, metrics, featured, images,
+               keyset, pantry, records, routers, search, similar, similarity, sqlitetuning, tasks)
+from .forms import RecipeForm
+from .models import Category, Ingredient, Job, Recipe, RecipeCategory, RecipeIngredient, SimilarRecipe
+from .stemming import stem
+from . import textsearch
+from PIL import Image
+
+
+def make_recipe(author, title='Рецепт', **kwargs):
+    """
+    Создаёт рецепт с заполненными обязательными полями.
+    """
+    fields = {
+        'description': 'Описание',
+        'steps': 'Шаги',
+        'cooking_time': 15,
+        'ingredients': 'соль, перец',
+    }
+    fields.update(kwargs)
+    return Recipe.objects.create(title=title, author=author, **fields)
+
+
+@asynccontextmanager
+async def api_client():
+    """
+    HTTP-клиент FastAPI-сервиса на отдельной базе SQLite в памяти.
+
+    В базе есть автор с id=1 и категория «Супы» с id=1. Возвращает (клиент, движок).
+    """
+    import httpx
+    from sqlalchemy import insert, text
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import StaticPool
+
+    from recipes_api import database, main
+
+    engine = create_async_engine('sqlite+aiosqlite://', poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(database.Base.metadata.create_all)
+        await conn.execute(text(textsearch.CREATE_TABLE_SQL))
+        await conn.execute(insert(database.User).values(id=1, username='author'))
+        await conn.execute(insert(database.Category).values(id=1, name='Супы'))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_db():
+        async with sessions() as session:
+            yield session
+
+    main.app.dependency_overrides[database.get_db] = get_db
+    main.app.dependency_overrides[database.get_read_db] = get_db
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            yield client, engine
+    finally:
+        main.app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+async def api_create(client, title, **fields):
+    """
+    Создаёт рецепт через API и возвращает ответ.
+    """
+    fields = {
+        'title': title, 'description': 'Описание', 'steps': 'Шаги', 'cooking_time': 30,
+        'ingredients': 'свёкла, капуста, морковь', 'categories': [1], 'author_id': 1, **fields,
+    }
+    return await client.post('/recipes/', json=fields)
+
+
+class QueryBudgetMixin:
+    """
+    Проверка, что отрисовка страницы укладывается в фиксированное число запросов.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, limit):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = [query['sql'] for query in context.captured_queries]
+        self.assertLessEqual(
+            len(executed), limit,
+            f'{len(executed)} запросов при бюджете {limit}:\n' + '\n'.join(executed),
+        )
+
+
+class FeaturedRecipesTests(QueryBudgetMixin, TestCase):
+    """
+    Выбор случайных рецептов для главной страницы.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('author', password='secret')
+
+    def test_empty_catalogue(self):
+        self.assertEqual(featured.random_recipes(5), [])
+
+    def test_small_catalogue_returns_everything(self):
+        recipes = [make_recipe(self.author, f'Рецепт {n}') for n in range(3)]
+        picked = featured.random_recipes(5)
+        self.assertCountEqual([r.id for r in picked], [r.id for r in recipes])
+
+    def test_picks_distinct_existing_recipes_despite_gaps(self):
+        recipes = [make_recipe(self.author, f'Рецепт {n}') for n in range(40)]
+        # Пропуски в id: удаляем большую часть рецептов
+        Recipe.objects.filter(id__in=[r.id for r in recipes[5:35]]).delete()
+        existing = set(Recipe.objects.values_list('id', flat=True))
+        for _ in range(20):
+            picked = [r.id for r in featured.random_recipes(5)]
+            self.assertEqual(len(picked), 5)
+            self.assertEqual(len(set(picked)), 5)
+            self.assertTrue(set(picked) <= existing)
+
+    def test_sparse_catalogue_smaller_than_count(self):
+        recipes = [make_recipe(self.author, f'Рецепт {n}') for n in range(40)]
+        kept = [recipes[0], recipes[20], recipes[-1]]
+        Recipe.objects.exclude(id__in=[r.id for r in kept]).delete()
+        # Границы, выборка по кандидатам и не больше двух запросов на каждый недостающий рецепт
+        with self.assertMaxQueries(2 + 1 + 2 * 4):
+            picked = featured.random_recipes(5)
+        self.assertCountEqual([r.id for r in picked], [r.id for r in kept])
+
+    def test_bounds_refresh_on_create_and_delete(self):
+        self.assertEqual(featured.get_bounds(), (None, None))
+        first = make_recipe(self.author, 'Первый')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(featured.get_bounds(), (first.id, first.id))
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('COUNT', ''.join(query['sql'] for query in queries).upper())
+        second = make_recipe(self.author, 'Второй')
+        self.assertEqual(featured.get_bounds(), (first.id, second.id))
+        first.delete()
+        self.assertEqual(featured.get_bounds(), (second.id, second.id))
+
+    def test_index_query_count_does_not_grow(self):
+        for n in range(50):
+            make_recipe(self.author, f'Рецепт {n}')
+        featured.get_bounds()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('index'))
+        self.assertEqual(len(response.context['recipes']), 5)
+
+
+class RecipeListPaginationTests(TestCase):
+    """
+    Курсорная пагинация списка рецептов.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', password='secret')
+        titles = ['Борщ', 'Авокадо', 'Вареники', 'Блины', 'Гуляш', 'Драники', 'Ёжики']
+        self.recipes = [make_recipe(self.author, title) for title in titles]
+
+    def walk(self, **params):
+        """
+        Проходит все страницы вперёд и возвращает список страниц заголовков.
+        """
+        pages = []
+        response = self.client.get(reverse('recipe_list'), params)
+        while True:
+            pages.append([recipe.title for recipe in response.context['recipes']])
+            page = response.context['page']
+            if page.next_cursor is None:
+                return pages, response
+            response = self.client.get(reverse('recipe_list'), dict(params, cursor=page.next_cursor))
+
+    def test_pages_by_id(self):
+        pages, _ = self.walk(page_size=3)
+        self.assertEqual(pages, [['Борщ', 'Авокадо', 'Вареники'], ['Блины', 'Гуляш', 'Драники'], ['Ёжики']])
+
+    def test_pages_by_title_and_back(self):
+        pages, last = self.walk(page_size=3, order='title')
+        ordered = sorted(r.title for r in self.recipes)
+        self.assertEqual(sum(pages, []), ordered)
+        prev_cursor = last.context['page'].prev_cursor
+        response = self.client.get(reverse('recipe_list'),
+                                   {'page_size': 3, 'order': 'title', 'cursor': prev_cursor})
+        self.assertEqual([r.title for r in response.context['recipes']], pages[-2])
+        self.assertIsNotNone(response.context['page'].prev_cursor)
+
+    def test_invalid_cursor_starts_from_first_page(self):
+        response = self.client.get(reverse('recipe_list'), {'page_size': 3, 'cursor': 'мусор'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r.title for r in response.context['recipes']], ['Борщ', 'Авокадо', 'Вареники'])
+
+    def test_tampered_cursor_starts_from_first_page(self):
+        # Курсор корректно закодирован, но значения не подходят к полям сортировки
+        for ordering, values in (('id', ['abc']), ('title', ['Борщ', 'abc']), ('cooking_time', [None, 1]),
+                                 ('id', [True])):
+            cursor = keyset.encode_cursor(keyset.Cursor(ordering, values))
+            with self.assertRaises(keyset.InvalidCursor):
+                keyset.decode_cursor(cursor, ordering)
+            response = self.client.get(reverse('recipe_list'), {'page_size': 3, 'order': ordering, 'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.context['page'].prev_cursor)
+        cursor = keyset.encode_cursor(keyset.Cursor('title', ['Борщ', 5]))
+        self.assertEqual(keyset.decode_cursor(cursor, 'title').values, ('Борщ', 5))
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Число запросов при отрисовке страниц не зависит от объёма данных.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('author', password='secret')
+        self.categories = [Category.objects.create(name=f'Категория {n}') for n in range(10)]
+
+    def add_recipes(self, count):
+        for n in range(count):
+            recipe = make_recipe(self.author, f'Рецепт {n}')
+            recipe.categories.set(self.categories[:n % 10 + 1])
+
+    def test_recipe_detail(self):
+        self.add_recipes(10)
+        for recipe in Recipe.objects.all():
+            # Версия данных для ETag (рецепт и похожие), рецепт, его категории и похожие рецепты
+            with self.assertMaxQueries(5):
+                response = self.client.get(reverse('recipe_detail', args=[recipe.id]))
+            self.assertContains(response, self.author.username)
+
+    def test_recipe_detail_for_author(self):
+        self.add_recipes(10)
+        self.client.force_login(self.author)
+        recipe = Recipe.objects.last()
+        # Сессия и пользователь добавляют ровно два запроса
+        with self.assertMaxQueries(7):
+            response = self.client.get(reverse('recipe_detail', args=[recipe.id]))
+        self.assertContains(response, reverse('recipe_edit', args=[recipe.id]))
+
+    def test_recipe_list_and_index(self):
+        for count in (3, 30):
+            Recipe.objects.all().delete()
+            self.add_recipes(count)
+            with self.assertMaxQueries(2):
+                self.client.get(reverse('recipe_list'))
+            with self.assertMaxQueries(2):
+                self.client.get(reverse('recipe_list'), {'category': self.categories[0].id})
+            # Границы id (MIN и MAX по индексу) при пустом кэше и выборка рецептов
+            with self.assertMaxQueries(3):
+                self.client.get(reverse('index'))
+
+
+class SearchTests(TestCase):
+    """
+    Полнотекстовый поиск с учётом словоформ.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', password='secret')
+        self.soup = make_recipe(self.author, 'Грибной суп', ingredients='шампиньоны, картофель, лук')
+        self.chicken = make_recipe(self.author, 'Курица с грибами', description='Курица в сливочном соусе',
+                                   ingredients='куриное филе, грибы, сливки')
+        self.salad = make_recipe(self.author, 'Греческий салат', ingredients='огурцы, помидоры, сыр фета')
+
+    def titles(self, query, **kwargs):
+        return [recipe.title for recipe in search.search_recipes(query, **kwargs)]
+
+    def test_stemmer(self):
+        self.assertEqual({stem(word) for word in ('грибов', 'грибами', 'грибы', 'гриб')}, {'гриб'})
+        self.assertEqual(stem('помидоры'), stem('помидоров'))
+
+    def test_word_forms_and_ranking(self):
+        self.assertEqual(self.titles('грибы'), ['Курица с грибами'])
+        self.assertEqual(self.titles('помидор огурцов'), ['Греческий салат'])
+        self.assertEqual(self.titles('сливочный соус'), ['Курица с грибами'])
+        self.assertEqual(self.titles('ананас'), [])
+
+    def test_prefix_mode(self):
+        self.assertEqual(self.titles('гре'), [])
+        self.assertEqual(self.titles('гре', prefix=True), ['Греческий салат'])
+
+    def test_index_follows_save_and_delete(self):
+        self.salad.ingredients = 'огурцы, ананас'
+        self.salad.save()
+        self.assertEqual(self.titles('ананас'), ['Греческий салат'])
+        self.assertEqual(self.titles('помидоры'), [])
+        self.salad.delete()
+        self.assertEqual(self.titles('ананас'), [])
+
+    def test_recipe_list_search_box(self):
+        response = self.client.get(reverse('recipe_list'), {'q': 'курицу'})
+        self.assertEqual([r.title for r in response.context['recipes']], ['Курица с грибами'])
+        self.assertIsNone(response.context['page'])
+
+    def test_fallback_escapes_wildcards(self):
+        make_recipe(self.author, 'Хлеб 100% ржаной')
+        with mock.patch.object(search, 'is_enabled', return_value=False):
+            for query in ('%', '_'):
+                self.assertEqual(self.titles(query), ['Хлеб 100% ржаной'] if query == '%' else [], query)
+        asyncio.run(self.check_api_fallback())
+
+    async def check_api_fallback(self):
+        from sqlalchemy.ext.asyncio import AsyncSession
+
+        from recipes_api import search as api_search
+
+        async with api_client() as (client, engine):
+            for title in ('Борщ', 'Хлеб 100% ржаной'):
+                self.assertEqual((await api_create(client, title)).status_code, 200)
+            async with AsyncSession(engine) as db:
+                with mock.patch.object(api_search, 'is_enabled', return_value=False):
+                    self.assertEqual(len(await api_search.search_ids(db, '%')), 1)
+                    self.assertEqual(await api_search.search_ids(db, '_'), [])
+                    self.assertEqual(len(await api_search.search_ids(db, 'Борщ')), 1)
+
+
+class IngredientIndexTests(TestCase):
+    """
+    Нормализованные ингредиенты и подбор рецептов по продуктам.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', password='secret')
+        self.pancakes = make_recipe(self.author, 'Блины',
+                                    ingredients='200 г муки, 300 мл молока, 2 яйца, щепотка соли')
+        self.omelette = make_recipe(self.author, 'Омлет', ingredients='3 яйца, молоко, соль')
+        self.salad = make_recipe(self.author, 'Салат', ingredients='огурцы, помидоры, соль')
+
+    def test_parsing_on_save(self):
+        keys = set(self.pancakes.ingredient_links.values_list('ingredient__key', flat=True))
+        self.assertEqual(keys, {'мук', 'молок', 'яйц', 'сол'})
+        self.pancakes.refresh_from_db()
+        self.assertEqual(self.pancakes.ingredient_count, 4)
+        # Одинаковые продукты в разных формах — один ингредиент
+        self.assertEqual(Ingredient.objects.filter(key='яйц').count(), 1)
+
+    def test_only_changed_links_are_rewritten(self):
+        kept = RecipeIngredient.objects.get(recipe=self.omelette, ingredient__key='яйц')
+        self.omelette.ingredients = 'яйца, молоко, сыр'
+        self.omelette.save()
+        self.assertTrue(RecipeIngredient.objects.filter(pk=kept.pk).exists())
+        keys = set(self.omelette.ingredient_links.values_list('ingredient__key', flat=True))
+        self.assertEqual(keys, {'яйц', 'молок', 'сыр'})
+
+    def test_rarity_ranks_and_counts(self):
+        salt = Ingredient.objects.get(key='сол')
+        self.assertEqual(salt.recipe_count, 3)
+        # Соль есть во всех рецептах, поэтому в каждом она самая частая
+        for recipe in (self.pancakes, self.omelette, self.salad):
+            link = RecipeIngredient.objects.get(recipe=recipe, ingredient=salt)
+            self.assertEqual(link.rank, recipe.ingredient_count - 1)
+        self.salad.delete()
+        salt.refresh_from_db()
+        self.assertEqual(salt.recipe_count, 2)
+
+    def test_cookable(self):
+        self.assertEqual(pantry.cookable_ids(['яйцо', 'молоко', 'соль']), [self.omelette.id])
+        self.assertEqual(pantry.cookable_ids(['яйцо', 'молоко', 'соль', 'мука']),
+                         [self.pancakes.id, self.omelette.id])
+        self.assertEqual(pantry.cookable_ids(['яйцо', 'молоко', 'соль'], max_missing=1),
+                         [self.omelette.id, self.pancakes.id])
+        self.assertEqual(pantry.cookable_ids(['ананас']), [])
+
+
+class ExportTests(TestCase):
+    """
+    Потоковая выгрузка каталога в NDJSON и CSV.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', password='secret')
+        soups = Category.objects.create(name='Супы')
+        lunch = Category.objects.create(name='Обеды')
+        self.recipes = [make_recipe(self.author, f'Рецепт {n}') for n in range(5)]
+        self.recipes[0].categories.set([soups, lunch])
+
+    def test_ndjson_in_batches(self):
+        data = b''.join(export.stream(batch_size=2)).decode('utf-8')
+        rows = [json.loads(line) for line in data.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [recipe.id for recipe in self.recipes])
+        self.assertEqual(rows[0]['author'], {'id': self.author.id, 'username': 'author'})
+        self.assertEqual([c['name'] for c in rows[0]['categories']], ['Обеды', 'Супы'])
+        self.assertIsNone(rows[1]['image'])
+
+    def test_csv_gzip_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'recipes.csv.gz')
+            call_command('export_recipes', format='csv', gzip=True, output=path, batch_size=2, stderr=io.StringIO())
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                rows = list(csv.DictReader(file))
+        self.assertEqual(list(rows[0]), list(records.CSV_COLUMNS))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['categories'], 'Обеды;Супы')
+
+
+class ImportTests(TestCase):
+    """
+    Пакетная загрузка рецептов командой import_recipes.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', password='secret')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'recipes.jsonl')
+
+    def write(self, rows):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            for row in rows:
+                file.write(row if isinstance(row, str) else json.dumps(row, ensure_ascii=False))
+                file.write('\n')
+
+    def row(self, title, **kwargs):
+        row = {'title': title, 'description': 'Описание', 'steps': 'Шаги', 'cooking_time': 10,
+               'ingredients': 'сыр, помидоры', 'author': {'username': 'author'}, 'categories': []}
+        row.update(kwargs)
+        return row
+
+    def run_import(self, *args):
+        call_command('import_recipes', self.path, *args, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_import_with_errors_and_categories(self):
+        Category.objects.create(name='Салаты')
+        self.write([
+            self.row('Салат', categories=[{'name': 'Салаты'}, {'name': 'Закуски'}]),
+            'не json',
+            self.row('Без времени', cooking_time='долго'),
+            self.row('Чужой', author={'username': 'nobody'}),
+            self.row('Закуска', categories=['Закуски']),
+        ])
+        self.run_import('--batch-size', '2')
+        self.assertEqual(sorted(Recipe.objects.values_list('title', flat=True)), ['Закуска', 'Салат'])
+        salad = Recipe.objects.get(title='Салат')
+        self.assertEqual(sorted(salad.categories.values_list('name', flat=True)), ['Закуски', 'Салаты'])
+        self.assertEqual(Category.objects.count(), 2)
+        # bulk_create обходит сигналы, индексы обновляются явно
+        self.assertCountEqual([r.title for r in search.search_recipes('помидоры')], ['Салат', 'Закуска'])
+        self.assertEqual(salad.ingredient_links.count(), 2)
+        # и счётчики рецептов в категориях
+        self.assertEqual(dict(Category.objects.values_list('name', 'recipe_count')), {'Салаты': 1, 'Закуски': 2})
+        self.assertEqual(categories.reconcile(dry_run=True), [])
+        # Похожие для каждой пачки пересчитает очередь
+        jobs = Job.objects.filter(name='update_similar').order_by('id')
+        self.assertEqual(sorted(pk for job in jobs for pk in job.payload['recipe_ids']),
+                         sorted(Recipe.objects.values_list('id', flat=True)))
+        pending = jobs.count()
+        self.assertEqual(tasks.run_pending(), (pending, 0))
+
+    def test_resume_from_state(self):
+        self.write([self.row(f'Рецепт {n}') for n in range(5)])
+        self.run_import('--batch-size', '2')
+        self.assertEqual(Recipe.objects.count(), 5)
+        # Повторный запуск продолжает с сохранённой позиции и ничего не дублирует
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(self.row('Рецепт 5'), ensure_ascii=False) + '\n')
+        self.run_import()
+        self.assertEqual(Recipe.objects.count(), 6)
+        self.run_import('--restart', '--author', 'author')
+        self.assertEqual(Recipe.objects.count(), 12)
+
+
+class PageCacheTests(QueryBudgetMixin, TestCase):
+    """
+    Кэш фрагментов страниц и его сброс при изменениях.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('author', password='secret')
+        self.soups = Category.objects.create(name='Супы')
+        self.recipe = make_recipe(self.author, 'Борщ')
+        self.recipe.categories.set([self.soups])
+
+    def test_cached_detail_needs_no_queries(self):
+        url = reverse('recipe_detail', args=[self.recipe.id])
+        self.client.get(url)
+        with self.assertMaxQueries(2):  # Только версия данных: время изменения рецепта и похожих
+            response = self.client.get(url)
+        self.assertContains(response, 'Борщ')
+        self.assertEqual(self.client.get(reverse('recipe_detail', args=[self.recipe.id + 100])).status_code, 404)
+
+    def test_fragment_evicted_after_check(self):
+        # Фрагмент есть при проверке, но вытеснен к моменту отрисовки
+        with mock.patch.object(cache, 'has_key', return_value=True):
+            for url in (reverse('index'), reverse('recipe_list'), reverse('recipe_detail', args=[self.recipe.id])):
+                self.assertContains(self.client.get(url), 'Борщ', msg_prefix=url)
+
+    def test_edit_is_visible_immediately(self):
+        url = reverse('recipe_detail', args=[self.recipe.id])
+        self.client.get(url)
+        self.client.get(reverse('recipe_list'))
+        salads = Category.objects.create(name='Салаты')
+
+        author = self.client_class()
+        author.force_login(self.author)
+        response = author.post(reverse('recipe_edit', args=[self.recipe.id]), {
+            'title': 'Холодный борщ', 'description': 'Описание', 'steps': 'Шаги', 'cooking_time': 20,
+            'ingredients': 'свёкла, кефир', 'categories': [salads.id],
+        })
+        self.assertEqual(response.status_code, 302)
+        response = self.client.get(url)
+        self.assertContains(response, 'Холодный борщ')
+        self.assertContains(response, 'Салаты')
+        self.assertContains(self.client.get(reverse('recipe_list')), 'Холодный борщ')
+
+    def test_category_rename_and_auth_state(self):
+        url = reverse('recipe_detail', args=[self.recipe.id])
+        self.client.get(url)
+        self.soups.name = 'Первые блюда'
+        self.soups.save()
+        self.assertContains(self.client.get(url), 'Первые блюда')
+        # Автор видит кнопку редактирования, аноним — нет, хотя страница одна
+        edit_url = reverse('recipe_edit', args=[self.recipe.id])
+        self.assertNotContains(self.client.get(url), edit_url)
+        self.client.force_login(self.author)
+        self.assertContains(self.client.get(url), edit_url)
+
+
+class ImageVariantTests(TestCase):
+    """
+    Уменьшенные копии изображений и srcset в шаблонах.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings = override_settings(MEDIA_ROOT=self.media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.author = User.objects.create_user('author', password='secret')
+
+    def upload(self, width, height):
+        data = io.BytesIO()
+        Image.new('RGB', (width, height), 'orange').save(data, 'JPEG')
+        return SimpleUploadedFile('dish.jpg', data.getvalue(), content_type='image/jpeg')
+
+    def test_upload_builds_variants_and_srcset(self):
+        category = Category.objects.create(name='Выпечка')
+        self.client.force_login(self.author)
+        response = self.client.post(reverse('recipe_create'), {
+            'title': 'Блины', 'description': 'Описание', 'steps': 'Шаги', 'cooking_time': 30,
+            'ingredients': 'мука, молоко', 'categories': [category.id], 'image': self.upload(800, 400),
+        })
+        recipe = Recipe.objects.get(title='Блины')
+        self.assertRedirects(response, reverse('recipe_detail', args=[recipe.id]))
+
+        # Копии строит фоновая задача, а не запрос
+        path = recipe.image.path
+        self.assertFalse(os.path.exists(images.variant_name(path, 320, 'webp')))
+        # Вместе с пересчётом похожих рецептов после сохранения рецепта и его категорий
+        self.assertEqual(tasks.run_pending(), (3, 0))
+        with Image.open(images.variant_name(path, 320, 'webp')) as variant:
+            self.assertEqual((variant.format, variant.size), ('WEBP', (320, 160)))
+        self.assertTrue(os.path.exists(images.variant_name(path, 640, 'jpg')))
+        # Копии шире оригинала не создаются
+        self.assertFalse(os.path.exists(images.variant_name(path, 960, 'jpg')))
+        self.assertEqual(images.build_variants(path), 0)
+
+        response = self.client.get(reverse('recipe_detail', args=[recipe.id]))
+        webp_url = recipe.image.storage.url(images.variant_name(recipe.image.name, 640, 'webp'))
+        self.assertContains(response, '<source type="image/webp"')
+        self.assertContains(response, f'{webp_url} 640w')
+        self.assertNotContains(response, '960w')
+
+    def test_backfill_command(self):
+        recipe = make_recipe(self.author, 'Оладьи')
+        recipe.image.save('old.jpg', self.upload(1000, 500))
+        out = io.StringIO()
+        call_command('build_thumbnails', workers=1, stdout=out)
+        self.assertIn(f'создано копий: {len(images.WIDTHS) * len(images.FORMATS)}', out.getvalue())
+        self.assertTrue(os.path.exists(images.variant_name(recipe.image.path, 960, 'webp')))
+        # Карточка в списке ссылается на уменьшенные копии
+        self.assertContains(self.client.get(reverse('recipe_list')), 'srcset=')
+
+
+class TaskQueueTests(TestCase):
+    """
+    Очередь фоновых задач: выполнение, повтор с задержкой и исчерпание попыток.
+    """
+
+    def setUp(self):
+        self.calls = []
+
+        def flaky_task(fail):
+            self.calls.append(fail)
+            if fail:
+                raise RuntimeError('сбой')
+
+        tasks.task(flaky_task)
+
+    def test_success_removes_job(self):
+        job = tasks.enqueue('flaky_task', fail=False)
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(tasks.run_pending(), (1, 0))
+        self.assertEqual(self.calls, [False])
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(TASKS_MAX_ATTEMPTS=2, TASKS_RETRY_DELAY=10)
+    def test_retry_with_backoff_then_failed(self):
+        job = tasks.enqueue('flaky_task', fail=True)
+        self.assertEqual(tasks.run_pending(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+        self.assertIn('сбой', job.last_error)
+        # До истечения задержки задача не берётся
+        self.assertEqual(tasks.run_pending(), (0, 0))
+
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(tasks.run_pending(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(tasks.run_pending(), (0, 0))
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_runs_inline(self):
+        self.assertIsNone(tasks.enqueue('flaky_task', fail=False))
+        self.assertEqual(self.calls, [False])
+        self.assertFalse(Job.objects.exists())
+
+
+class ConditionalRequestTests(QueryBudgetMixin, TestCase):
+    """
+    ETag страниц и ответ 304, время изменения рецептов.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('author', password='secret')
+        self.soups = Category.objects.create(name='Супы')
+        self.recipe = make_recipe(self.author, 'Борщ')
+        self.recipe.categories.set([self.soups])
+
+    def test_detail_not_modified_until_changed(self):
+        url = reverse('recipe_detail', args=[self.recipe.id])
+        etag = self.client.get(url)['ETag']
+        with self.assertMaxQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # ETag не зависит от версий в кэше: другой процесс, перезапуск или вытеснение
+        cache.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Запись в обход сигналов (API, другой процесс) тоже меняет ETag и страницу
+        Recipe.objects.filter(id=self.recipe.id).update(title='Новое название', updated_at=timezone.now())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Новое название')
+        etag = response['ETag']
+
+        self.soups.name = 'Первые блюда'
+        self.soups.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        # Вошедший пользователь видит другую страницу (кнопки автора)
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_list_etag_depends_on_params(self):
+        url = reverse('recipe_list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, {'category': self.soups.id}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        make_recipe(self.author, 'Щи')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        Recipe.objects.filter(id=self.recipe.id).update(title='Новое название', updated_at=timezone.now())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertContains(response, 'Новое название')
+        # Удаление в обход сигналов тоже меняет состав страницы
+        shchi = Recipe.objects.get(title='Щи')
+        for model in (RecipeIngredient, RecipeCategory, SimilarRecipe):
+            model.objects.filter(recipe=shchi)._raw_delete(connection.alias)
+        Recipe.objects.filter(id=shchi.id)._raw_delete(connection.alias)
+        self.assertNotContains(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']), 'Щи', status_code=200)
+
+    def test_api_list_etag_from_rows(self):
+        asyncio.run(self.check_api_list())
+
+    async def check_api_list(self):
+        from sqlalchemy import update
+
+        from recipes_api import database
+
+        async with api_client() as (client, engine):
+            recipe = (await api_create(client, 'Борщ')).json()
+            for path in ('/recipes/', '/recipes/category/1'):
+                response = await client.get(path)
+                self.assertNotIn('last-modified', response.headers)
+                etag = response.headers['etag']
+                self.assertEqual((await client.get(path, headers={'If-None-Match': etag})).status_code, 304)
+                async with engine.begin() as conn:
+                    await conn.execute(update(database.Recipe).where(database.Recipe.id == recipe['id'])
+                                       .values(title=f'Борщ {path}', updated_at=timezone.now()))
+                response = await client.get(path, headers={'If-None-Match': etag})
+                self.assertEqual(response.status_code, 200, path)
+
+    def test_category_changes_touch_updated_at(self):
+        stamp = Recipe.objects.get(id=self.recipe.id).updated_at
+        salads = Category.objects.create(name='Салаты')
+        self.recipe.categories.add(salads)
+        touched = Recipe.objects.get(id=self.recipe.id).updated_at
+        self.assertGreater(touched, stamp)
+        salads.name = 'Холодные блюда'
+        salads.save()
+        self.assertGreater(Recipe.objects.get(id=self.recipe.id).updated_at, touched)
+
+    def test_validators(self):
+        stamp = self.recipe.updated_at
+        etag = conditional.make_etag('recipe', 1, stamp.isoformat())
+        self.assertTrue(conditional.not_modified(f'"x", {etag.removeprefix("W/")}', None, etag))
+        self.assertFalse(conditional.not_modified('W/"x"', conditional.http_date(stamp), etag, stamp))
+        self.assertTrue(conditional.not_modified(None, conditional.http_date(stamp), etag, stamp))
+        self.assertFalse(conditional.not_modified(None, conditional.http_date(stamp - timedelta(seconds=1)), etag, stamp))
+        self.assertFalse(conditional.not_modified(None, 'не дата', etag, stamp))
+
+
+# Строка плана «SCAN таблица» без индекса — полный просмотр таблицы
+FULL_SCAN = re.compile(r'SCAN (\w+)(?: AS \w+)?')
+# Справочники, которые читаются целиком намеренно: категории для фильтра, словарь ингредиентов для LIKE
+FULL_SCAN_ALLOWED = {'recipes_category', 'recipes_ingredient'}
+# Большие таблицы: любой SCAN, в том числе по индексу (USING [COVERING] INDEX), — ошибка
+NO_SCAN_TABLES = re.compile(r'SCAN (recipes_recipe|recipes_recipecategory)\b')
+# Запросы, которым SCAN больших таблиц разрешён явно: (шаблон SQL, причина)
+SCAN_WHITELIST = [
+    (re.compile(r'FROM "?recipes_recipe"?\s+ORDER BY [^()]*\s+LIMIT', re.S),
+     'первая страница списка без фильтров: обход индекса сортировки останавливается на LIMIT'),
+]
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN QUERY PLAN для частых запросов страниц Django и маршрутов FastAPI:
+    ни один не должен просматривать таблицу рецептов или связей целиком.
+
+    Запросы API выполняются на временной базе в памяти, а их планы
+    проверяются на схеме тестовой базы, созданной миграциями Django.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('author', password='secret')
+        self.soups = Category.objects.create(name='Супы')
+        for title, ingredients in [('Борщ', 'свёкла, капуста, морковь'), ('Щи', 'капуста, картофель, морковь')]:
+            make_recipe(self.author, title, ingredients=ingredients).categories.set([self.soups])
+
+    def assertNoFullScans(self, queries, raw=False):
+        self.assertTrue(queries)
+        for sql, params in queries:
+            if raw:
+                rows = connection.connection.execute(f'EXPLAIN QUERY PLAN {sql}', params or ()).fetchall()
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params or ())
+                    rows = cursor.fetchall()
+            details = [row[3] for row in rows]
+            # Сортировка во временном B-дереве значит, что обход не остановится на LIMIT
+            if any(pattern.search(sql) for pattern, _ in SCAN_WHITELIST) \
+                    and not any(detail.startswith('USE TEMP B-TREE') for detail in details):
+                continue
+            scans = [detail for detail in details if NO_SCAN_TABLES.match(detail) or (
+                (match := FULL_SCAN.fullmatch(detail)) and match.group(1) not in FULL_SCAN_ALLOWED)]
+            self.assertFalse(scans, f'Просмотр {scans} в запросе:\n{sql}')
+
+    def capture(self, *calls):
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            for call in calls:
+                call()
+        return queries
+
+    def test_django_pages(self):
+        def get(url, params=None):
+            return lambda: self.assertEqual(self.client.get(url, params).status_code, 200)
+
+        recipe = Recipe.objects.get(title='Борщ')
+        next_page = self.client.get(reverse('recipe_list'), {'page_size': 1}).context['next_url']
+        cache.clear()
+        queries = self.capture(
+            get(reverse('index')),
+            get(reverse('recipe_detail', args=[recipe.id])),
+            get(reverse('recipe_list')),
+            get(reverse('recipe_list'), {'category': self.soups.id}),
+            get(reverse('recipe_list'), {'order': 'title', 'page_size': 1}),
+            get(reverse('recipe_list') + next_page),
+            get(reverse('recipe_list'), {'q': 'борщ', 'category': self.soups.id}),
+            get(reverse('recipe_list'), {'category_all': self.soups.id, 'ingredient': 'капуста', 'exclude': 'свёкла'}),
+            get(reverse('recipe_list'), {'time_min': 10, 'time_max': 40, 'order': 'cooking_time'}),
+            get(reverse('recipe_list'), {'author': self.author.id, 'category': self.soups.id}),
+            lambda: pantry.cookable_ids(['свёкла', 'капуста', 'морковь'], max_missing=1),
+        )
+        self.assertNoFullScans(queries)
+
+    def test_api_routes(self):
+        queries = asyncio.run(self.capture_api())
+        self.assertNoFullScans(queries, raw=True)
+
+    async def capture_api(self):
+        from sqlalchemy import event
+
+        queries = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                queries.append((statement, parameters))
+
+        async with api_client() as (client, engine):
+            event.listen(engine.sync_engine, 'before_cursor_execute', record)
+            for title in ('Борщ', 'Щи'):
+                self.assertEqual((await api_create(client, title)).status_code, 200)
+            queries.clear()
+            first = (await client.get('/recipes/', params={'limit': 1, 'order': 'title'})).json()
+            for path, params in [
+                ('/recipes/', {'cursor': first['next_cursor'], 'order': 'title'}),
+                ('/recipes/', {}),
+                ('/recipes/Борщ', {}),
+                ('/recipes/batch', {'ids': '2,1'}),
+                ('/recipes/category/1', {}),
+                ('/recipes/author/1', {}),
+                ('/recipes/ingredient/капуста', {}),
+                ('/recipes/cookable', {'ingredients': 'свёкла,капуста,морковь', 'max_missing': 1}),
+                ('/search', {'q': 'борщ', 'category_id': 1}),
+                ('/categories', {}),
+                ('/recipes/', {'category': '1', 'ingredient': 'капуста', 'exclude': 'свёкла', 'order': 'cooking_time'}),
+                ('/recipes/', {'category_all': '1', 'author': '1', 'time_max': '40'}),
+            ]:
+                self.assertEqual((await client.get(path, params=params)).status_code, 200, path)
+        return queries
+
+
+class ReadOnlyRoutingTests(TransactionTestCase):
+    """
+    Чтение в GET-запросах через соединение только для чтения, запись — через default.
+    """
+    databases = {'default', 'readonly'}
+
+    def test_get_reads_from_readonly_alias(self):
+        author = User.objects.create_user('author', password='secret')
+        recipe = make_recipe(author, 'Борщ')
+        with CaptureQueriesContext(connections['readonly']) as reads, \
+                CaptureQueriesContext(connection) as writes:
+            self.assertContains(self.client.get(reverse('recipe_detail', args=[recipe.id])), 'Борщ')
+        self.assertTrue(reads.captured_queries)
+        self.assertFalse(writes.captured_queries)
+
+        # POST-запрос читает и пишет через default
+        self.client.force_login(author)
+        with CaptureQueriesContext(connections['readonly']) as reads:
+            self.client.post(reverse('category_create'), {'name': 'Супы'})
+        self.assertFalse(reads.captured_queries)
+        self.assertTrue(Category.objects.filter(name='Супы').exists())
+
+    def test_readonly_connection_rejects_writes(self):
+        with self.assertRaises(DatabaseError):
+            Category.objects.using('readonly').create(name='Супы')
+
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Главная, список и страница рецепта читают из реплики; после POST — из основной базы.
+    """
+    databases = {'default', 'readonly'}
+
+    @contextmanager
+    def sqlite_replica(self):
+        """
+        Реплика — снимок тестовой базы в отдельном файле SQLite, отстающий от неё.
+        """
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'replica.sqlite3')
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+        alias = f'{dbconfig.REPLICA_PREFIX}test'
+        configured = connections.configure_settings({
+            DEFAULT_DB_ALIAS: {}, alias: dbconfig.django_database(f'sqlite:///{path}', read_only=True)})
+        try:
+            # Псевдоним добавлен после настройки теста — разрешаем его явно
+            with mock.patch.dict(connections.settings, {alias: configured[alias]}), \
+                    mock.patch.object(type(self), 'databases', self.databases | {alias}):
+                yield alias
+                connections[alias].close()
+                del connections[alias]
+        finally:
+            shutil.rmtree(directory)
+
+    def test_replica_and_stickiness(self):
+        author = User.objects.create_user('author', password='secret')
+        borscht = make_recipe(author, 'Борщ')
+        with self.sqlite_replica() as replica:
+            shchi = make_recipe(author, 'Щи')  # Ещё не дошёл до реплики
+            with CaptureQueriesContext(connections[replica]) as reads, \
+                    CaptureQueriesContext(connections['readonly']) as primary_reads:
+                self.assertContains(self.client.get(reverse('recipe_detail', args=[borscht.id])), 'Борщ')
+                self.assertEqual(self.client.get(reverse('recipe_list')).status_code, 200)
+            self.assertTrue(reads.captured_queries)
+            self.assertFalse(primary_reads.captured_queries)
+            self.assertEqual(self.client.get(reverse('recipe_detail', args=[shchi.id])).status_code, 404)
+
+            # После POST свои изменения видны сразу: чтение из основной базы
+            self.client.force_login(author)
+            response = self.client.post(reverse('category_create'), {'name': 'Супы'})
+            self.assertIn(routers.STICKY_COOKIE, response.cookies)
+            self.assertContains(self.client.get(reverse('recipe_detail', args=[shchi.id])), 'Щи')
+
+            self.client.cookies[routers.STICKY_COOKIE] = '0'
+            cache.clear()
+            self.assertEqual(self.client.get(reverse('recipe_detail', args=[shchi.id])).status_code, 404)
+
+    def test_replicas_are_read_only(self):
+        router = routers.ReadOnlyRouter()
+        self.assertFalse(router.allow_migrate(f'{dbconfig.REPLICA_PREFIX}1', 'recipes'))
+        self.assertEqual(list(dbconfig.django_replicas(['sqlite:////tmp/replica.sqlite3'])), ['replica_1'])
+        with self.sqlite_replica() as replica:
+            self.assertEqual(routers.replica_aliases(), [replica])
+            with self.assertRaises(DatabaseError):
+                Category.objects.using(replica).create(name='Супы')
+
+class ApiSchemaTests(TestCase):
+    """
+    Модели SQLAlchemy сервиса соответствуют миграциям Django.
+    """
+
+    def test_mirror_matches_migrations(self):
+        out = io.StringIO()
+        call_command('check_api_schema', stdout=out)
+        self.assertIn('соответствуют', out.getvalue())
+
+    def test_mismatches_are_reported(self):
+        from sqlalchemy import Column, Index, Integer, MetaData, String, Table
+        from recipes.management.commands.check_api_schema import compare, migrated_models
+
+        metadata = MetaData()
+        Table('recipes_category', metadata, Column('id', Integer, primary_key=True), Column('name', String(50)),
+              Column('color', String(7)), Index('recipes_category_name', 'name'))
+        Table('recipes_menu', metadata, Column('id', Integer, primary_key=True))
+        Table('recipes_recipe', metadata, Column('id', Integer, primary_key=True), Column('title', Integer))
+        problems = '\n'.join(compare(metadata, migrated_models()))
+        self.assertIn('recipes_category.name: длина 50', problems)
+        self.assertIn('recipes_category.color: столбца нет', problems)
+        self.assertIn('индекс recipes_category_name', problems)
+        self.assertIn('recipes_menu: таблицы нет', problems)
+        self.assertIn('recipes_recipe.title: Integer не соответствует CharField', problems)
+        self.assertIn('recipes_recipe.author_id: обязательный столбец', problems)
+
+    def test_postgres_url_shares_timeouts(self):
+        from recipes import dbconfig
+
+        database = dbconfig.django_database('postgresql://user:secret@db:5433/recipes', read_only=True)
+        self.assertEqual(database['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((database['NAME'], database['HOST'], database['PORT']), ('recipes', 'db', '5433'))
+        self.assertIn(f'statement_timeout={dbconfig.STATEMENT_TIMEOUT}', database['OPTIONS']['options'])
+        self.assertIn('default_transaction_read_only=on', database['OPTIONS']['options'])
+
+
+class ApiDatabaseTests(TestCase):
+    """
+    Маршруты FastAPI через настоящие сессии get_db / get_read_db и движки create_api_engine
+    (с PRAGMA из sqlitetuning), без подмены зависимостей.
+    """
+
+    def test_sessions_and_engines(self):
+        asyncio.run(self.check_sessions())
+
+    async def check_sessions(self):
+        import httpx
+        from sqlalchemy import insert, text
+        from sqlalchemy.exc import OperationalError
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        from recipes_api import database, main
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with mock.patch.object(database, 'SQLALCHEMY_DATABASE_URL', f'sqlite:///{directory}/api.sqlite3'):
+            engine, read_engine = database.create_api_engine(), database.create_api_engine(read_only=True)
+        sessions = {
+            'AsyncSessionLocal': async_sessionmaker(engine, autoflush=False, expire_on_commit=False),
+            'ReadSessionLocal': async_sessionmaker(read_engine, autoflush=False, expire_on_commit=False),
+        }
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(database.Base.metadata.create_all)
+                await conn.execute(text(textsearch.CREATE_TABLE_SQL))
+                await conn.execute(insert(database.User).values(id=1, username='author'))
+                await conn.execute(insert(database.Category).values(id=1, name='Супы'))
+            with mock.patch.multiple(database, **sessions):
+                transport = httpx.ASGITransport(app=main.app)
+                async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                    self.assertEqual((await api_create(client, 'Борщ')).status_code, 200)
+                    response = await client.get('/recipes/Борщ')
+                    self.assertEqual(response.json()['categories'], [{'id': 1, 'name': 'Супы'}])
+
+                async with read_engine.connect() as conn:
+                    self.assertEqual(await conn.scalar(text('PRAGMA query_only')), 1)
+                    # Подключение не переключает режим журнала файла: это делает sqlite_journal_mode
+                    self.assertEqual((await conn.scalar(text('PRAGMA journal_mode'))).lower(), 'delete')
+                # Сессия только для чтения (get_read_db) не может ничего записать
+                reader = database.get_read_db()
+                db = await anext(reader)
+                db.add(database.Category(name='Салаты'))
+                with self.assertRaises(OperationalError):
+                    await db.commit()
+                await reader.aclose()
+        finally:
+            await engine.dispose()
+            await read_engine.dispose()
+
+
+class JournalModeTests(TestCase):
+    """
+    Режим журнала SQLite задаётся один раз командой, а не при подключении.
+    """
+
+    def test_journal_mode(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = f'{directory}/db.sqlite3'
+        connection = sqlite3.connect(path)
+        self.addCleanup(connection.close)
+        sqlitetuning.apply(connection)
+        self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+        self.assertEqual(sqlitetuning.set_journal_mode(connection), 'wal')
+        self.assertEqual(sqlite3.connect(path).execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        # Тестовая база в памяти не может работать в WAL
+        with self.assertRaisesMessage(CommandError, 'memory'):
+            call_command('sqlite_journal_mode', stdout=io.StringIO())
+
+
+class BulkApiTests(TestCase):
+    """
+    Массовые POST/PUT /recipes/bulk: проверка по элементам и запись пакетами целиком.
+    """
+
+    @staticmethod
+    def item(title, **fields):
+        return {'title': title, 'description': 'Описание', 'steps': 'Шаги', 'cooking_time': 30,
+                'ingredients': 'свёкла', 'categories': [1], 'author_id': 1, **fields}
+
+    @staticmethod
+    async def titles(engine):
+        from sqlalchemy import select
+
+        from recipes_api import database
+
+        async with engine.connect() as conn:
+            return sorted(await conn.scalars(select(database.Recipe.title)))
+
+    def test_create(self):
+        asyncio.run(self.check_create())
+
+    async def check_create(self):
+        from recipes_api import bulk
+
+        async with api_client() as (client, engine):
+            # JSON-массив пакетами по 2: первый пакет записан, во втором ошибка откатывает оба элемента
+            response = await client.post('/recipes/bulk', params={'batch_size': 2}, json=[
+                self.item('Борщ'), self.item('Щи'),
+                self.item('Окрошка'), self.item('Солянка', cooking_time='долго', categories=[1, 99]),
+            ])
+            report = response.json()
+            self.assertEqual((report['succeeded'], report['failed']), (2, 2))
+            self.assertEqual([result['index'] for result in report['results']], [0, 1, 2, 3])
+            self.assertIn('id', report['results'][0])
+            self.assertEqual(report['results'][2]['errors'], [bulk.BATCH_REJECTED])
+            self.assertEqual(len(report['results'][3]['errors']), 1)
+            self.assertTrue(report['results'][3]['errors'][0].startswith('cooking_time:'))
+            self.assertEqual(await self.titles(engine), ['Борщ', 'Щи'])
+
+            # NDJSON потоком: некорректная строка и несуществующая категория — в одном пакете с верными
+            lines = [json.dumps(self.item('Окрошка'), ensure_ascii=False), '{не json',
+                     json.dumps(self.item('Солянка', categories=[99]), ensure_ascii=False)]
+            response = await client.post('/recipes/bulk', content='\n'.join(lines).encode(),
+                                         headers={'Content-Type': 'application/x-ndjson'})
+            results = response.json()['results']
+            self.assertEqual(results[0]['errors'], [bulk.BATCH_REJECTED])
+            self.assertTrue(results[1]['errors'][0].startswith('Некорректный JSON'))
+            self.assertEqual(results[2]['errors'], ['Категории не найдены: [99]'])
+            self.assertEqual(await self.titles(engine), ['Борщ', 'Щи'])
+
+            # Упавшая запись откатывает весь пакет, вместе с уже вставленными рецептами
+            from sqlalchemy.exc import OperationalError
+
+            with mock.patch.object(bulk.search, 'index_recipes', side_effect=OperationalError('', {}, None)):
+                response = await client.post('/recipes/bulk', json=[self.item('Окрошка'), self.item('Солянка')])
+            self.assertEqual(response.json()['failed'], 2)
+            self.assertEqual(response.json()['results'][0]['errors'], ['Ошибка записи пакета: OperationalError'])
+            self.assertEqual(await self.titles(engine), ['Борщ', 'Щи'])
+
+            response = await client.post('/recipes/bulk', json={'title': 'Борщ'})
+            self.assertEqual(response.status_code, 400)
+
+    def test_update(self):
+        asyncio.run(self.check_update())
+
+    async def check_update(self):
+        async with api_client() as (client, engine):
+            first, second = [(await api_create(client, title)).json()['id'] for title in ('Борщ', 'Щи')]
+            response = await client.put('/recipes/bulk', json=[
+                {'id': first, 'description': 'Новое'}, {'id': first, 'description': 'Ещё новее'},
+                {'id': 999, 'description': 'Нет такого'},
+            ])
+            results = response.json()['results']
+            self.assertEqual(results[1]['errors'], [f'Рецепт {first} повторяется в пакете'])
+            self.assertEqual(results[2]['errors'], ['Рецепт не найден: 999'])
+            self.assertEqual((await client.get('/recipes/Борщ')).json()['description'], 'Описание')
+
+            response = await client.put('/recipes/bulk', json=[
+                {'id': first, 'description': 'Новое'}, {'id': second, 'categories': []},
+            ])
+            self.assertEqual(response.json()['succeeded'], 2)
+            self.assertEqual((await client.get('/recipes/Борщ')).json()['description'], 'Новое')
+            self.assertEqual((await client.get('/recipes/Щи')).json()['categories'], [])
+
+            # Пакетами по одному: известный рецепт записан, неизвестные id и категории — в отчёте
+            response = await client.put('/recipes/bulk', params={'batch_size': 1}, json=[
+                {'id': 998, 'description': 'Нет такого'}, {'id': second, 'description': 'Новые щи'},
+                {'id': first, 'categories': [1, 99]},
+            ])
+            report = response.json()
+            self.assertEqual((report['succeeded'], report['failed']), (1, 2))
+            self.assertEqual(report['results'][0], {'index': 0, 'errors': ['Рецепт не найден: 998']})
+            self.assertEqual(report['results'][1], {'index': 1, 'id': second})
+            self.assertEqual(report['results'][2]['errors'], ['Категории не найдены: [99]'])
+            self.assertEqual((await client.get('/recipes/Щи')).json()['description'], 'Новые щи')
+            self.assertEqual((await client.get('/recipes/Борщ')).json()['categories'], [{'id': 1, 'name': 'Супы'}])
+
+    def test_authors(self):
+        asyncio.run(self.check_authors())
+
+    async def check_authors(self):
+        async with api_client() as (client, engine):
+            item = self.item('Щи')
+            del item['author_id']
+            response = await client.post('/recipes/bulk', json=[
+                self.item('Борщ', author_id=999), self.item('Окрошка', author_id='автор'), item,
+            ])
+            errors = [result['errors'] for result in response.json()['results']]
+            self.assertEqual(errors[0], ['Автор не найден: 999'])
+            self.assertTrue(errors[1][0].startswith('author_id:'))
+            self.assertTrue(errors[2][0].startswith('author_id:'))
+            self.assertEqual(await self.titles(engine), [])
+
+    def test_oversized(self):
+        asyncio.run(self.check_oversized())
+
+    async def check_oversized(self):
+        from recipes_api import bulk
+
+        async with api_client() as (client, engine):
+            for batch_size in (0, bulk.MAX_BATCH_SIZE + 1):
+                response = await client.post('/recipes/bulk', params={'batch_size': batch_size},
+                                             json=[self.item('Борщ')])
+                self.assertEqual(response.status_code, 422, batch_size)
+                response = await client.put('/recipes/bulk', params={'batch_size': batch_size}, json=[])
+                self.assertEqual(response.status_code, 422, batch_size)
+
+            body = json.dumps([self.item('Борщ'), self.item('Щи')], ensure_ascii=False).encode()
+            line = json.dumps(self.item('Окрошка'), ensure_ascii=False).encode()
+
+            async def stream():
+                # Без Content-Length размер проверяется при чтении
+                for _ in range(3):
+                    yield line + b'\n'
+
+            with mock.patch.object(bulk, 'MAX_BODY_BYTES', len(line) + 1):
+                response = await client.post('/recipes/bulk', content=body)
+                self.assertEqual(response.status_code, 413)
+                response = await client.post('/recipes/bulk', content=stream(),
+                                             headers={'Content-Type': 'application/x-ndjson'})
+                self.assertEqual(response.status_code, 413)
+            self.assertEqual(await self.titles(engine), [])
+
+
+class ApiSerializationTests(TestCase):
+    """
+    Модели ответов FastAPI-сервиса: краткие записи в списках, полные — для одного рецепта.
+    """
+
+    def test_responses(self):
+        asyncio.run(self.check_responses())
+
+    async def check_responses(self):
+        from recipes_api.serialization import SUMMARY_FIELDS
+
+        async with api_client() as (client, engine):
+            created = await api_create(client, 'Борщ')
+            self.assertEqual(created.headers['content-type'], 'application/json')
+            detail = created.json()
+            self.assertEqual(detail['author'], {'id': 1, 'username': 'author'})
+            self.assertEqual(detail['categories'], [{'id': 1, 'name': 'Супы'}])
+            self.assertEqual(detail['ingredient_count'], 3)
+            await api_create(client, 'Щи')
+
+            page = (await client.get('/recipes/', params={'limit': 1})).json()
+            self.assertEqual(list(page['results'][0]), list(SUMMARY_FIELDS))
+            self.assertEqual(page['results'][0]['title'], 'Борщ')
+
+            # fields сужает ответ; курсор работает, даже если ключа сортировки нет в полях
+            response = await client.get('/recipes/', params={'limit': 1, 'order': 'title', 'fields': 'cooking_time'})
+            self.assertEqual(response.json()['results'], [{'cooking_time': 30}])
+            response = await client.get('/recipes/', params={'order': 'title', 'fields': 'title',
+                                                             'cursor': response.json()['next_cursor']})
+            self.assertEqual(response.json()['results'], [{'title': 'Щи'}])
+
+            response = await client.get('/recipes/category/1', params={'fields': 'id,title'})
+            self.assertEqual([recipe['title'] for recipe in response.json()], ['Борщ', 'Щи'])
+            self.assertEqual(list(response.json()[0]), ['id', 'title'])
+            self.assertIn('etag', response.headers)
+            etag = response.headers['etag']
+            response = await client.get('/recipes/category/1', params={'fields': 'title'},
+                                        headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 200)  # Другой набор полей — другой ETag
+
+            response = await client.get('/recipes/author/1', params={'fields': 'steps'})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('steps', response.json()['detail'])
+
+    def test_batch(self):
+        asyncio.run(self.check_batch())
+
+    async def check_batch(self):
+        from sqlalchemy import event
+
+        from recipes_api import main
+
+        async with api_client() as (client, engine):
+            ids = [(await api_create(client, title)).json()['id'] for title in ('Борщ', 'Щи', 'Окрошка')]
+            queries = []
+            event.listen(engine.sync_engine, 'before_cursor_execute', lambda *args: queries.append(args[2]))
+            response = await client.get('/recipes/batch', params={'ids': f'{ids[2]},999,{ids[0]},{ids[2]}'})
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertEqual([recipe['title'] for recipe in body['results']], ['Окрошка', 'Борщ'])
+            self.assertEqual(body['results'][0]['categories'], [{'id': 1, 'name': 'Супы'}])
+            self.assertEqual(body['missing'], [999])
+            # Рецепты с авторами и категории — при любом числе id
+            self.assertEqual(len(queries), 2)
+
+            for params in ({'ids': 'борщ'}, {'ids': ''}, {'ids': ','.join(map(str, range(main.MAX_BATCH_IDS + 1)))}):
+                self.assertEqual((await client.get('/recipes/batch', params=params)).status_code, 400)
+
+
+class CategoryCountTests(TestCase):
+    """
+    Счётчики рецептов в категориях меняются вместе со связями.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', password='secret')
+        self.soups, self.salads = Category.objects.create(name='Супы'), Category.objects.create(name='Салаты')
+
+    def counts(self):
+        return dict(Category.objects.values_list('name', 'recipe_count'))
+
+    def test_django_paths(self):
+        borscht, shchi = make_recipe(self.author, 'Борщ'), make_recipe(self.author, 'Щи')
+        borscht.categories.set([self.soups, self.salads])  # Так сохраняет связи форма (save_m2m)
+        self.soups.recipe_set.add(shchi)
+        self.assertEqual(self.counts(), {'Супы': 2, 'Салаты': 1})
+        borscht.categories.set([self.soups])
+        self.assertEqual(self.counts(), {'Супы': 2, 'Салаты': 0})
+        RecipeCategory.objects.create(recipe=shchi, category=self.salads)
+        self.assertEqual(self.counts(), {'Супы': 2, 'Салаты': 1})
+        shchi.delete()
+        self.assertEqual(self.counts(), {'Супы': 1, 'Салаты': 0})
+        self.assertContains(self.client.get(reverse('recipe_list')), 'Супы (1)')
+
+    def test_reconcile_repairs_drift(self):
+        recipe = make_recipe(self.author, 'Борщ')
+        recipe.categories.set([self.soups])
+        Category.objects.filter(pk=self.soups.pk).update(recipe_count=7)
+        Category.objects.filter(pk=self.salads.pk).update(recipe_count=2)
+        self.assertEqual(len(categories.reconcile(dry_run=True)), 2)
+        out = io.StringIO()
+        call_command('reconcile_category_counts', stdout=out)
+        self.assertIn('Супы: 7 -> 1', out.getvalue())
+        self.assertEqual(self.counts(), {'Супы': 1, 'Салаты': 0})
+        self.assertEqual(categories.reconcile(), [])
+
+    def test_api_counter_updates_are_portable(self):
+        from sqlalchemy.dialects import postgresql, sqlite
+
+        from recipes_api import categories as api_categories, pantry as api_pantry
+
+        class Recorder:
+            def __init__(self):
+                self.statements = []
+
+            async def execute(self, statement, *args):
+                self.statements.append(statement)
+
+        db = Recorder()
+        asyncio.run(api_categories.adjust_counts(db, {1: -1, 2: 1}))
+        asyncio.run(api_pantry.adjust_counts(db, {1: -2}))
+        self.assertEqual(len(db.statements), 3)
+        for statement in db.statements:
+            # Двухаргументной max() в PostgreSQL нет, GREATEST нет в SQLite
+            for dialect in (postgresql.dialect(), sqlite.dialect()):
+                sql = str(statement.compile(dialect=dialect)).lower()
+                self.assertNotIn('max(', sql)
+                self.assertIn('case when', sql)
+
+    def test_api_paths(self):
+        asyncio.run(self.check_api())
+
+    async def check_api(self):
+        from sqlalchemy import insert
+
+        from recipes_api import database
+
+        async with api_client() as (client, engine):
+            async with engine.begin() as conn:
+                await conn.execute(insert(database.Category).values(id=2, name='Салаты'))
+            first = (await api_create(client, 'Борщ', categories=[1, 2, 1])).json()
+            await api_create(client, 'Щи')
+            response = await client.get('/categories')
+            self.assertEqual(response.json(), [{'id': 2, 'name': 'Салаты', 'recipe_count': 1},
+                                               {'id': 1, 'name': 'Супы', 'recipe_count': 2}])
+            await client.put(f"/recipes/{first['id']}", json={'categories': [2]})
+            response = await client.put('/recipes/bulk', json=[{'id': first['id'] + 1, 'categories': [2]}])
+            self.assertEqual(response.json()['succeeded'], 1)
+            counts = {row['name']: row['recipe_count'] for row in (await client.get('/categories')).json()}
+            self.assertEqual(counts, {'Супы': 0, 'Салаты': 2})
+
+
+
+class CategoryAssignmentTests(QueryBudgetMixin, TestCase):
+    """
+    Категории назначаются по разнице: меняются только изменившиеся связи.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', password='secret')
+        self.soups, self.salads, self.hot = (Category.objects.create(name=name) for name in ('Супы', 'Салаты', 'Горячее'))
+        self.recipe = make_recipe(self.author, 'Борщ')
+        self.recipe.categories.set([self.soups, self.salads])
+
+    def links(self):
+        return dict(RecipeCategory.objects.filter(recipe=self.recipe).values_list('category_id', 'id'))
+
+    def test_diff(self):
+        changes = categorydiff.diff([(10, 1, 1), (11, 1, 2), (12, 2, 1)], {1: [2, 3, 3], 2: [1]})
+        self.assertEqual((changes.removed, changes.added), ((10,), ((1, 3),)))
+        self.assertEqual((changes.deltas, changes.recipes), ({1: -1, 3: 1}, {1}))
+        self.assertFalse(categorydiff.diff([(12, 2, 1)], {2: [1]}))
+        with self.assertRaisesMessage(categorydiff.UnknownCategories, '[7, 9]'):
+            categorydiff.check({1: [1, 9, 7]}, [1])
+
+    def test_only_changed_links(self):
+        before = self.links()
+        with self.assertMaxQueries(10):
+            changes = categories.assign({self.recipe.pk: [self.salads.pk, self.hot.pk]})
+        self.assertEqual(changes.recipes, {self.recipe.pk})
+        after = self.links()
+        self.assertEqual(after[self.salads.pk], before[self.salads.pk])
+        self.assertNotIn(self.soups.pk, after)
+        self.assertEqual(dict(Category.objects.values_list('name', 'recipe_count')),
+                         {'Супы': 0, 'Салаты': 1, 'Горячее': 1})
+        with self.assertNumQueries(4):  # Точка сохранения, проверка категорий и текущие связи
+            self.assertFalse(categories.assign({self.recipe.pk: [self.hot.pk, self.salads.pk]}))
+        with self.assertRaises(categorydiff.UnknownCategories):
+            categories.assign({self.recipe.pk: [self.hot.pk, 999]})
+        self.assertEqual(self.links(), after)
+
+    def test_form_edit(self):
+        self.client.login(username='author', password='secret')
+        before = self.links()
+        response = self.client.post(reverse('recipe_edit', args=[self.recipe.id]), {
+            'title': 'Борщ', 'description': 'Описание', 'steps': 'Шаги', 'cooking_time': 10,
+            'ingredients': 'свёкла', 'categories': [self.soups.pk, self.hot.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        after = self.links()
+        self.assertEqual(set(after), {self.soups.pk, self.hot.pk})
+        self.assertEqual(after[self.soups.pk], before[self.soups.pk])
+        self.assertEqual(Category.objects.get(pk=self.salads.pk).recipe_count, 0)
+
+    def test_form_create_and_initial(self):
+        self.assertNotIn('categories', RecipeForm._meta.fields)
+        self.assertEqual(RecipeForm(instance=self.recipe).initial['categories'], [self.soups.pk, self.salads.pk])
+        self.client.login(username='author', password='secret')
+        response = self.client.post(reverse('recipe_create'), {
+            'title': 'Щи', 'description': 'Описание', 'steps': 'Шаги', 'cooking_time': 10,
+            'ingredients': 'капуста', 'categories': [self.hot.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        recipe = Recipe.objects.get(title='Щи')
+        self.assertEqual(list(recipe.categories.values_list('pk', flat=True)), [self.hot.pk])
+        self.assertEqual(Category.objects.get(pk=self.hot.pk).recipe_count, 1)
+
+    def test_api_update(self):
+        asyncio.run(self.check_api())
+
+    async def check_api(self):
+        from sqlalchemy import insert, select
+
+        from recipes_api import database
+
+        async with api_client() as (client, engine):
+            async with engine.begin() as conn:
+                await conn.execute(insert(database.Category).values(id=2, name='Салаты'))
+            recipe = (await api_create(client, 'Щи', categories=[1, 2])).json()
+
+            async def links():
+                async with engine.connect() as conn:
+                    rows = await conn.execute(select(database.RecipeCategory.category_id, database.RecipeCategory.id)
+                                              .where(database.RecipeCategory.recipe_id == recipe['id']))
+                    return dict(rows.all())
+
+            before = await links()
+            response = await client.put(f"/recipes/{recipe['id']}", json={'categories': [2]})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(await links(), {2: before[2]})
+            response = await client.put(f"/recipes/{recipe['id']}", json={'categories': [2, 5]})
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(await links(), {2: before[2]})
+
+class RecipeFilterTests(TestCase):
+    """
+    Общие фильтры списка: одинаковый результат в Django и API, один запрос на сочетание.
+    """
+    CASES = [
+        ({'category': '1,2'}, ['Борщ', 'Оливье', 'Щи']),
+        ({'category_all': ['1', '2']}, ['Борщ']),
+        ({'time_min': '20', 'time_max': '40'}, ['Борщ', 'Оливье']),
+        ({'ingredient': 'капусту, морковь'}, ['Борщ', 'Щи']),
+        ({'category': '1', 'exclude': 'свёклой'}, ['Щи']),
+        ({'author': '2'}, ['Оливье']),
+        ({'author': '1', 'ingredient': 'картофель', 'time_max': '30'}, []),
+    ]
+
+    def setUp(self):
+        cache.clear()
+        # id задаются явно: та же база повторяется в API
+        author = User.objects.create_user('author', password='secret', id=1)
+        other = User.objects.create_user('other', password='secret', id=2)
+        soups = Category.objects.create(name='Супы', id=1)
+        festive = Category.objects.create(name='Праздничные', id=2)
+        self.rows = [
+            ('Борщ', author, 'свёкла, капуста, морковь', 30, [soups, festive]),
+            ('Щи', author, 'капуста, картофель, морковь', 45, [soups]),
+            ('Оливье', other, 'картофель, колбаса, горошек', 20, [festive]),
+        ]
+        for title, user, ingredients, cooking_time, recipe_categories in self.rows:
+            make_recipe(user, title, ingredients=ingredients, cooking_time=cooking_time).categories.set(recipe_categories)
+
+    def getlist(self, params):
+        return QueryDict(urlencode(params, doseq=True)).getlist
+
+    def test_parse(self):
+        spec = filterspec.parse(self.getlist({'category': ['2', '1,2'], 'ingredient': 'Мука, мука', 'time_max': '30'}))
+        self.assertEqual(spec.any_categories, (1, 2))
+        self.assertEqual(len(spec.include), 1)
+        self.assertEqual(spec.time_max, 30)
+        self.assertFalse(filterspec.parse(self.getlist({})))
+        for bad in [{'category': 'супы'}, {'author': '1,2'}, {'time_min': '50', 'time_max': '10'}, {'time_max': '-1'}]:
+            with self.assertRaises(filterspec.InvalidFilter):
+                filterspec.parse(self.getlist(bad))
+
+    def test_django_single_query(self):
+        for params, expected in self.CASES:
+            spec = filterspec.parse(self.getlist(params))
+            with self.assertNumQueries(1):
+                titles = sorted(filters.apply(Recipe.objects.all(), spec).values_list('title', flat=True))
+            self.assertEqual(titles, expected, params)
+        response = self.client.get(reverse('recipe_list'), {'category_all': '1,2', 'order': 'cooking_time'})
+        self.assertEqual([recipe.title for recipe in response.context['recipes']], ['Борщ'])
+        response = self.client.get(reverse('recipe_list'), {'category': 'мусор'})
+        self.assertEqual(len(response.context['recipes']), 3)  # Неверный фильтр не применяется
+
+    def test_list_form_selects_several_categories(self):
+        # Выбор нескольких категорий доступен и с обычной страницы списка
+        self.assertContains(self.client.get(reverse('recipe_list')), 'class="form-select w-auto" multiple')
+        response = self.client.get(reverse('recipe_list'), {'category': ['1', '2']})
+        for category_id in (1, 2):
+            self.assertContains(response, f'<option value="{category_id}" selected>')
+
+    def test_api_matches_django(self):
+        asyncio.run(self.check_api())
+
+    async def check_api(self):
+        from sqlalchemy import insert
+
+        from recipes_api import database
+
+        async with api_client() as (client, engine):
+            async with engine.begin() as conn:
+                await conn.execute(insert(database.User).values(id=2, username='other'))
+                await conn.execute(insert(database.Category).values(id=2, name='Праздничные'))
+            for title, user, ingredients, cooking_time, recipe_categories in self.rows:
+                response = await api_create(client, title, author_id=user.id, ingredients=ingredients,
+                                            cooking_time=cooking_time, categories=[c.id for c in recipe_categories])
+                self.assertEqual(response.status_code, 200)
+            for params, expected in self.CASES:
+                response = await client.get('/recipes/', params={**params, 'fields': 'title', 'order': 'title'})
+                self.assertEqual([row['title'] for row in response.json()['results']], sorted(expected), params)
+            response = await client.get('/recipes/', params={'order': 'cooking_time', 'limit': 2, 'fields': 'title'})
+            page = response.json()
+            self.assertEqual([row['title'] for row in page['results']], ['Оливье', 'Борщ'])
+            response = await client.get('/recipes/', params={'order': 'cooking_time', 'cursor': page['next_cursor']})
+            self.assertEqual([row['title'] for row in response.json()['results']], ['Щи'])
+            self.assertEqual((await client.get('/recipes/', params={'time_min': 'долго'})).status_code, 400)
+            cursor = keyset.encode_cursor(keyset.Cursor('cooking_time', ['долго', 1]))
+            response = await client.get('/recipes/', params={'order': 'cooking_time', 'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+
+
+class MetricsTests(TestCase):
+    """
+    Замер запросов Django и FastAPI и метрики в формате Prometheus.
+    """
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.author = User.objects.create_user('author', password='secret')
+        self.recipe = make_recipe(self.author, 'Борщ')
+
+    def sample(self, text, name, **labels):
+        """
+        Значение строки метрики name с метками labels (порядок меток — как в выводе).
+        """
+        selector = ','.join(f'{key}="{value}"' for key, value in labels.items())
+        match = re.search(rf'^{name}{{{re.escape(selector)}[,}}].* (\S+)$', text, re.MULTILINE)
+        self.assertIsNotNone(match, f'{name}{{{selector}}} нет в метриках')
+        return float(match.group(1))
+
+    def test_django_request(self):
+        response = self.client.get(reverse('recipe_detail', args=[self.recipe.id]))
+        text = self.client.get(reverse('metrics')).content.decode()
+        route = {'app': 'django', 'method': 'GET', 'route': '/recipe/<int:recipe_id>/'}
+        self.assertEqual(self.sample(text, 'recipes_http_request_duration_seconds_count', **route, status=200), 1)
+        self.assertGreater(self.sample(text, 'recipes_db_queries_per_request_sum', **route), 0)
+        self.assertGreater(self.sample(text, 'recipes_template_render_seconds_sum', **route), 0)
+        self.assertEqual(self.sample(text, 'recipes_http_response_size_bytes_sum', **route), len(response.content))
+
+    def test_slow_request_log(self):
+        with mock.patch.object(metrics, 'SLOW_REQUEST_MS', 0.001), self.assertLogs('recipes.slow') as logs:
+            self.client.get(reverse('recipe_detail', args=[self.recipe.id]))
+        self.assertIn('GET /recipe/<int:recipe_id>/ 200', logs.output[0])
+        self.assertIn('FROM "recipes_recipe"', logs.output[0])
+
+    def test_api_request(self):
+        asyncio.run(self.check_api())
+
+    async def check_api(self):
+        from recipes_api import metrics as api_metrics
+
+        async with api_client() as (client, engine):
+            api_metrics.instrument(engine)
+            await api_create(client, 'Щи')
+            response = await client.get('/recipes/Щи')
+            text = (await client.get('/metrics')).text
+        route = {'app': 'api', 'method': 'GET', 'route': '/recipes/{recipe_title}'}
+        self.assertEqual(self.sample(text, 'recipes_http_request_duration_seconds_count', **route, status=200), 1)
+        self.assertEqual(self.sample(text, 'recipes_db_queries_per_request_sum', **route), 3)
+        self.assertEqual(self.sample(text, 'recipes_http_response_size_bytes_sum', **route), len(response.content))
+
+
+
+class SimilarRecipesTests(TestCase):
+    """
+    Похожие рецепты: TF-IDF по ингредиентам и категориям, полный и частичный пересчёт.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('author', password='secret')
+        self.soups = Category.objects.create(name='Супы')
+        self.borscht = make_recipe(self.author, 'Борщ', ingredients='свёкла, капуста, морковь, соль')
+        self.shchi = make_recipe(self.author, 'Щи', ingredients='капуста, морковь, лук, соль')
+        self.beet_salad = make_recipe(self.author, 'Винегрет', ingredients='свёкла, морковь, огурцы, соль')
+        self.omelette = make_recipe(self.author, 'Омлет', ingredients='яйца, молоко, соль')
+        self.cheesecakes = make_recipe(self.author, 'Сырники', ingredients='творог, сахар, мука, соль')
+        make_recipe(self.author, 'Запеканка', ingredients='творог, сахар, сметана, соль')
+        for recipe in (self.borscht, self.shchi):
+            recipe.categories.add(self.soups)
+        Job.objects.all().delete()
+
+    def titles(self, recipe):
+        return [item.title for item in similar.for_recipe(recipe.id)]
+
+    def test_rare_shared_ingredients_rank_higher(self):
+        similar.rebuild()
+        # С борщом у щей общие капуста, морковь и категория, у винегрета — свёкла и морковь;
+        # с омлетом общая только соль, которая есть во всех рецептах
+        self.assertEqual(self.titles(self.borscht), ['Щи', 'Винегрет'])
+        self.assertEqual(self.titles(self.omelette), [])
+        links = SimilarRecipe.objects.filter(recipe=self.borscht).order_by('rank')
+        self.assertGreater(links[0].score, links[1].score)
+
+    def test_detail_page_block(self):
+        similar.rebuild()
+        response = self.client.get(reverse('recipe_detail', args=[self.borscht.id]))
+        self.assertContains(response, 'Похожие рецепты')
+        self.assertContains(response, reverse('recipe_detail', args=[self.shchi.id]))
+        self.assertNotContains(self.client.get(reverse('recipe_detail', args=[self.omelette.id])), 'Похожие рецепты')
+
+    def test_incremental_update_on_save(self):
+        similar.rebuild()
+        untouched = SimilarRecipe.objects.get(recipe=self.cheesecakes).pk
+        self.omelette.ingredients = 'свёкла, огурцы, морковь, соль'
+        self.omelette.save()
+        self.assertEqual(list(Job.objects.values_list('name', 'payload')),
+                         [('update_similar', {'recipe_ids': [self.omelette.id]})])
+        self.assertEqual(tasks.run_pending(), (1, 0))
+        self.assertEqual(self.titles(self.omelette)[0], 'Винегрет')
+        # Новый сосед пересчитан, список сырников, не связанный с омлетом, не тронут
+        self.assertIn('Омлет', self.titles(self.beet_salad))
+        self.assertTrue(SimilarRecipe.objects.filter(pk=untouched).exists())
+
+    def test_delete_recomputes_referrers(self):
+        similar.rebuild()
+        self.shchi.delete()
+        self.assertEqual(tasks.run_pending(), (1, 0))
+        self.assertEqual(self.titles(self.borscht), ['Винегрет'])
+
+    def test_neighbours_limit(self):
+        weights = similarity.idf_weights({1: 1, 2: 3, 3: 3}, total=10)
+        profiles = {1: similarity.profile([1, 2], weights), 2: similarity.profile([1, 2, 3], weights),
+                    3: similarity.profile([2, 3], weights)}
+        index = similarity.postings([(1, 1), (1, 2), (2, 1), (2, 2), (2, 3), (3, 2), (3, 3)])
+        self.assertEqual([other for other, _ in similarity.neighbours(1, profiles[1], index, profiles, weights)],
+                         [2, 3])
+        self.assertEqual(len(similarity.neighbours(1, profiles[1], index, profiles, weights, top_k=1)), 1)
+
+    def test_api(self):
+        asyncio.run(self.check_api())
+
+    async def check_api(self):
+        from sqlalchemy import insert, select
+
+        from recipes_api import database
+
+        async with api_client() as (client, engine):
+            first = (await api_create(client, 'Борщ')).json()['id']
+            second = (await api_create(client, 'Щи')).json()['id']
+            async with engine.begin() as conn:
+                # Пересчёт поставлен в общую очередь задач Django
+                jobs = (await conn.execute(select(database.Job.name, database.Job.payload))).all()
+                await conn.execute(insert(database.SimilarRecipe).values(
+                    recipe_id=first, similar_id=second, score=0.9, rank=0))
+            self.assertEqual([tuple(job) for job in jobs], [('update_similar', {'recipe_ids': [first]}),
+                                                            ('update_similar', {'recipe_ids': [second]})])
+            response = await client.get(f'/recipes/{first}/similar', params={'fields': 'id,title'})
+            self.assertEqual(response.json(), [{'id': second, 'title': 'Щи'}])
+            self.assertEqual((await client.get(f'/recipes/{second}/similar')).json(), [])
+            self.assertEqual((await client.get('/recipes/999/similar')).status_code, 404)
+
+class BenchmarkSuiteTests(TestCase):
+    """
+    Набор бенчмарков покрывает все страницы и маршруты; сравнение прогонов.
+    """
+
+    def test_covers_all_routes(self):
+        from benchmarks import suite
+
+        ctx = {'recipe_ids': [1], 'titles': ['Борщ'], 'category_ids': [1], 'own_recipe_id': 1,
+               'author_id': 1, 'username': 'author', 'bulk': 1, 'counter': iter(range(10))}
+        self.assertEqual(suite.uncovered(suite.django_cases(ctx), suite.api_cases(ctx)), ([], []))
+
+    def test_compare(self):
+        from benchmarks import suite
+
+        before = {'api': {'GET /categories': {'p50': 2.0, 'queries': 1}, 'GET /metrics': {'p50': 0.1, 'queries': 0}}}
+        after = {'api': {'GET /categories': {'p50': 3.0, 'queries': 2}, 'GET /metrics': {'p50': 0.3, 'queries': 0}}}
+        regressions = suite.compare(after, before, threshold=0.2)
+        # Рост времени ниже порога шума не считается регрессией
+        self.assertEqual(regressions, ['api GET /categories: SQL 1 -> 2', 'api GET /categories: p50 2.00 -> 3.00 мс'])
@@ -0,0 +1,56 @@
+"""
+Полнотекстовый поиск рецептов на SQLite FTS5.
+
+Общая часть для Django и FastAPI: описание индексной таблицы, подготовка
+документов и поисковых выражений. Модуль не зависит от ORM — адаптеры
+находятся в recipes/search.py и recipes_api/search.py.
+
+FTS5 не умеет стемминг русского языка, поэтому в индекс записываются уже
+приведённые к основам слова (recipes.stemming), а запрос проходит ту же
+обработку. Индекс — таблица recipes_recipe_fts, rowid которой равен id рецепта.
+"""
+
+from .stemming import stem, stem_text, tokenize
+
+FTS_TABLE = 'recipes_recipe_fts'
+
+# Индексируемые поля рецепта и их веса в ранжировании bm25
+FIELDS = ('title', 'description', 'ingredients', 'steps')
+WEIGHTS = {'title': 10.0, 'description': 2.0, 'ingredients': 5.0, 'steps': 1.0}
+
+CREATE_TABLE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(FIELDS)}, tokenize='unicode61 remove_diacritics 2')"
+)
+DROP_TABLE_SQL = f'DROP TABLE IF EXISTS {FTS_TABLE}'
+
+# Выражение ранга: чем меньше значение, тем релевантнее результат
+RANK_SQL = f"bm25({FTS_TABLE}, {', '.join(str(WEIGHTS[name]) for name in FIELDS)})"
+
+# Максимальное число результатов одного поиска
+MAX_RESULTS = 100
+
+
+def document(recipe):
+    """
+    Возвращает значения индексируемых полей рецепта, приведённые к основам.
+
+    recipe — любой объект с атрибутами title, description, ingredients, steps.
+    """
+    return tuple(stem_text(getattr(recipe, name)) for name in FIELDS)
+
+
+def match_expression(query, prefix=False):
+    """
+    Строит выражение MATCH из пользовательского запроса.
+
+    Все слова запроса обязательны. В режиме prefix (автодополнение)
+    последнее слово ищется как префикс. Возвращает None для пустого запроса.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    terms = [f'"{stem(token)}"' for token in tokens]
+    if prefix:
+        terms[-1] += '*'
+    return ' '.join(terms)
@@ -34,4 +34,7 @@ urlpatterns = [
 
     # РСоздание новой категории
     path('category/create/', views.category_create, name='category_create'),
+
+    # Метрики производительности для Prometheus
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
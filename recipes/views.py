@@ -4,31 +4,101 @@
 Обрабатывает запросы и возвращает ответы (HTML-страницы или перенаправления).
 """
 
+from django.http import Http404, HttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from random import sample
+from django.views.decorators.http import condition
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.functional import SimpleLazyObject
+from . import conditional, filters, filterspec, metrics, pagecache, similar, tasks
 from .models import Recipe, Category
 from .forms import RecipeForm, UserRegisterForm, CategoryForm
+from .featured import random_recipes
+from .keyset import ORDERINGS, InvalidCursor
+from .pagination import paginate
+from .routers import replica_reads
+from .search import search_recipes
 from django.db.models import Q
 
 # Главная страница с 5 случайными рецептами
+@replica_reads
 def index(request):
     """
     Отображает главную страницу с 5 случайными рецептами.
+
+    Карточки кэшируются ненадолго (PAGE_CACHE_INDEX_TIMEOUT), чтобы подборка менялась.
+    Рецепты выбираются лениво — только если фрагмента в кэше не окажется
+    при отрисовке (в том числе если он вытеснен после проверки).
+    """
+    _, context = pagecache.context('index', pagecache.list_key(request), settings.PAGE_CACHE_INDEX_TIMEOUT)
+    # До 5 случайных без загрузки всей таблицы
+    context['recipes'] = SimpleLazyObject(lambda: random_recipes(5, Recipe.objects.for_cards()))
+    return render(request, 'recipes/index.html', context)
+
+def _page_etag(request, *key):
+    """
+    ETag страницы из частей, однозначно описывающих её данные.
+
+    Пока у пользователя есть неотображённые сообщения, страница не кэшируется.
+    """
+    if len(messages.get_messages(request)):
+        return None
+    return conditional.make_etag(*key)
+
+
+def _recipe_version(request, recipe_id):
     """
-    recipes = Recipe.objects.all()  # Получаем все рецепты
-    random_recipes = sample(list(recipes), min(5, recipes.count()))  # Выбираем до 5 случайных
-    return render(request, 'recipes/index.html', {'recipes': random_recipes})
+    Данные, от которых зависит страница рецепта: время его изменения и его
+    категории (одна выборка по первичному ключу), похожие рецепты с временем
+    их изменения; None — рецепта нет. Считается один раз за запрос — нужна
+    и ETag, и представлению.
+
+    ETag строится только из этих данных: версии в кэше (pagecache) свои
+    у каждого процесса и теряются при вытеснении, поэтому входят лишь в ключ
+    фрагмента. Запись через API, другой процесс или QuerySet.update тоже
+    меняет страницу.
+    """
+    if not hasattr(request, '_recipe_version'):
+        rows = list(Recipe.objects.filter(pk=recipe_id).order_by('categories__id')
+                    .values_list('updated_at', 'categories__id', 'categories__name'))
+        request._recipe_version = None if not rows else [
+            rows[0][0].isoformat(),
+            [(category_id, name) for _, category_id, name in rows if category_id is not None],
+            [(pk, stamp.isoformat()) for pk, stamp in similar.signature(recipe_id)]]
+    return request._recipe_version
+
+
+def _detail_etag(request, recipe_id):
+    version = _recipe_version(request, recipe_id)
+    if version is None:
+        return None  # Ответит 404 само представление
+    return _page_etag(request, 'recipe_detail', recipe_id, *version, pagecache.auth_state(request))
+
 
 # Страница подробного просмотра рецепта
+@replica_reads
+@condition(etag_func=_detail_etag)
 def recipe_detail(request, recipe_id):
     """
     Отображает страницу с деталями одного рецепта.
+
+    Если страница рецепта уже в кэше, рецепт загружается лениво —
+    только если шаблону понадобится что-то вне закэшированного фрагмента.
+    Похожие рецепты — ленивый QuerySet: при попадании в кэш запроса нет.
     """
-    recipe = get_object_or_404(Recipe, id=recipe_id)  # Получаем рецепт или 404
-    return render(request, 'recipes/recipe_detail.html', {'recipe': recipe})
+    def load():
+        return get_object_or_404(Recipe.objects.with_related(), id=recipe_id)  # Рецепт с автором и категориями или 404
+
+    version = _recipe_version(request, recipe_id)
+    if version is None:
+        raise Http404('Рецепт не найден')
+    cached, context = pagecache.context('recipe_detail', pagecache.detail_key(request, recipe_id, *version))
+    context['recipe'] = SimpleLazyObject(load) if cached else load()
+    context['similar_recipes'] = similar.for_recipe(recipe_id)
+    return render(request, 'recipes/recipe_detail.html', context)
 
 # Регистрация нового пользователя
 def register(request):
@@ -72,20 +142,89 @@ def user_logout(request):
     messages.success(request, 'Вы успешно вышли!')
     return redirect('index')  # Перенаправление на главную
 
-# Список рецептов с фильтром по категориям
+# Список рецептов с фильтром по категориям и поиском
+@replica_reads
 def recipe_list(request):
     """
-    Отображает список всех рецептов с возможностью фильтрации по категории.
+    Отображает постраничный список рецептов с фильтрами.
+
+    Страницы переключаются курсорами (?cursor=...), размер страницы задаётся
+    параметром ?page_size=, сортировка — ?order=id|title|cooking_time.
+    Фильтры по категориям, автору, времени и ингредиентам описаны
+    в recipes/filterspec.py; некорректные фильтры не применяются.
+    При заданном поисковом запросе ?q= выводятся самые релевантные рецепты
+    без пагинации.
+
+    Страница рецептов (запрос по индексу) и категории выбираются всегда:
+    ETag и ключ кэшированного фрагмента строятся из их id и времени
+    изменения, поэтому любое изменение показанных данных меняет и то и другое.
     """
-    category_id = request.GET.get('category')  # Получаем ID категории из GET-параметра
-    recipes = Recipe.objects.all()
+    try:
+        spec = filterspec.parse(request.GET.getlist)
+    except filterspec.InvalidFilter:
+        spec = filterspec.EMPTY  # Как и с неверным курсором — показываем список без фильтров
+    query = request.GET.get('q', '').strip()  # Поисковый запрос
+    recipes = filters.apply(Recipe.objects.for_cards(), spec)  # Все фильтры — одним запросом
+    page = None
+
+    if query:
+        # Одна категория сужает сам поиск, остальные фильтры — найденные рецепты
+        category_id = spec.any_categories[0] if len(spec.any_categories) == 1 else None
+        recipes = list(search_recipes(query, category_id=category_id, queryset=recipes))  # Ранжированный поиск
+    else:
+        try:
+            page = paginate(recipes, request.GET.get('cursor'), request.GET.get('page_size'),
+                            request.GET.get('order'))
+        except InvalidCursor:
+            page = paginate(recipes, page_size=request.GET.get('page_size'))  # Начинаем с первой страницы
+        recipes = page.items
 
-    if category_id:
-        recipes = recipes.filter(categories__id=category_id)  # Фильтрация по категории
+    categories = list(Category.objects.all())  # Получаем все категории для фильтра
+    key = [
+        sorted(request.GET.lists()),
+        [(recipe.id, recipe.updated_at.isoformat()) for recipe in recipes],
+        page and (page.next_cursor, page.prev_cursor),
+        [(category.id, category.name, category.recipe_count) for category in categories],
+        pagecache.auth_state(request),
+    ]
+    etag = _page_etag(request, 'recipe_list', *key)
+    if etag and (not_modified := get_conditional_response(request, etag=etag)):
+        return not_modified
+    _, context = pagecache.context('recipe_list', [conditional.make_etag(*key)])
+    response = render(request, 'recipes/recipe_list.html', {
+        **context,
+        'recipes': recipes,
+        'page': page,
+        'next_url': _page_url(request, page and page.next_cursor),
+        'prev_url': _page_url(request, page and page.prev_cursor),
+        'categories': categories,
+        'filters': spec,
+        # Значения фильтров как их ввёл пользователь (в spec ингредиенты уже нормализованы)
+        'filter_values': {name: ', '.join(request.GET.getlist(name)) for name in filterspec.PARAMS},
+        'orderings': ORDERINGS,
+        'query': query,
+    })
+    if etag:
+        response['ETag'] = etag
+    return response
+
+
+def _page_url(request, cursor):
+    """
+    Строит ссылку на соседнюю страницу, сохраняя остальные GET-параметры.
+    """
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return f'?{params.urlencode()}'
 
-    categories = Category.objects.all()  # Получаем все категории для фильтра
-    return render(request, 'recipes/recipe_list.html', {'recipes': recipes, 'categories':
-        categories, 'selected_category': category_id})
+def _build_image_variants(form, recipe):
+    """
+    Ставит в очередь построение копий нового изображения рецепта, не задерживая ответ.
+    """
+    if 'image' in form.changed_data and recipe.image:
+        tasks.enqueue('build_image_variants', recipe_id=recipe.id)
 
 # Добавление нового рецепта (только для авторизованных)
 @login_required
@@ -99,8 +238,8 @@ def recipe_create(request):
             recipe = form.save(commit=False)  # Сохраняем без коммита, чтобы добавить автора
             recipe.author = request.user  # Устанавливаем текущего пользователя как автора
             recipe.save()  # Сохраняем рецепт
-            print("Выбранные категории:", form.cleaned_data['categories'])
             form.save_m2m()  # Сохраняем связи многие-ко-многим (категории)
+            _build_image_variants(form, recipe)
             messages.success(request, 'Рецепт успешно добавлен!')
             return redirect('recipe_detail', recipe_id=recipe.id)  # Перенаправление на страницу рецепта
     else:
@@ -118,6 +257,7 @@ def recipe_edit(request, recipe_id):
         form = RecipeForm(request.POST, request.FILES, instance=recipe)  # Форма с текущими данными
         if form.is_valid():
             form.save()  # Сохраняем изменения
+            _build_image_variants(form, recipe)
             messages.success(request, 'Рецепт успешно обновлён!')
             return redirect('recipe_detail', recipe_id=recipe.id)
     else:
@@ -137,4 +277,12 @@ def category_create(request):
             return redirect('recipe_create')  # Перенаправляем на создание рецепта
     else:
         form = CategoryForm()
-    return render(request, 'recipes/category_form.html', {'form': form})
\ No newline at end of file
+    return render(request, 'recipes/category_form.html', {'form': form})
+
+
+# Метрики производительности в формате Prometheus
+def metrics_view(request):
+    """
+    Отдаёт метрики запросов этого процесса (recipes/metrics.py) для Prometheus.
+    """
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,233 @@
+"""
+Массовое создание и изменение рецептов через API.
+
+Тело запроса — JSON-массив или NDJSON (по объекту на строку, читается
+потоком). Элементы обрабатываются пакетами по batch_size: категории,
+авторы и изменяемые рецепты пакета проверяются одним запросом IN на
+каждую таблицу, связи с категориями вставляются одним executemany,
+а пакет фиксируется одним commit.
+
+Пакет записывается целиком или не записывается вовсе: если хотя бы один
+элемент не прошёл проверку или запись упала, откатывается весь пакет.
+В ответе для каждого элемента указан его номер и id рецепта либо ошибки.
+
+Тело больше MAX_BODY_BYTES отклоняется с кодом 413: по Content-Length —
+до записи чего-либо, без него — при чтении (уже записанные пакеты остаются).
+"""
+
+import json
+
+from decouple import config
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import categories, pantry, search, similar
+from .database import Category, Recipe, User, utcnow
+from .schemas import RecipeBulkUpdate, RecipeCreate
+
+# Размер пакета по умолчанию и его верхняя граница
+BATCH_SIZE = config('API_BULK_BATCH_SIZE', default=500, cast=int)
+MAX_BATCH_SIZE = config('API_BULK_MAX_BATCH_SIZE', default=5000, cast=int)
+# Наибольший размер тела запроса, байт
+MAX_BODY_BYTES = config('API_BULK_MAX_BYTES', default=64 * 1024 * 1024, cast=int)
+
+# Типы содержимого, которые читаются построчно
+NDJSON_TYPES = {'application/x-ndjson', 'application/ndjson', 'application/jsonl'}
+
+BATCH_REJECTED = 'Пакет не записан из-за ошибок в других элементах'
+
+
+def too_large():
+    return HTTPException(status_code=413, detail=f'Тело запроса больше {MAX_BODY_BYTES} байт')
+
+
+async def read_items(request: Request):
+    """
+    Выдаёт элементы тела запроса как (номер, объект, ошибка разбора).
+    """
+    if int(request.headers.get('content-length') or 0) > MAX_BODY_BYTES:
+        raise too_large()
+    content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    if content_type not in NDJSON_TYPES:
+        body = await request.body()
+        if len(body) > MAX_BODY_BYTES:
+            raise too_large()
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail='Ожидается JSON-массив или NDJSON')
+        if not isinstance(data, list):
+            raise HTTPException(status_code=400, detail='Ожидается JSON-массив или NDJSON')
+        for index, raw in enumerate(data):
+            yield index, raw, None
+        return
+
+    index, buffer, size = 0, b'', 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise too_large()
+        *lines, buffer = (buffer + chunk).split(b'\n')
+        for line in lines:
+            if line.strip():
+                yield (index, *_decode_line(line))
+                index += 1
+    if buffer.strip():
+        yield (index, *_decode_line(buffer))
+
+
+def _decode_line(line):
+    try:
+        return json.loads(line), None
+    except ValueError as exc:
+        return None, f'Некорректный JSON: {exc}'
+
+
+async def batches(items, size):
+    """
+    Группирует асинхронный поток элементов в списки по size.
+    """
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def validate(batch, schema):
+    """
+    Проверяет элементы пакета схемой Pydantic.
+
+    Возвращает ({номер: модель}, {номер: [ошибки]}).
+    """
+    valid, errors = {}, {}
+    for index, raw, error in batch:
+        if error:
+            errors[index] = [error]
+            continue
+        try:
+            valid[index] = schema.model_validate(raw)
+        except ValidationError as exc:
+            errors[index] = [f"{'.'.join(map(str, e['loc'])) or 'item'}: {e['msg']}" for e in exc.errors()]
+    return valid, errors
+
+
+async def existing_ids(db: AsyncSession, column, ids):
+    """
+    Возвращает те из ids, что есть в таблице, одним запросом IN.
+    """
+    if not ids:
+        return set()
+    return set(await db.scalars(select(column).where(column.in_(ids))))
+
+
+async def check_categories(db: AsyncSession, items, errors):
+    """
+    Проверяет категории всех элементов пакета одним запросом.
+    """
+    wanted = {pk for item in items.values() for pk in item.categories or ()}
+    known = await existing_ids(db, Category.id, wanted)
+    for index, item in items.items():
+        missing = sorted(set(item.categories or ()) - known)
+        if missing:
+            errors.setdefault(index, []).append(f'Категории не найдены: {missing}')
+
+
+async def create_batch(db: AsyncSession, batch):
+    """
+    Создаёт рецепты пакета. Возвращает результаты по элементам.
+    """
+    items, errors = validate(batch, RecipeCreate)
+    await check_categories(db, items, errors)
+    authors = await existing_ids(db, User.id, {item.author_id for item in items.values()})
+    for index, item in items.items():
+        if item.author_id not in authors:
+            errors.setdefault(index, []).append(f'Автор не найден: {item.author_id}')
+    if errors:
+        return rejected(batch, errors)
+
+    recipes = {index: Recipe(**item.model_dump(exclude={'categories'})) for index, item in items.items()}
+    try:
+        db.add_all(recipes.values())
+        await db.flush()
+        await categories.assign(db, {recipes[index].id: item.categories for index, item in items.items()},
+                                validate=False)
+        await search.index_recipes(db, recipes.values())
+        await pantry.sync_recipes(db, recipes.values())
+        await similar.schedule(db, [recipe.id for recipe in recipes.values()])
+        await db.commit()
+    except SQLAlchemyError as exc:
+        return await failed(db, batch, exc)
+    return [{'index': index, 'id': recipe.id} for index, recipe in recipes.items()]
+
+
+async def update_batch(db: AsyncSession, batch):
+    """
+    Изменяет рецепты пакета. Возвращает результаты по элементам.
+    """
+    items, errors = validate(batch, RecipeBulkUpdate)
+    seen = set()
+    for index, item in items.items():
+        if item.id in seen:
+            errors.setdefault(index, []).append(f'Рецепт {item.id} повторяется в пакете')
+        seen.add(item.id)
+    await check_categories(db, items, errors)
+    recipes = {recipe.id: recipe for recipe in await db.scalars(select(Recipe).where(Recipe.id.in_(seen)))}
+    for index, item in items.items():
+        if item.id not in recipes:
+            errors.setdefault(index, []).append(f'Рецепт не найден: {item.id}')
+    if errors:
+        return rejected(batch, errors)
+
+    try:
+        for item in items.values():
+            for field, value in item.model_dump(exclude={'id', 'categories'}, exclude_none=True).items():
+                setattr(recipes[item.id], field, value)
+            recipes[item.id].updated_at = utcnow()
+        changes = await categories.assign(db, {item.id: item.categories for item in items.values()
+                                               if item.categories is not None}, validate=False)
+        updated = [recipes[item.id] for item in items.values()]
+        await search.index_recipes(db, updated)
+        await pantry.sync_recipes(db, [recipes[item.id] for item in items.values() if item.ingredients is not None])
+        await similar.schedule(db, [item.id for item in items.values()
+                                    if item.ingredients is not None or item.id in changes.recipes])
+        await db.commit()
+    except SQLAlchemyError as exc:
+        return await failed(db, batch, exc)
+    return [{'index': index, 'id': item.id} for index, item in items.items()]
+
+
+def rejected(batch, errors):
+    """
+    Результаты пакета, не записанного из-за ошибок проверки.
+    """
+    return [{'index': index, 'errors': errors.get(index, [BATCH_REJECTED])} for index, _, _ in batch]
+
+
+async def failed(db: AsyncSession, batch, exc):
+    """
+    Откатывает пакет, запись которого упала, и возвращает ошибку для каждого элемента.
+    """
+    await db.rollback()
+    message = f'Ошибка записи пакета: {exc.__class__.__name__}'
+    return [{'index': index, 'errors': [message]} for index, _, _ in batch]
+
+
+async def run(db: AsyncSession, request: Request, write_batch, batch_size=None):
+    """
+    Обрабатывает тело запроса пакетами и собирает отчёт.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    results = []
+    async for batch in batches(read_items(request), batch_size):
+        results.extend(await write_batch(db, batch))
+        # Записанные объекты больше не нужны: сессия не копит весь импорт
+        db.expunge_all()
+    failed_count = sum(1 for result in results if 'errors' in result)
+    return {'succeeded': len(results) - failed_count, 'failed': failed_count, 'results': results}
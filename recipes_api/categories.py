@@ -0,0 +1,63 @@
+"""
+Связи рецептов с категориями и счётчики рецептов в категориях для FastAPI.
+
+Повторяет recipes/categories.py: Category.recipe_count меняется в той же
+транзакции, что и связи RecipeCategory, поэтому фильтр списка Django
+и /categories показывают одни и те же числа. Связи меняются по разнице
+с текущими (recipes/categorydiff.py).
+"""
+
+from collections import defaultdict
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from recipes import categorydiff
+
+from .database import Category, RecipeCategory, at_least_zero
+
+
+async def adjust_counts(db: AsyncSession, deltas):
+    """
+    Изменяет Category.recipe_count на величины из {id: приращение}.
+    """
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        await db.execute(update(Category).where(Category.id.in_(pks))
+                         .values(recipe_count=at_least_zero(Category.recipe_count + delta)))
+
+
+async def check(db: AsyncSession, assignments):
+    """
+    Проверяет одним запросом, что все назначаемые категории существуют.
+    """
+    wanted = categorydiff.wanted_ids(assignments)
+    known = await db.scalars(select(Category.id).where(Category.id.in_(wanted))) if wanted else ()
+    categorydiff.check(assignments, known)
+
+
+async def assign(db: AsyncSession, assignments, validate=True):
+    """
+    Назначает рецептам категории по словарю {id рецепта: [id категорий]}.
+
+    Удаляются и добавляются только изменившиеся связи (по одному запросу),
+    счётчики меняются только у их категорий. Возвращает categorydiff.Changes;
+    при validate несуществующие категории — categorydiff.UnknownCategories.
+    """
+    if not assignments:
+        return categorydiff.Changes()
+    if validate:
+        await check(db, assignments)
+    current = select(RecipeCategory.id, RecipeCategory.recipe_id, RecipeCategory.category_id).where(
+        RecipeCategory.recipe_id.in_(assignments))
+    changes = categorydiff.diff((await db.execute(current)).all(), assignments)
+    if changes.removed:
+        await db.execute(delete(RecipeCategory).where(RecipeCategory.id.in_(changes.removed)))
+    if changes.added:
+        await db.execute(insert(RecipeCategory), [{'recipe_id': recipe_id, 'category_id': category_id}
+                                                  for recipe_id, category_id in changes.added])
+    await adjust_counts(db, changes.deltas)
+    return changes
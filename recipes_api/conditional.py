@@ -0,0 +1,65 @@
+"""
+Условные запросы (ETag / Last-Modified) для FastAPI.
+
+Адаптер к recipes/conditional.py. Рецепт проверяется лёгким запросом id
+и updated_at до загрузки; при совпадении с If-None-Match /
+If-Modified-Since обработчик отвечает 304, не загружая и не сериализуя
+рецепт. ETag списка строится из строк, которые попали в ответ (их id
+и updated_at), поэтому считается после выборки страницы, но без отдельного
+запроса по всей выборке; 304 экономит сериализацию и передачу ответа.
+"""
+
+from fastapi import Request, Response
+
+from recipes import conditional
+
+
+class Validators:
+    """
+    ETag и время изменения ответа.
+    """
+
+    def __init__(self, etag, last_modified=None):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def headers(self):
+        """
+        Заголовки ответа с валидаторами.
+        """
+        headers = {"ETag": self.etag}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = conditional.http_date(self.last_modified)
+        return headers
+
+    def not_modified(self, request: Request):
+        """
+        Ответ 304, если у клиента актуальная копия, иначе None.
+        """
+        if conditional.not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since"),
+                                    self.etag, self.last_modified):
+            return Response(status_code=304, headers=self.headers())
+        return None
+
+    def apply(self, response: Response):
+        """
+        Добавляет валидаторы к ответу обработчика.
+        """
+        response.headers.update(self.headers())
+
+
+def for_recipe(recipe_id, updated_at):
+    """
+    Валидаторы ответа с одним рецептом.
+    """
+    return Validators(conditional.make_etag("recipe", recipe_id, updated_at.isoformat()), updated_at)
+
+
+def for_list(rows, *params):
+    """
+    Валидаторы списка по его строкам (нужны поля id и updated_at) и параметрам запроса.
+
+    Last-Modified у списков нет: удаление рецепта или смена его категорий
+    меняют состав списка, но не время изменения оставшихся в нём рецептов.
+    """
+    return Validators(conditional.make_etag("list", *params, [(row.id, row.updated_at.isoformat()) for row in rows]))
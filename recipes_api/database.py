@@ -1,34 +1,122 @@
-from sqlalchemy import create_engine
+from datetime import datetime, timezone
+
+from sqlalchemy import case, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import JSON, Column, DateTime, Float, Index, Integer, String, ForeignKey, Text
+from sqlalchemy.orm import relationship, joinedload, selectinload
+
+from recipes import dbconfig, sqlitetuning
+
+# База и параметры пула — общие с Django (recipes/dbconfig.py, DATABASE_URL и DB_*).
+# Таблицы создаются и изменяются только миграциями Django; соответствие
+# моделей ниже миграциям проверяет manage.py check_api_schema.
+SQLALCHEMY_DATABASE_URL = dbconfig.DATABASE_URL
+
+# Асинхронные драйверы для синхронных URL: aiosqlite локально, asyncpg для Postgres
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def async_url(url):
+    """
+    Возвращает URL с асинхронным драйвером для того же сервера БД.
+
+    URL, в котором драйвер уже указан явно (например, postgresql+psycopg),
+    не меняется.
+    """
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+
+def create_api_engine(read_only=False):
+    """
+    Асинхронный движок с пулом соединений.
+
+    Для SQLite при каждом подключении применяются PRAGMA из
+    recipes/sqlitetuning.py (synchronous, busy_timeout и т.д.), для PostgreSQL
+    (asyncpg) — statement_timeout и режим только для чтения.
+    """
+    url = async_url(SQLALCHEMY_DATABASE_URL)
+    connect_args = {}
+    if url.drivername == "postgresql+asyncpg":
+        connect_args["server_settings"] = dbconfig.postgres_settings(read_only)
+    engine = create_async_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=dbconfig.POOL_SIZE,
+        max_overflow=dbconfig.POOL_MAX_OVERFLOW,
+        pool_timeout=dbconfig.POOL_TIMEOUT,
+        pool_recycle=dbconfig.POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect",
+                     lambda connection, record: sqlitetuning.apply(connection, read_only))
+    return engine
 
-# Путь к базе данных
-SQLALCHEMY_DATABASE_URL = "sqlite:///C:/Users/user/PycharmProjects/recipes_project/db.sqlite3"
 
-# Создание подключения к базе
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# Асинхронное подключение для обработчиков FastAPI: запросы не блокируют цикл событий
+async_engine = create_api_engine()
+
+# Отдельный пул только для чтения для GET-маршрутов: читатели
+# не занимают соединения, нужные записи, и не могут случайно что-то изменить
+async_read_engine = create_api_engine(read_only=True)
 
 # Создание базы для моделей
 Base = declarative_base()
 
-# Создание сессии для работы с базой
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Асинхронные сессии; объекты не истекают после commit, чтобы ответ
+# собирался без повторных (ленивых) запросов
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+ReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
 
 # Функция для получения сессии
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+# Сессия только для чтения — для GET-маршрутов
+async def get_read_db():
+    async with ReadSessionLocal() as db:
+        yield db
+
+class User(Base):
+    """
+    Пользователь Django (auth_user): только поля, безопасные для выдачи в API.
+    """
+    __tablename__ = "auth_user"
+
+    id = Column(Integer, primary_key=True)
+    username = Column(String(150))
 
 class Category(Base):
     __tablename__ = "recipes_category"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True)
+    # Число рецептов категории; меняется вместе со связями (recipes_api/categories.py)
+    recipe_count = Column(Integer, default=0, nullable=False)
+
+def at_least_zero(value):
+    """
+    Выражение value, но не меньше нуля (для счётчиков). Переносимо: max(a, b)
+    есть только в SQLite, а GREATEST — только в PostgreSQL.
+    """
+    return case((value < 0, 0), else_=value)
+
+
+def utcnow():
+    """
+    Текущее время в UTC (Django хранит время изменения в UTC при USE_TZ).
+    """
+    return datetime.now(timezone.utc)
+
 
 class Recipe(Base):
     __tablename__ = "recipes_recipe"
@@ -40,14 +128,90 @@ class Recipe(Base):
     cooking_time = Column(Integer)
     image = Column(String)  # Путь к изображению
     ingredients = Column(Text)
+    ingredient_count = Column(Integer, default=0, nullable=False)
+    # Время изменения (auto_now в Django): для ETag и Last-Modified
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow, nullable=False)
     author_id = Column(Integer, ForeignKey("auth_user.id"))
 
     author = relationship("User", foreign_keys=[author_id])
     categories = relationship("Category", secondary="recipes_recipecategory")
 
+    # Индексы из миграций Django (recipes/models.py, Meta.indexes)
+    __table_args__ = (
+        Index("recipes_recipe_title_id", "title", "id"),
+        Index("recipes_recipe_updated_at", "updated_at"),
+        Index("recipes_recipe_time_id", "cooking_time", "id"),
+    )
+
 class RecipeCategory(Base):
     __tablename__ = "recipes_recipecategory"
 
     id = Column(Integer, primary_key=True, index=True)
     recipe_id = Column(Integer, ForeignKey("recipes_recipe.id"))
-    category_id = Column(Integer, ForeignKey("recipes_category.id"))
\ No newline at end of file
+    category_id = Column(Integer, ForeignKey("recipes_category.id"))
+
+    __table_args__ = (
+        Index("recipes_rc_category_recipe", "category_id", "recipe_id"),
+    )
+
+class Ingredient(Base):
+    __tablename__ = "recipes_ingredient"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(100), unique=True)
+    name = Column(String(100))
+    recipe_count = Column(Integer, default=0, nullable=False)
+
+class RecipeIngredient(Base):
+    __tablename__ = "recipes_recipeingredient"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipe_id = Column(Integer, ForeignKey("recipes_recipe.id"))
+    ingredient_id = Column(Integer, ForeignKey("recipes_ingredient.id"))
+    rank = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        Index("recipes_ri_ingredient_rank", "ingredient_id", "rank", "recipe_id"),
+    )
+
+class SimilarRecipe(Base):
+    """
+    Похожие рецепты; списки считает Django (recipes/similar.py), сервис только читает.
+    """
+    __tablename__ = "recipes_similarrecipe"
+
+    id = Column(Integer, primary_key=True)
+    recipe_id = Column(Integer, ForeignKey("recipes_recipe.id"), nullable=False)
+    similar_id = Column(Integer, ForeignKey("recipes_recipe.id"), nullable=False)
+    score = Column(Float, nullable=False)
+    rank = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("recipes_similar_recipe_rank", "recipe_id", "rank"),
+    )
+
+class Job(Base):
+    """
+    Очередь фоновых задач Django (recipes/tasks.py): сервис только ставит задачи,
+    выполняет их manage.py run_worker.
+    """
+    __tablename__ = "recipes_job"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(10), default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
+    locked_at = Column(DateTime(timezone=True))
+    last_error = Column(Text, default="", nullable=False)
+    created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("recipes_job_status_run_at", "status", "run_at"),
+    )
+
+# Жадная загрузка связей рецепта: автор через JOIN, категории одним запросом IN
+def with_related(stmt):
+    return stmt.options(joinedload(Recipe.author), selectinload(Recipe.categories))
@@ -0,0 +1,45 @@
+"""
+Потоковая выгрузка каталога рецептов для FastAPI.
+
+Адаптер к recipes/records.py: рецепты читаются пачками по ключу id
+с жадной загрузкой авторов и категорий, ответ отдаётся по мере чтения.
+Выгрузка открывает собственную сессию чтения: сессия из Depends(...)
+закрывается до того, как начнёт передаваться тело StreamingResponse.
+"""
+
+from sqlalchemy import select
+
+from recipes import records
+from .database import ReadSessionLocal, Recipe, with_related
+
+
+async def iter_batches(batch_size=records.BATCH_SIZE):
+    """
+    Пачки записей выгрузки для всех рецептов по возрастанию id.
+    """
+    last_id = 0
+    async with ReadSessionLocal() as db:
+        while True:
+            stmt = with_related(select(Recipe)).where(Recipe.id > last_id).order_by(Recipe.id).limit(batch_size)
+            batch = (await db.scalars(stmt)).all()
+            if not batch:
+                return
+            yield [records.make_record(recipe, recipe.author, sorted(recipe.categories, key=lambda c: c.name))
+                   for recipe in batch]
+            last_id = batch[-1].id
+            # Выгруженная пачка больше не нужна сессии
+            db.expunge_all()
+
+
+async def stream(fmt='ndjson', compress=False, batch_size=records.BATCH_SIZE):
+    """
+    Порции байтов выгрузки всего каталога: по одной на пачку рецептов.
+    """
+    writer = records.Writer(fmt, compress)
+    async for batch in iter_batches(batch_size):
+        data = writer.write(batch)
+        if data:
+            yield data
+    tail = writer.close()
+    if tail:
+        yield tail
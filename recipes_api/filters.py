@@ -0,0 +1,43 @@
+"""
+Фильтры списка рецептов для запросов SQLAlchemy.
+
+Адаптер к общей логике из recipes/filterspec.py: те же параметры и то же
+условие, что и в Django-представлении recipe_list (recipes/filters.py).
+"""
+
+from sqlalchemy import and_, not_, or_, select
+
+from .database import Ingredient, Recipe, RecipeCategory, RecipeIngredient
+
+
+def _in_categories(category_ids):
+    return Recipe.id.in_(select(RecipeCategory.recipe_id).where(RecipeCategory.category_id.in_(category_ids)))
+
+
+def _with_ingredients(keys):
+    """
+    Рецепты, у которых есть ингредиент с ключом, содержащим одну из основ keys.
+    """
+    ingredient_ids = select(Ingredient.id).where(or_(*(Ingredient.key.contains(key, autoescape=True)
+                                                       for key in keys)))
+    return Recipe.id.in_(select(RecipeIngredient.recipe_id).where(RecipeIngredient.ingredient_id.in_(ingredient_ids)))
+
+
+def condition(spec):
+    """
+    Условие WHERE для фильтров filterspec.RecipeFilter или None, если фильтров нет.
+    """
+    conditions = []
+    if spec.any_categories:
+        conditions.append(_in_categories(spec.any_categories))
+    conditions.extend(_in_categories([category_id]) for category_id in spec.all_categories)
+    if spec.author is not None:
+        conditions.append(Recipe.author_id == spec.author)
+    if spec.time_min is not None:
+        conditions.append(Recipe.cooking_time >= spec.time_min)
+    if spec.time_max is not None:
+        conditions.append(Recipe.cooking_time <= spec.time_max)
+    conditions.extend(_with_ingredients([key]) for key in spec.include)
+    if spec.exclude:
+        conditions.append(not_(_with_ingredients(spec.exclude)))
+    return and_(*conditions) if conditions else None
@@ -1,123 +1,326 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
-from .database import SessionLocal, Base, engine, get_db
-from .database import Recipe, Category, RecipeCategory
-from pydantic import BaseModel
+from decouple import config
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import async_engine, async_read_engine, get_db, get_read_db, utcnow
+from .database import Recipe, Category, RecipeCategory, RecipeIngredient, User, with_related
+from .pagination import paginate_statement, make_page
+from .schemas import (CategoryCount, RecipeBatch, RecipeCreate, RecipeDetail, RecipePage, RecipeSummary,
+                      RecipeUpdate)
+from . import bulk, categories, conditional, export, filters, metrics, pantry, search, serialization, similar
+from recipes.keyset import ORDERINGS, InvalidCursor
+from recipes import categorydiff, filterspec, records, textsearch
+from recipes.ingredients import MAX_MISSING
 
-# Создание таблиц (если они ещё не созданы)
-Base.metadata.create_all(bind=engine)
+# Схему создают миграции Django (python manage.py migrate), а не сервис при запуске.
+# Ответы сериализуются orjson; списки отдаются краткими записями (serialization.py)
+app = FastAPI(default_response_class=ORJSONResponse)
+# Замер запросов и /metrics для Prometheus (recipes_api/metrics.py)
+metrics.install(app, async_engine, async_read_engine)
 
-app = FastAPI()
+# Сколько рецептов можно запросить одним /recipes/batch
+MAX_BATCH_IDS = config("API_BATCH_MAX_IDS", default=100, cast=int)
 
 
-# Модели Pydantic для валидации данных
-class RecipeCreate(BaseModel):
-    title: str
-    description: str
-    steps: str
-    cooking_time: int
-    ingredients: str
-    categories: list[int]  # Список ID категорий
+async def load_recipe(db: AsyncSession, recipe_id: int):
+    """
+    Загружает рецепт вместе с автором и категориями фиксированным числом запросов.
+    """
+    return (await db.scalars(with_related(select(Recipe)).where(Recipe.id == recipe_id))).first()
 
 
-class RecipeUpdate(BaseModel):
-    description: str | None = None
-    steps: str | None = None
-    ingredients: str | None = None
-    categories: list[int] | None = None
+# Операции чтения (Read)
+@app.get("/recipes/", response_model=RecipePage)
+async def get_all_recipes(request: Request, cursor: str | None = None, limit: int | None = None,
+                          order: str | None = None, fields: str | None = None,
+                          db: AsyncSession = Depends(get_read_db)):
+    """
+    Получение рецептов постранично.
 
+    Страницы переключаются курсорами next_cursor / prev_cursor из ответа,
+    limit задаёт размер страницы, order — сортировку (id, title или cooking_time),
+    fields — поля рецептов через запятую. Фильтры category, category_all,
+    author, time_min, time_max, ingredient и exclude (recipes/filterspec.py)
+    сочетаются в одном запросе.
+    Поддерживает If-None-Match (ответ 304; ETag — по рецептам в ответе).
+    """
+    try:
+        spec = filterspec.parse(request.query_params.getlist)
+    except filterspec.InvalidFilter as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    where = filters.condition(spec)
+    names = serialization.summary_fields(fields)
+    # Столбцы всех сортировок нужны для курсоров, даже если их нет в fields
+    # и для ETag — id и updated_at строк страницы
+    keys = dict.fromkeys((*(name for ordering in ORDERINGS.values() for name in ordering), "updated_at"))
+    try:
+        stmt = serialization.summary_select(names, *keys)
+        if where is not None:
+            stmt = stmt.where(where)
+        stmt, context = paginate_statement(stmt, Recipe, cursor, limit, order)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    page = make_page(await db.execute(stmt), context)
+    validators = conditional.for_list(page.items, cursor, limit, order, spec.key(), names,
+                                      page.next_cursor, page.prev_cursor)
+    if cached := validators.not_modified(request):
+        return cached
+    return serialization.json_response({
+        "results": serialization.to_dicts(page.items, names),
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }, validators)
 
-# Операции чтения (Read)
-@app.get("/recipes/")
-async def get_all_recipes(db: Session = Depends(get_db)):
+
+@app.get("/recipes/cookable", response_model=list[RecipeSummary])
+async def get_cookable_recipes(ingredients: str, max_missing: int = 0, limit: int = 20, fields: str | None = None,
+                               db: AsyncSession = Depends(get_read_db)):
+    """
+    Рецепты, которые можно приготовить из перечисленных через запятую продуктов.
+
+    max_missing (не больше MAX_MISSING) допускает несколько недостающих
+    ингредиентов; рецепты, для которых не хватает меньше всего, идут первыми.
+    """
+    names = [name for name in ingredients.split(",") if name.strip()]
+    max_missing = max(0, min(max_missing, MAX_MISSING))
+    ids = await pantry.cookable_ids(db, names, max_missing, max(1, min(limit, 100)))
+    return serialization.json_response(
+        await serialization.load_summaries(db, ids, serialization.summary_fields(fields)))
+
+
+@app.get("/recipes/export")
+async def export_recipes(format: str = "ndjson", gzip: bool = False):
+    """
+    Потоковая выгрузка всех рецептов с авторами и категориями.
+
+    format — ndjson или csv, gzip=true сжимает ответ. Рецепты читаются
+    из базы пачками, поэтому память не зависит от размера каталога.
     """
-    Получение всех рецептов.
+    if format not in records.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Формат должен быть одним из: {', '.join(records.FORMATS)}")
+    filename = f"recipes.{format}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    media_type = "application/gzip" if gzip else records.CONTENT_TYPES[format]
+    return StreamingResponse(export.stream(format, gzip), media_type=media_type, headers=headers)
+
+
+def batch_ids(raw: list[str]):
+    """
+    id из параметров ids=1,2&ids=3 без повторов, в порядке запроса.
+    """
+    try:
+        ids = list(dict.fromkeys(int(part) for value in raw for part in value.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids: ожидаются целые числа через запятую") from None
+    if not ids:
+        raise HTTPException(status_code=400, detail="ids: не указано ни одного id")
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"ids: не больше {MAX_BATCH_IDS} id за запрос")
+    return ids
+
+
+# Объявлен до /recipes/{recipe_title}, иначе "batch" примется за название
+@app.get("/recipes/batch", response_model=RecipeBatch)
+async def get_recipes_batch(request: Request, db: AsyncSession = Depends(get_read_db)):
+    """
+    Несколько рецептов целиком по id (ids=1,2,3) за один запрос клиента.
+
+    Рецепты с авторами и категориями загружаются фиксированным числом
+    запросов при любом числе id и возвращаются в порядке ids; id, которых
+    нет в базе, перечислены в missing. Не больше MAX_BATCH_IDS id.
     """
-    recipes = db.query(Recipe).all()
-    return recipes
+    ids = batch_ids(request.query_params.getlist("ids"))
+    found = {recipe.id: recipe for recipe in await db.scalars(with_related(select(Recipe)).where(Recipe.id.in_(ids)))}
+    return {
+        "results": [found[recipe_id] for recipe_id in ids if recipe_id in found],
+        "missing": [recipe_id for recipe_id in ids if recipe_id not in found],
+    }
 
 
-@app.get("/recipes/{recipe_title}")
-async def get_recipe_by_title(recipe_title: str, db: Session = Depends(get_db)):
+@app.get("/recipes/{recipe_title}", response_model=RecipeDetail)
+async def get_recipe_by_title(recipe_title: str, request: Request, response: Response,
+                              db: AsyncSession = Depends(get_read_db)):
     """
     Получение рецепта по названию.
+
+    Сначала читаются только id и время изменения: если у клиента актуальная
+    копия (If-None-Match / If-Modified-Since), рецепт не загружается.
     """
-    recipe = db.query(Recipe).filter(Recipe.title == recipe_title).first()
-    if not recipe:
+    row = (await db.execute(
+        select(Recipe.id, Recipe.updated_at).where(Recipe.title == recipe_title).order_by(Recipe.id).limit(1)
+    )).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Рецепт не найден")
-    return recipe
+    validators = conditional.for_recipe(row.id, row.updated_at)
+    if cached := validators.not_modified(request):
+        return cached
+    validators.apply(response)
+    return await load_recipe(db, row.id)
 
 
-@app.get("/recipes/ingredient/{ingredient}")
-async def get_recipes_by_ingredient(ingredient: str, db: Session = Depends(get_db)):
+@app.get("/recipes/ingredient/{ingredient}", response_model=list[RecipeSummary])
+async def get_recipes_by_ingredient(ingredient: str, fields: str | None = None,
+                                    db: AsyncSession = Depends(get_read_db)):
     """
     Получение всех рецептов с указанным ингредиентом.
+
+    Ингредиент ищется в словаре нормализованных ингредиентов, а рецепты —
+    по индексу связей, без просмотра текстов всех рецептов.
     """
-    recipes = db.query(Recipe).filter(Recipe.ingredients.ilike(f"%{ingredient}%")).all()
+    names = serialization.summary_fields(fields)
+    ingredient_ids = await pantry.ingredient_ids_like(db, ingredient)
+    matching = select(RecipeIngredient.recipe_id).where(RecipeIngredient.ingredient_id.in_(ingredient_ids))
+    recipes = (await db.execute(serialization.summary_select(names).where(Recipe.id.in_(matching)))).all()
     if not recipes:
         raise HTTPException(status_code=404, detail="Рецепты не найдены")
-    return recipes
+    return serialization.json_response(serialization.to_dicts(recipes, names))
 
 
-@app.get("/recipes/category/{category_id}")
-async def get_recipes_by_category(category_id: int, db: Session = Depends(get_db)):
+@app.get("/recipes/category/{category_id}", response_model=list[RecipeSummary])
+async def get_recipes_by_category(category_id: int, request: Request, fields: str | None = None,
+                                  db: AsyncSession = Depends(get_read_db)):
     """
     Получение всех рецептов указанной категории.
+
+    Поддерживает If-None-Match (ответ 304; ETag — по рецептам в ответе).
     """
-    recipes = db.query(Recipe).join(RecipeCategory).join(Category).filter(Category.id == category_id).all()
+    names = serialization.summary_fields(fields)
+    in_category = Recipe.id.in_(select(RecipeCategory.recipe_id).where(RecipeCategory.category_id == category_id))
+    recipes = (await db.execute(
+        serialization.summary_select(names, "id", "updated_at").where(in_category))).all()
     if not recipes:
         raise HTTPException(status_code=404, detail="Рецепты не найдены")
-    return recipes
+    validators = conditional.for_list(recipes, "category", category_id, names)
+    if cached := validators.not_modified(request):
+        return cached
+    return serialization.json_response(serialization.to_dicts(recipes, names), validators)
+
+
+@app.get("/categories", response_model=list[CategoryCount])
+async def get_categories(db: AsyncSession = Depends(get_read_db)):
+    """
+    Все категории с числом рецептов в каждой (для фильтров).
+
+    Числа берутся из поддерживаемого счётчика, а не подсчётом связей.
+    """
+    rows = await db.execute(select(Category.id, Category.name, Category.recipe_count).order_by(Category.name))
+    return serialization.json_response([row._asdict() for row in rows])
+
+
+@app.get("/search", response_model=list[RecipeSummary])
+async def search_recipes(q: str, prefix: bool = False, category_id: int | None = None, limit: int = 20,
+                         fields: str | None = None, db: AsyncSession = Depends(get_read_db)):
+    """
+    Полнотекстовый поиск рецептов с ранжированием по релевантности.
+
+    Ищет по названию, описанию, ингредиентам и шагам с учётом словоформ.
+    prefix=true включает режим автодополнения (последнее слово — префикс).
+    """
+    limit = max(1, min(limit, textsearch.MAX_RESULTS))
+    ids = await search.search_ids(db, q, prefix, category_id, limit)
+    return serialization.json_response(
+        await serialization.load_summaries(db, ids, serialization.summary_fields(fields)))
 
 
 # Дополнительный запрос (по автору)
-@app.get("/recipes/author/{author_id}")
-async def get_recipes_by_author(author_id: int, db: Session = Depends(get_db)):
+@app.get("/recipes/author/{author_id}", response_model=list[RecipeSummary])
+async def get_recipes_by_author(author_id: int, fields: str | None = None,
+                                db: AsyncSession = Depends(get_read_db)):
     """
     Получение всех рецептов указанного автора.
     """
-    recipes = db.query(Recipe).filter(Recipe.author_id == author_id).all()
+    names = serialization.summary_fields(fields)
+    recipes = (await db.execute(serialization.summary_select(names).where(Recipe.author_id == author_id))).all()
     if not recipes:
         raise HTTPException(status_code=404, detail="Рецепты не найдены")
-    return recipes
+    return serialization.json_response(serialization.to_dicts(recipes, names))
+
+
+@app.get("/recipes/{recipe_id}/similar", response_model=list[RecipeSummary])
+async def get_similar_recipes(recipe_id: int, fields: str | None = None, db: AsyncSession = Depends(get_read_db)):
+    """
+    Похожие рецепты (по ингредиентам и категориям), от самого похожего.
+
+    Списки посчитаны заранее (recipes/similar.py), поэтому ответ — один
+    запрос по индексу. Пустой список — у рецепта пока нет похожих.
+    """
+    names = serialization.summary_fields(fields)
+    recipes = (await db.execute(similar.similar_select(recipe_id, names))).all()
+    if not recipes and await db.scalar(select(Recipe.id).where(Recipe.id == recipe_id)) is None:
+        raise HTTPException(status_code=404, detail="Рецепт не найден")
+    return serialization.json_response(serialization.to_dicts(recipes, names))
 
 
 # Операции создания (Create)
-@app.post("/recipes/")
-async def create_recipe(recipe: RecipeCreate, db: Session = Depends(get_db)):
+async def assign_categories(db: AsyncSession, assignments):
+    """
+    Назначает рецептам категории по разнице с текущими; несуществующая категория — 404.
+    """
+    try:
+        return await categories.assign(db, assignments)
+    except categorydiff.UnknownCategories:
+        raise HTTPException(status_code=404, detail="Категория не найдена") from None
+
+
+@app.post("/recipes/", response_model=RecipeDetail)
+async def create_recipe(recipe: RecipeCreate, db: AsyncSession = Depends(get_db)):
     """
     Добавление нового рецепта.
     """
+    if not await db.get(User, recipe.author_id):
+        raise HTTPException(status_code=404, detail="Автор не найден")
     new_recipe = Recipe(
         title=recipe.title,
         description=recipe.description,
         steps=recipe.steps,
         cooking_time=recipe.cooking_time,
-        ingredients=recipe.ingredients
+        ingredients=recipe.ingredients,
+        author_id=recipe.author_id
     )
     db.add(new_recipe)
-    db.commit()
-    db.refresh(new_recipe)
+    await db.flush()
 
     # Добавление категорий
-    for category_id in recipe.categories:
-        category = db.query(Category).filter(Category.id == category_id).first()
-        if not category:
-            raise HTTPException(status_code=404, detail="Категория не найдена")
-        recipe_category = RecipeCategory(recipe_id=new_recipe.id, category_id=category_id)
-        db.add(recipe_category)
-    db.commit()
+    await assign_categories(db, {new_recipe.id: recipe.categories})
+    await search.index_recipes(db, [new_recipe])
+    await pantry.sync_recipes(db, [new_recipe])
+    await similar.schedule(db, [new_recipe.id])
+    await db.commit()
+
+    return await load_recipe(db, new_recipe.id)
+
+
+# Массовые операции: маршруты объявлены до /recipes/{recipe_id}
+@app.post("/recipes/bulk")
+async def create_recipes_bulk(request: Request, batch_size: int | None = Query(None, ge=1, le=bulk.MAX_BATCH_SIZE),
+                              db: AsyncSession = Depends(get_db)):
+    """
+    Массовое добавление рецептов из JSON-массива или NDJSON.
+
+    Элементы записываются пакетами по batch_size (1..bulk.MAX_BATCH_SIZE, иначе 422),
+    каждый пакет — целиком или никак; тело больше bulk.MAX_BODY_BYTES — 413.
+    Ответ содержит id созданных рецептов и ошибки по элементам.
+    """
+    return await bulk.run(db, request, bulk.create_batch, batch_size)
 
-    return new_recipe
+
+@app.put("/recipes/bulk")
+async def update_recipes_bulk(request: Request, batch_size: int | None = Query(None, ge=1, le=bulk.MAX_BATCH_SIZE),
+                              db: AsyncSession = Depends(get_db)):
+    """
+    Массовое редактирование рецептов; каждый элемент содержит id рецепта.
+    """
+    return await bulk.run(db, request, bulk.update_batch, batch_size)
 
 
 # Операции обновления (Update)
-@app.put("/recipes/{recipe_id}")
-async def update_recipe(recipe_id: int, recipe_update: RecipeUpdate, db: Session = Depends(get_db)):
+@app.put("/recipes/{recipe_id}", response_model=RecipeDetail)
+async def update_recipe(recipe_id: int, recipe_update: RecipeUpdate, db: AsyncSession = Depends(get_db)):
     """
     Редактирование рецепта.
     """
-    db_recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
+    db_recipe = await db.get(Recipe, recipe_id)
     if not db_recipe:
         raise HTTPException(status_code=404, detail="Рецепт не найден")
 
@@ -127,18 +330,17 @@ async def update_recipe(recipe_id: int, recipe_update: RecipeUpdate, db: Session
         db_recipe.steps = recipe_update.steps
     if recipe_update.ingredients is not None:
         db_recipe.ingredients = recipe_update.ingredients
+    db_recipe.updated_at = utcnow()  # Изменение одних категорий не затрагивает строку рецепта
 
+    changed = False
     if recipe_update.categories is not None:
-        # Удаляем старые связи
-        db.query(RecipeCategory).filter(RecipeCategory.recipe_id == recipe_id).delete()
-        # Добавляем новые
-        for category_id in recipe_update.categories:
-            category = db.query(Category).filter(Category.id == category_id).first()
-            if not category:
-                raise HTTPException(status_code=404, detail="Категория не найдена")
-            recipe_category = RecipeCategory(recipe_id=recipe_id, category_id=category_id)
-            db.add(recipe_category)
-
-    db.commit()
-    db.refresh(db_recipe)
-    return db_recipe
\ No newline at end of file
+        # Меняются только связи, которых нет в новом наборе или нет в текущем
+        changed = bool(await assign_categories(db, {recipe_id: recipe_update.categories}))
+
+    await search.index_recipes(db, [db_recipe])
+    if recipe_update.ingredients is not None:
+        await pantry.sync_recipes(db, [db_recipe])
+    if recipe_update.ingredients is not None or changed:
+        await similar.schedule(db, [recipe_id])
+    await db.commit()
+    return await load_recipe(db, recipe_id)
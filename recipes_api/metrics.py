@@ -0,0 +1,66 @@
+"""
+Метрики производительности запросов FastAPI-сервиса.
+
+Адаптер к recipes/metrics.py: middleware замеряет каждый запрос,
+события движков SQLAlchemy сообщают о SQL-запросах, а маршрут /metrics
+отдаёт накопленные метрики процесса в формате Prometheus.
+"""
+
+import time
+
+from fastapi import FastAPI, Request, Response
+from sqlalchemy import event
+
+from recipes import metrics
+
+
+def instrument(engine):
+    """
+    Учитывает SQL-запросы движка в замере текущего запроса.
+    """
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        metrics.record_query(statement, time.perf_counter() - conn.info["query_started"].pop())
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before)
+    event.listen(engine.sync_engine, "after_cursor_execute", after)
+
+
+async def request_metrics(request: Request, call_next):
+    """
+    Замеряет запрос: время ответа, SQL-запросы и размер ответа.
+    """
+    stats, token = metrics.start()
+    response = None
+    try:
+        response = await call_next(request)
+        return response
+    finally:
+        route = request.scope.get("route")
+        # Шаблон маршрута, а не путь: /recipes/{recipe_title}, а не /recipes/Борщ
+        path = route.path if route is not None else "<unmatched>"
+        length = response.headers.get("content-length") if response is not None else None
+        metrics.finish(stats, token, "api", request.method, path,
+                       response.status_code if response is not None else 500,
+                       int(length) if length is not None else None)
+
+
+async def metrics_endpoint():
+    """
+    Метрики запросов этого процесса для Prometheus.
+    """
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def install(app: FastAPI, *engines):
+    """
+    Подключает замер запросов и маршрут /metrics к приложению.
+    """
+    if not metrics.ENABLED:
+        return
+    for engine in engines:
+        instrument(engine)
+    app.middleware("http")(request_metrics)
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
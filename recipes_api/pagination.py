@@ -0,0 +1,60 @@
+"""
+Курсорная пагинация запросов SQLAlchemy.
+
+Адаптер к общей логике из recipes/keyset.py: тот же формат курсоров
+и те же сортировки, что и в Django-представлении recipe_list.
+"""
+
+from sqlalchemy import and_, or_
+
+from recipes.keyset import ORDERINGS, build_page, clamp_page_size, decode_cursor, resolve_ordering
+
+
+def keyset_condition(model, fields, values, backwards=False):
+    """
+    Условие «строго после (до) курсора» для ключа сортировки.
+
+    Составной ключ записывается как title >= :t AND (title > :t OR id > :id),
+    чтобы первая часть давала поиск по индексу.
+    """
+    columns = [getattr(model, name) for name in fields]
+
+    def strict(column, value):
+        return column < value if backwards else column > value
+
+    def inclusive(column, value):
+        return column <= value if backwards else column >= value
+
+    condition = strict(columns[-1], values[-1])
+    for column, value in reversed(list(zip(columns[:-1], values[:-1]))):
+        condition = and_(inclusive(column, value), or_(strict(column, value), condition))
+    return condition
+
+
+def paginate_statement(stmt, model, cursor=None, page_size=None, ordering=None):
+    """
+    Дополняет select-запрос условием от курсора, сортировкой и лимитом.
+
+    Возвращает (stmt, context), где context передаётся в make_page вместе
+    с выбранными строками. Некорректный курсор приводит к keyset.InvalidCursor.
+    """
+    ordering = resolve_ordering(ordering)
+    page_size = clamp_page_size(page_size)
+    fields = ORDERINGS[ordering]
+    position = decode_cursor(cursor, ordering) if cursor else None
+
+    if position is not None:
+        stmt = stmt.where(keyset_condition(model, fields, position.values, position.backwards))
+    backwards = position is not None and position.backwards
+    columns = [getattr(model, name) for name in fields]
+    stmt = stmt.order_by(*(column.desc() if backwards else column.asc() for column in columns))
+    stmt = stmt.limit(page_size + 1)
+    return stmt, (page_size, ordering, position)
+
+
+def make_page(rows, context):
+    """
+    Собирает keyset.Page из строк, выбранных запросом paginate_statement.
+    """
+    page_size, ordering, position = context
+    return build_page(list(rows), page_size, ordering, position)
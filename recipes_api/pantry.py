@@ -0,0 +1,153 @@
+"""
+Инвертированный индекс ингредиентов для FastAPI.
+
+Те же таблицы recipes_ingredient / recipes_recipeingredient и тот же
+алгоритм, что и у Django (recipes/pantry.py): рецепты, созданные через API,
+сразу участвуют в подборе по продуктам. Разбор текста и ранжирование
+по редкости — в recipes/ingredients.py.
+"""
+
+from collections import Counter, defaultdict
+
+from sqlalchemy import delete, func, insert, intersect, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from recipes import ingredients
+from .database import Ingredient, Recipe, RecipeIngredient, at_least_zero
+
+
+async def resolve(db: AsyncSession, keys_with_names, create=False):
+    """
+    Возвращает словарь {ключ: id ингредиента} одним запросом,
+    при create=True создавая недостающие ингредиенты.
+    """
+    names = dict(keys_with_names)
+    if not names:
+        return {}
+    def lookup(keys):
+        return select(Ingredient.key, Ingredient.id).where(Ingredient.key.in_(keys))
+
+    found = dict((await db.execute(lookup(names))).all())
+    missing = [key for key in names if key not in found]
+    if create and missing:
+        await db.execute(insert(Ingredient), [{'key': key, 'name': names[key], 'recipe_count': 0} for key in missing])
+        found.update((await db.execute(lookup(missing))).all())
+    return found
+
+
+async def adjust_counts(db: AsyncSession, deltas):
+    """
+    Изменяет Ingredient.recipe_count на величины из {id: приращение}.
+    """
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        await db.execute(update(Ingredient).where(Ingredient.id.in_(pks))
+                   .values(recipe_count=at_least_zero(Ingredient.recipe_count + delta)))
+
+
+async def sync_recipes(db: AsyncSession, recipes):
+    """
+    Приводит связи рецептов с ингредиентами к их текстовым спискам
+    (в текущей транзакции). Меняются только изменившиеся связи.
+    """
+    parsed = {recipe.id: ingredients.parse(recipe.ingredients) for recipe in recipes}
+    if not parsed:
+        return
+    ids = await resolve(db, [pair for pairs in parsed.values() for pair in pairs], create=True)
+    wanted = {recipe_id: {ids[key] for key, _ in pairs} for recipe_id, pairs in parsed.items()}
+
+    current = defaultdict(dict)
+    rows = await db.execute(select(RecipeIngredient.id, RecipeIngredient.recipe_id,
+                             RecipeIngredient.ingredient_id, RecipeIngredient.rank)
+                      .where(RecipeIngredient.recipe_id.in_(parsed)))
+    for link_id, recipe_id, ingredient_id, rank in rows:
+        current[recipe_id][ingredient_id] = (link_id, rank)
+
+    deltas = Counter()
+    for recipe_id, pks in wanted.items():
+        deltas.update(pks - current[recipe_id].keys())
+        deltas.subtract(current[recipe_id].keys() - pks)
+    await adjust_counts(db, deltas)
+    all_ids = set().union(*wanted.values())
+    counts = dict((await db.execute(select(Ingredient.id, Ingredient.recipe_count)
+                                    .where(Ingredient.id.in_(all_ids)))).all())
+
+    to_add, to_rerank, removed = [], [], []
+    for recipe_id, pks in wanted.items():
+        ranks = ingredients.rank_by_rarity(pks, counts)
+        for pk, (link_id, rank) in current[recipe_id].items():
+            if pk not in ranks:
+                removed.append(link_id)
+            elif ranks[pk] != rank:
+                to_rerank.append({'id': link_id, 'rank': ranks[pk]})
+        to_add.extend({'recipe_id': recipe_id, 'ingredient_id': pk, 'rank': rank}
+                      for pk, rank in ranks.items() if pk not in current[recipe_id])
+    if removed:
+        await db.execute(delete(RecipeIngredient).where(RecipeIngredient.id.in_(removed)))
+    if to_add:
+        await db.execute(insert(RecipeIngredient), to_add)
+    if to_rerank:
+        await db.execute(update(RecipeIngredient), to_rerank)
+
+    # Один UPDATE на каждое встретившееся число ингредиентов, а не на рецепт
+    by_count = defaultdict(list)
+    for recipe_id, pks in wanted.items():
+        by_count[len(pks)].append(recipe_id)
+    for count, recipe_ids in by_count.items():
+        await db.execute(update(Recipe).where(Recipe.id.in_(recipe_ids), Recipe.ingredient_count != count)
+                         .values(ingredient_count=count))
+
+
+async def cookable_ids(db: AsyncSession, names, max_missing=0, limit=100):
+    """
+    Возвращает id рецептов, которые можно приготовить из перечисленных продуктов
+    (не более max_missing недостающих ингредиентов), по возрастанию недостающих.
+
+    Кандидаты отбираются по рангам редкости так же, как в recipes/pantry.py.
+    """
+    keys = [ingredients.normalize(name) for name in names]
+    ingredient_ids = list((await resolve(db, [(key, key) for key in keys if key])).values())
+    if not ingredient_ids:
+        return []
+
+    def links(*conditions):
+        return select(RecipeIngredient.recipe_id).where(RecipeIngredient.ingredient_id.in_(ingredient_ids),
+                                                        *conditions)
+
+    if max_missing == 0:
+        single = links(RecipeIngredient.rank == 0).join(Recipe, Recipe.id == RecipeIngredient.recipe_id) \
+            .where(Recipe.ingredient_count == 1)
+        # SQLite не допускает вложенных составных SELECT, поэтому два условия IN
+        pairs = intersect(links(RecipeIngredient.rank == 0), links(RecipeIngredient.rank == 1))
+        candidates = or_(Recipe.id.in_(pairs), Recipe.id.in_(single))
+    else:
+        candidates = Recipe.id.in_(links(RecipeIngredient.rank <= max_missing))
+
+    # Ингредиенты кандидата вне набора: просматриваются только его собственные связи
+    outside = (
+        select(func.count(RecipeIngredient.id))
+        .where(RecipeIngredient.recipe_id == Recipe.id, RecipeIngredient.ingredient_id.not_in(ingredient_ids))
+        .scalar_subquery()
+    )
+    stmt = (
+        select(Recipe.id)
+        .where(candidates, outside <= max_missing)
+        .order_by(*((outside, Recipe.id) if max_missing else (Recipe.id,)))
+        .limit(limit)
+    )
+    return list(await db.scalars(stmt))
+
+
+async def ingredient_ids_like(db: AsyncSession, ingredient: str):
+    """
+    Id ингредиентов, в ключе которых встречается основа запрошенного слова.
+
+    Просматривается только словарь ингредиентов, а не тексты рецептов.
+    """
+    key = ingredients.normalize(ingredient)
+    if not key:
+        return []
+    return list(await db.scalars(select(Ingredient.id).where(Ingredient.key.contains(key, autoescape=True))))
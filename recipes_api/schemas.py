@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+# Модели Pydantic для валидации данных
+class RecipeCreate(BaseModel):
+    title: str
+    description: str
+    steps: str
+    cooking_time: int
+    ingredients: str
+    author_id: int  # ID автора (auth_user)
+    categories: list[int]  # Список ID категорий
+
+
+class RecipeUpdate(BaseModel):
+    description: str | None = None
+    steps: str | None = None
+    ingredients: str | None = None
+    categories: list[int] | None = None
+
+
+class RecipeBulkUpdate(RecipeUpdate):
+    id: int  # ID изменяемого рецепта
+
+
+# Модели ответов: краткая запись для списков и полная для одного рецепта
+class AuthorOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+
+
+class CategoryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+
+
+class CategoryCount(CategoryOut):
+    """
+    Категория с числом рецептов — для фильтров.
+    """
+    recipe_count: int
+
+
+class RecipeSummary(BaseModel):
+    """
+    Рецепт в списке: только столбцы таблицы рецептов, без текстов и связей.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    description: str
+    cooking_time: int
+    image: str | None = None
+    author_id: int
+    updated_at: datetime
+
+
+class RecipeDetail(RecipeSummary):
+    """
+    Рецепт целиком: с шагами, ингредиентами, автором и категориями.
+    """
+    steps: str
+    ingredients: str
+    ingredient_count: int
+    author: AuthorOut
+    categories: list[CategoryOut]
+
+
+class RecipeBatch(BaseModel):
+    """
+    Рецепты по списку id: найденные в порядке запроса и id, которых нет.
+    """
+    results: list[RecipeDetail]
+    missing: list[int]
+
+
+class RecipePage(BaseModel):
+    results: list[RecipeSummary]
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
@@ -0,0 +1,63 @@
+"""
+Полнотекстовый поиск рецептов для FastAPI.
+
+Адаптер к recipes/textsearch.py поверх сессии SQLAlchemy: тот же индекс
+FTS5, что и у Django, поэтому рецепты, созданные через API, сразу видны
+в поиске на сайте, и наоборот.
+"""
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from recipes import textsearch
+from .database import Recipe, RecipeCategory
+
+FTS_TABLE = textsearch.FTS_TABLE
+COLUMNS = ', '.join(textsearch.FIELDS)
+
+
+def is_enabled(db: AsyncSession):
+    """
+    Индекс FTS5 есть только в SQLite.
+    """
+    return db.bind.dialect.name == 'sqlite'
+
+
+async def index_recipes(db: AsyncSession, recipes):
+    """
+    Добавляет или обновляет рецепты в поисковом индексе (в текущей транзакции).
+    """
+    if not is_enabled(db):
+        return
+    rows = [dict(zip(('id',) + textsearch.FIELDS, (recipe.id, *textsearch.document(recipe))))
+            for recipe in recipes]
+    if not rows:
+        return
+    await db.execute(text(f'DELETE FROM {FTS_TABLE} WHERE rowid = :id'), [{'id': row['id']} for row in rows])
+    values = ', '.join(f':{name}' for name in textsearch.FIELDS)
+    await db.execute(text(f'INSERT INTO {FTS_TABLE} (rowid, {COLUMNS}) VALUES (:id, {values})'), rows)
+
+
+async def search_ids(db: AsyncSession, query: str, prefix=False, category_id=None, limit=textsearch.MAX_RESULTS):
+    """
+    Возвращает id рецептов, подходящих под запрос, от самых релевантных.
+    """
+    if not is_enabled(db):
+        # Как icontains в Django: % и _ в запросе ищутся буквально
+        stmt = select(Recipe.id).where(or_(Recipe.title.icontains(query, autoescape=True),
+                                           Recipe.ingredients.icontains(query, autoescape=True)))
+        if category_id:
+            stmt = stmt.join(RecipeCategory).where(RecipeCategory.category_id == category_id)
+        return list(await db.scalars(stmt.limit(limit)))
+
+    expression = textsearch.match_expression(query, prefix)
+    if expression is None:
+        return []
+    sql = f'SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE}'
+    params = {'match': expression, 'limit': limit}
+    if category_id:
+        sql += (f' JOIN recipes_recipecategory rc ON rc.recipe_id = {FTS_TABLE}.rowid'
+                ' AND rc.category_id = :category_id')
+        params['category_id'] = category_id
+    sql += f' WHERE {FTS_TABLE} MATCH :match ORDER BY {textsearch.RANK_SQL} LIMIT :limit'
+    return list(await db.scalars(text(sql), params))
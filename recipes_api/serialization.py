@@ -0,0 +1,63 @@
+"""
+Быстрая сериализация списков рецептов.
+
+Списки выбирают только столбцы краткой записи (schemas.RecipeSummary)
+без загрузки связей и отдаются словарями через orjson, минуя
+проверку моделью ответа и jsonable_encoder. Параметр fields
+сужает набор полей ещё сильнее: fields=id,title.
+"""
+
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+
+from .database import Recipe
+from .schemas import RecipeSummary
+
+SUMMARY_FIELDS = tuple(RecipeSummary.model_fields)
+
+
+def summary_fields(fields: str | None):
+    """
+    Поля ответа из параметра fields (через запятую); без параметра — все поля краткой записи.
+    """
+    if not fields:
+        return SUMMARY_FIELDS
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in SUMMARY_FIELDS]
+    if unknown or not names:
+        raise HTTPException(status_code=400,
+                            detail=f"Неизвестные поля: {', '.join(unknown)}. Доступны: {', '.join(SUMMARY_FIELDS)}")
+    return names
+
+
+def summary_select(names, *extra):
+    """
+    select только нужных столбцов рецепта; extra — дополнительные поля, например для курсора.
+    """
+    return select(*(getattr(Recipe, name) for name in dict.fromkeys((*names, *extra))))
+
+
+def to_dicts(rows, names):
+    """
+    Строки результата как словари с полями names.
+    """
+    return [{name: getattr(row, name) for name in names} for row in rows]
+
+
+async def load_summaries(db, ids, names):
+    """
+    Краткие записи рецептов по списку id одним запросом, в порядке списка.
+    """
+    rows = {row.id: row for row in await db.execute(summary_select(names, "id").where(Recipe.id.in_(ids)))}
+    return to_dicts((rows[pk] for pk in ids if pk in rows), names)
+
+
+def json_response(content, validators=None):
+    """
+    Ответ, сериализованный orjson; validators (conditional.Validators) добавляют ETag и Last-Modified.
+    """
+    response = ORJSONResponse(content)
+    if validators is not None:
+        validators.apply(response)
+    return response
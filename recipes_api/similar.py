@@ -0,0 +1,36 @@
+"""
+Похожие рецепты для FastAPI.
+
+Списки читаются из таблицы recipes_similarrecipe, которую заполняет
+Django (recipes/similar.py). После записи рецептов через API пересчёт
+ставится в общую очередь фоновых задач (recipes_job) в той же транзакции —
+его выполнит manage.py run_worker, как и после записи через Django.
+"""
+
+from decouple import config
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import Job, Recipe, SimilarRecipe
+from .serialization import summary_select
+
+# Имя задачи в recipes/tasks.py и число попыток — как у очереди Django (TASKS_MAX_ATTEMPTS)
+TASK_NAME = "update_similar"
+MAX_ATTEMPTS = config("TASKS_MAX_ATTEMPTS", default=5, cast=int)
+
+
+def similar_select(recipe_id: int, names):
+    """
+    Краткие записи похожих рецептов по порядку — один запрос по индексу (recipe, rank).
+    """
+    return (summary_select(names)
+            .join(SimilarRecipe, SimilarRecipe.similar_id == Recipe.id)
+            .where(SimilarRecipe.recipe_id == recipe_id)
+            .order_by(SimilarRecipe.rank))
+
+
+async def schedule(db: AsyncSession, recipe_ids):
+    """
+    Ставит в очередь пересчёт похожих для рецептов с изменёнными ингредиентами или категориями.
+    """
+    if recipe_ids:
+        db.add(Job(name=TASK_NAME, payload={"recipe_ids": sorted(recipe_ids)}, max_attempts=MAX_ATTEMPTS))
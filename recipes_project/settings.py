@@ -14,6 +14,8 @@ from pathlib import Path
 import os
 from decouple import config
 
+from recipes import dbconfig
+
 # Базовая директория проекта
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -48,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым: замер охватывает все остальные middleware (метрики на /metrics/)
+    'recipes.middleware.request_metrics',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,13 +59,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'recipes.middleware.read_only_requests',
 ]
 
 ROOT_URLCONF = 'recipes_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени отрисовки для метрик
+        'BACKEND': 'recipes.templating.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')]
         ,
         'APP_DIRS': True,
@@ -82,13 +88,65 @@ WSGI_APPLICATION = 'recipes_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# URL базы и параметры пула общие с FastAPI-сервисом: recipes/dbconfig.py
+# (DATABASE_URL, DB_*). Для SQLite при подключении применяются PRAGMA
+# из recipes/sqlitetuning.py (WAL включается один раз командой
+# sqlite_journal_mode), транзакции сразу берут блокировку
+# записи (IMMEDIATE); для PostgreSQL задаётся statement_timeout.
+# Псевдоним readonly — та же база в режиме только для чтения: через него
+# recipes.routers.ReadOnlyRouter выполняет чтение в GET-запросах.
+# Реплики replica_N (DATABASE_REPLICA_URLS) читают главная страница, список
+# и страница рецепта; соединения постоянные (DB_CONN_MAX_AGE) с проверкой.
+
 DATABASES = {
+    'default': dbconfig.django_database(),
+    'readonly': {
+        **dbconfig.django_database(read_only=True),
+        'TEST': {'MIRROR': 'default'},
+    },
+    **dbconfig.django_replicas(),
+}
+
+DATABASE_ROUTERS = ['recipes.routers.ReadOnlyRouter']
+
+# Сколько секунд после POST-запроса клиент читает из основной базы, а не
+# из реплик: свои изменения видны, даже пока реплики отстают
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# По умолчанию — память процесса с вытеснением давно не использованных
+# записей (LRU). Для общего кэша нескольких процессов:
+# CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# и CACHE_LOCATION=/путь/к/каталогу
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='recipes'),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=5000, cast=int),
+        },
     }
 }
 
+# Время жизни закэшированных фрагментов страниц (сек.); главная страница
+# со случайными рецептами кэшируется коротко, чтобы подборка менялась
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=600, cast=int)
+PAGE_CACHE_INDEX_TIMEOUT = config('PAGE_CACHE_INDEX_TIMEOUT', default=60, cast=int)
+
+# Фоновые задачи (recipes/tasks.py, manage.py run_worker). При TASKS_EAGER
+# задачи выполняются сразу в процессе запроса — для тестов и разработки
+# без запущенного исполнителя. Повтор после ошибки — через
+# TASKS_RETRY_DELAY * 2^(попытка - 1) сек.; задача, взятая исполнителем
+# и не завершённая за TASKS_LOCK_TIMEOUT сек., снова считается ожидающей
+TASKS_EAGER = config('TASKS_EAGER', default=False, cast=bool)
+TASKS_MAX_ATTEMPTS = config('TASKS_MAX_ATTEMPTS', default=5, cast=int)
+TASKS_RETRY_DELAY = config('TASKS_RETRY_DELAY', default=10, cast=int)
+TASKS_RETRY_MAX_DELAY = config('TASKS_RETRY_MAX_DELAY', default=3600, cast=int)
+TASKS_LOCK_TIMEOUT = config('TASKS_LOCK_TIMEOUT', default=300, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -134,4 +192,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = 'index'
-LOGOUT_REDIRECT_URL = 'index'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'index'
+
+# Журнал медленных запросов с их SQL (recipes/metrics.py, порог SLOW_REQUEST_MS в окружении)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'recipes.slow': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}